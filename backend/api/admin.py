@@ -1,5 +1,68 @@
+from django.conf import settings
 from django.contrib import admin
-from .models import Item
+from django.contrib.admin.views.main import SEARCH_VAR
+from django.core.paginator import Paginator
+from django.db import connection
+from django.utils.functional import cached_property
+
+from .models import (
+    AgentProfile, Application, Attachment, BankAccount, BusinessDetails, BusinessOwner,
+    ChangeLog, CoApplicant, Conclusion, DataQualityFinding, DataQualityScan, Item, Loan, OtherBusiness,
+    PersonMet, SecurityDetails,
+)
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that never runs an unbounded COUNT(*).
+
+    An unfiltered changelist uses the planner's row estimate (pg_class.reltuples)
+    once the table is past ADMIN_COUNT_LIMIT rows. A filtered one counts at
+    most ADMIN_COUNT_LIMIT rows, so deep pages beyond that are not offered.
+    """
+
+    @cached_property
+    def count(self):
+        limit = settings.ADMIN_COUNT_LIMIT
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = self.estimate(queryset.model)
+            if estimate >= limit:
+                return estimate
+        return queryset.order_by()[:limit].count()
+
+    @staticmethod
+    def estimate(model):
+        if connection.vendor != 'postgresql':
+            return -1  # no planner statistics; count() falls back to the capped count
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                [connection.ops.quote_name(model._meta.db_table)],
+            )
+            row = cursor.fetchone()
+        # -1 means the table was never analyzed
+        return row[0] if row else -1
+
+
+class ScalableAdmin(admin.ModelAdmin):
+    """Changelist defaults that stay fast on large tables"""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_per_page = 50
+    # search_fields with an integer column; skipped for non-numeric terms
+    numeric_search_fields = ()
+
+    def get_search_fields(self, request):
+        fields = super().get_search_fields(request)
+        if not all(term.isdigit() for term in request.GET.get(SEARCH_VAR, '').split()):
+            fields = [field for field in fields if field not in self.numeric_search_fields]
+        return fields
+
+    def get_search_results(self, request, queryset, search_term):
+        if search_term.strip() and not self.get_search_fields(request):
+            return queryset.none(), False
+        return super().get_search_results(request, queryset, search_term)
 
 
 @admin.register(Item)
@@ -8,3 +71,234 @@ class ItemAdmin(admin.ModelAdmin):
     list_filter = ['completed', 'created_at']
     search_fields = ['title', 'description']
 
+
+@admin.register(AgentProfile)
+class AgentProfileAdmin(ScalableAdmin):
+    list_display = ['user', 'role', 'supervisor', 'branch_code']
+    list_filter = ['role', 'branch_code']
+    list_select_related = ['user', 'supervisor']
+    search_fields = ['user__username', 'supervisor__username']
+    autocomplete_fields = ['user', 'supervisor']
+
+
+# ============ Application and children ============
+
+class BusinessDetailsInline(admin.StackedInline):
+    model = BusinessDetails
+    extra = 0
+    show_change_link = True
+    readonly_fields = [
+        'latitude', 'longitude', 'geohash',
+        'turnover_numeric', 'net_income_numeric', 'stock_value_numeric',
+    ]
+
+
+class CoApplicantInline(admin.StackedInline):
+    model = CoApplicant
+    extra = 0
+    readonly_fields = ['turnover_numeric', 'net_income_numeric', 'stock_value_numeric']
+
+
+class SecurityDetailsInline(admin.StackedInline):
+    model = SecurityDetails
+    extra = 0
+
+
+class ConclusionInline(admin.StackedInline):
+    model = Conclusion
+    extra = 0
+    readonly_fields = ['pre_score', 'pre_score_status', 'pre_scored_at']
+
+
+class OtherBusinessInline(admin.TabularInline):
+    model = OtherBusiness
+    extra = 0
+    readonly_fields = ['yearly_income_numeric']
+
+
+class LoanInline(admin.TabularInline):
+    model = Loan
+    extra = 0
+    readonly_fields = ['loan_amount_numeric']
+
+
+class BankAccountInline(admin.TabularInline):
+    model = BankAccount
+    extra = 0
+    readonly_fields = ['cc_limit_numeric']
+
+
+class AttachmentInline(admin.TabularInline):
+    """Read-only: deleting content must go through api.attachments.delete_attachment"""
+    model = Attachment
+    extra = 0
+    fields = ['filename', 'kind', 'blob', 'uploaded_by', 'created_at']
+    readonly_fields = fields
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('blob', 'uploaded_by')
+
+
+@admin.register(Application)
+class ApplicationAdmin(ScalableAdmin):
+    list_display = [
+        'id', 'file_no', 'applicant_name', 'agent', 'overall_status', 'pre_score',
+        'created_at', 'submitted_at',
+    ]
+    list_select_related = ['agent', 'conclusion']
+    list_filter = ['conclusion__overall_status', 'gender']
+    # Explicit lookups: '=' and '^' mean iexact/istartswith, which wrap the
+    # column in UPPER() and miss plain b-tree indexes. The name prefix search
+    # is served by api_app_name_prefix_idx on UPPER(applicant_name).
+    search_fields = ['file_no__exact', 'applicant_name__istartswith', 'telephone__exact']
+    ordering = ['-id']
+    autocomplete_fields = ['agent']
+    readonly_fields = ['created_at', 'updated_at', 'submitted_at']
+    inlines = [
+        BusinessDetailsInline, CoApplicantInline, OtherBusinessInline, LoanInline,
+        BankAccountInline, SecurityDetailsInline, ConclusionInline, AttachmentInline,
+    ]
+
+    @admin.display(description='Status', ordering='conclusion__overall_status')
+    def overall_status(self, obj):
+        conclusion = getattr(obj, 'conclusion', None)
+        return conclusion.overall_status if conclusion else '-'
+
+    @admin.display(description='Pre-score', ordering='conclusion__pre_score')
+    def pre_score(self, obj):
+        conclusion = getattr(obj, 'conclusion', None)
+        return conclusion.pre_score if conclusion else None
+
+
+class ApplicationChildAdmin(ScalableAdmin):
+    """Child rows: show their application without one query per row"""
+    list_select_related = ['application']
+    autocomplete_fields = ['application']
+    search_fields = ['application__file_no__exact', 'application__applicant_name__istartswith']
+    ordering = ['-id']
+
+
+class BusinessOwnerInline(admin.TabularInline):
+    model = BusinessOwner
+    extra = 0
+
+
+class PersonMetInline(admin.TabularInline):
+    model = PersonMet
+    extra = 0
+
+
+@admin.register(BusinessDetails)
+class BusinessDetailsAdmin(ApplicationChildAdmin):
+    list_display = ['id', 'application', 'business_name', 'ownership_type', 'turnover_numeric']
+    list_filter = ['ownership_type', 'business_location', 'shop_ownership']
+    search_fields = ApplicationChildAdmin.search_fields + ['gst_number__exact', 'business_name__istartswith']
+    readonly_fields = BusinessDetailsInline.readonly_fields
+    inlines = [BusinessOwnerInline, PersonMetInline]
+
+
+@admin.register(CoApplicant)
+class CoApplicantAdmin(ApplicationChildAdmin):
+    list_display = ['id', 'application', 'involvement_type', 'business_name', 'employer_name']
+    list_filter = ['involvement_type']
+    readonly_fields = CoApplicantInline.readonly_fields
+
+
+@admin.register(OtherBusiness)
+class OtherBusinessAdmin(ApplicationChildAdmin):
+    list_display = ['id', 'application', 'business_name', 'relationship', 'yearly_income']
+    list_filter = ['relationship']
+    readonly_fields = OtherBusinessInline.readonly_fields
+
+
+@admin.register(Loan)
+class LoanAdmin(ApplicationChildAdmin):
+    list_display = ['id', 'application', 'loan_type', 'bank_name', 'loan_amount', 'emi']
+    list_filter = ['loan_type']
+    readonly_fields = LoanInline.readonly_fields
+
+
+@admin.register(BankAccount)
+class BankAccountAdmin(ApplicationChildAdmin):
+    list_display = ['id', 'application', 'bank_name', 'branch', 'account_type', 'cc_limit']
+    list_filter = ['account_type']
+    readonly_fields = BankAccountInline.readonly_fields
+
+
+@admin.register(SecurityDetails)
+class SecurityDetailsAdmin(ApplicationChildAdmin):
+    list_display = ['id', 'application', 'house_ownership', 'house_market_value', 'amount_required', 'end_use']
+    list_filter = ['house_ownership', 'end_use']
+
+
+@admin.register(Conclusion)
+class ConclusionAdmin(ApplicationChildAdmin):
+    list_display = ['id', 'application', 'overall_status', 'pre_score', 'pre_score_status']
+    list_filter = ['overall_status', 'pre_score_status', 'business_setup']
+    readonly_fields = ConclusionInline.readonly_fields
+
+
+@admin.register(Attachment)
+class AttachmentAdmin(ApplicationChildAdmin):
+    list_display = ['id', 'application', 'filename', 'kind', 'uploaded_by', 'created_at']
+    list_filter = ['kind']
+    list_select_related = ['application', 'uploaded_by']
+    fields = ['application', 'filename', 'kind', 'blob', 'uploaded_by', 'created_at']
+    readonly_fields = ['blob', 'uploaded_by', 'created_at']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ChangeLog)
+class ChangeLogAdmin(ScalableAdmin):
+    """Append-only; written by api.audit"""
+    list_display = ['id', 'application_id', 'section', 'action', 'actor', 'created_at']
+    list_filter = ['action']
+    list_select_related = ['actor']
+    search_fields = ['application_id__exact']
+    numeric_search_fields = search_fields
+    ordering = ['-id']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(DataQualityFinding)
+class DataQualityFindingAdmin(ScalableAdmin):
+    """Written by manage.py scan_data_quality"""
+    list_display = ['application', 'rule', 'severity', 'section', 'field', 'message', 'detected_at']
+    list_filter = ['severity', 'rule']
+    list_select_related = ['application']
+    search_fields = ['application__id__exact', 'application__file_no__exact']
+    numeric_search_fields = ['application__id__exact']
+    ordering = ['-id']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(DataQualityScan)
+class DataQualityScanAdmin(admin.ModelAdmin):
+    list_display = ['id', 'mode', 'status', 'since', 'scanned', 'started_at', 'finished_at']
+    list_filter = ['mode', 'status']
+    readonly_fields = [field.name for field in DataQualityScan._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,115 @@
+"""
+File number allocation.
+
+File numbers are handed out from server-side sequences in contiguous blocks.
+A device reserves a block once (one locked UPDATE on the sequence row) and
+then stamps file numbers locally, so creating an application needs no extra
+round trip and two agents can never produce the same number.
+"""
+import re
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import AgentProfile, FileNoBlock, FileNoSequence
+
+SCOPE_AGENT = 'agent'
+SCOPE_BRANCH = 'branch'
+SCOPES = [SCOPE_AGENT, SCOPE_BRANCH]
+
+# Numbers in the form sequence_key_for prefixes produce
+SEQUENCE_FILE_NO = re.compile(r'^((?:AG-\d+|BR-[A-Z0-9]+)-)(\d+)$')
+
+
+class AllocationError(Exception):
+    """Raised when a block cannot be allocated or released"""
+
+
+def sequence_key_for(user, scope):
+    """Return (key, prefix) of the sequence an agent allocates from"""
+    if scope == SCOPE_BRANCH:
+        profile = AgentProfile.objects.filter(user=user).first()
+        if profile is None or not profile.branch_code:
+            raise AllocationError('Agent is not assigned to a branch')
+        code = profile.branch_code.upper()
+        return f'branch:{code}', f'BR-{code}-'
+    if scope == SCOPE_AGENT:
+        return f'agent:{user.pk}', f'AG-{user.pk}-'
+    raise AllocationError(f'Unknown scope: {scope}')
+
+
+def allocate_block(user, scope=SCOPE_AGENT, size=None):
+    """Reserve `size` consecutive file numbers for `user` and return the block"""
+    size = size or settings.FILE_NO_BLOCK_SIZE
+    if size < 1 or size > settings.FILE_NO_MAX_BLOCK_SIZE:
+        raise AllocationError(
+            f'Block size must be between 1 and {settings.FILE_NO_MAX_BLOCK_SIZE}'
+        )
+
+    key, prefix = sequence_key_for(user, scope)
+    with transaction.atomic():
+        FileNoSequence.objects.get_or_create(
+            key=key, defaults={'prefix': prefix, 'width': settings.FILE_NO_WIDTH}
+        )
+        # Row lock serialises concurrent allocations on the same sequence only
+        sequence = FileNoSequence.objects.select_for_update().get(key=key)
+        start = sequence.next_value
+        sequence.next_value = start + size
+        sequence.save(update_fields=['next_value', 'updated_at'])
+
+        return FileNoBlock.objects.create(
+            sequence=sequence, issued_to=user, start=start, end=start + size - 1
+        )
+
+
+def allocate_file_no(user, scope=SCOPE_AGENT):
+    """Allocate a single file number (used when a client does not send one)"""
+    block = allocate_block(user, scope=scope, size=1)
+    return block.sequence.format(block.start)
+
+
+def client_file_no_allowed(user, file_no):
+    """
+    Whether a client may use `file_no` for a new application.
+
+    Free-form numbers are accepted. Numbers in a sequence's format must lie
+    in a block issued to `user`; otherwise the sequence could issue the same
+    number later.
+    """
+    match = SEQUENCE_FILE_NO.match(file_no or '')
+    if match is None:
+        return True
+    return FileNoBlock.objects.filter(
+        sequence__prefix=match.group(1), issued_to=user,
+        start__lte=int(match.group(2)), end__gte=int(match.group(2)),
+    ).exists()
+
+
+def release_block(block, last_used=None):
+    """
+    Give back the unused tail of a block.
+
+    `last_used` is the highest value the device actually stamped (None if it
+    used nothing). The tail is returned to the sequence only when no later
+    block has been issued from it; otherwise the block is just marked
+    released and its unused numbers stay reserved, so nothing is reissued.
+    """
+    with transaction.atomic():
+        # Same lock order as allocate_block: the sequence, then the block
+        sequence = FileNoSequence.objects.select_for_update().get(pk=block.sequence_id)
+        # Re-read under the lock, so concurrent releases cannot both pass the checks
+        block = FileNoBlock.objects.select_for_update().select_related('sequence').get(pk=block.pk)
+        if block.released_at is not None:
+            raise AllocationError('Block already released')
+        if last_used is not None and not block.start <= last_used <= block.end:
+            raise AllocationError('last_used is outside of the block')
+
+        if sequence.next_value == block.end + 1:
+            block.end = block.start - 1 if last_used is None else last_used
+            sequence.next_value = block.end + 1
+            sequence.save(update_fields=['next_value', 'updated_at'])
+
+        block.released_at = timezone.now()
+        block.save(update_fields=['end', 'released_at'])
+    return block
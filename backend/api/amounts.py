@@ -0,0 +1,88 @@
+"""
+Parsing of free-text money amounts.
+
+Agents type amounts the way they say them: "50 Lakhs", "5,00,000",
+"Rs. 2.5 Cr", "75k", "10-12 lacs", "1 crore 20 lakh". `parse_amount` turns these into a
+Decimal in rupees so they can be stored in numeric columns and aggregated
+in SQL.
+"""
+import re
+from decimal import Decimal, InvalidOperation
+
+UNITS = {
+    'k': Decimal('1e3'), 'thousand': Decimal('1e3'), 'thousands': Decimal('1e3'),
+    'l': Decimal('1e5'), 'lac': Decimal('1e5'), 'lacs': Decimal('1e5'), 'lakh': Decimal('1e5'),
+    'lakhs': Decimal('1e5'), 'lacks': Decimal('1e5'), 'lk': Decimal('1e5'),
+    'mn': Decimal('1e6'), 'million': Decimal('1e6'), 'millions': Decimal('1e6'),
+    'cr': Decimal('1e7'), 'crs': Decimal('1e7'), 'crore': Decimal('1e7'), 'crores': Decimal('1e7'),
+}
+MAX_AMOUNT = Decimal('1e13')  # fits DecimalField(max_digits=15, decimal_places=2)
+
+_CURRENCY = re.compile(r'(?:rs\.?|inr|₹|/-)', re.IGNORECASE)
+# "to" is a range separator, never a unit
+_AMOUNT = re.compile(r'(\d[\d,]*(?:\.\d+)?)\s*(?!to\b)([a-z]+)?', re.IGNORECASE)
+_RANGE_SEPARATOR = re.compile(r'^\s*(?:-|–|to)\s*$', re.IGNORECASE)
+
+
+def _term(number, unit):
+    try:
+        value = Decimal(number.replace(',', ''))
+    except InvalidOperation:
+        return None
+    if unit:
+        multiplier = UNITS.get(unit.lower())
+        if multiplier is None:
+            return None
+        value *= multiplier
+    return value
+
+
+def _compound(terms):
+    """Sum of terms in falling units ("1 crore 20 lakh"); only the last may have no unit"""
+    value, previous = Decimal(0), None
+    for i, (number, unit) in enumerate(terms):
+        if not unit and i < len(terms) - 1:
+            return None
+        multiplier = UNITS.get(unit.lower(), Decimal(0)) if unit else Decimal(1)
+        if previous is not None and multiplier >= previous:
+            return None
+        term = _term(number, unit)
+        if term is None:
+            return None
+        value += term
+        previous = multiplier
+    return value
+
+
+def parse_amount(text):
+    """
+    Rupee amount of a free-text value, or None if it cannot be read.
+
+    Two numbers joined by "-" or "to" are a range ("10-12 lakhs"), read as
+    its midpoint; a unit written only after the second number applies to
+    both. Otherwise the numbers must be in falling units and are added up
+    ("12 lakh 50 thousand").
+    """
+    if text is None:
+        return None
+    cleaned = _CURRENCY.sub(' ', str(text)).strip()
+    matches = list(_AMOUNT.finditer(cleaned))
+    if not matches:
+        return None
+
+    terms = [match.groups() for match in matches]
+    if len(matches) == 2 and _RANGE_SEPARATOR.match(cleaned[matches[0].end():matches[1].start()]):
+        (low, low_unit), (high, high_unit) = terms
+        low_value = _term(low, low_unit or high_unit)
+        high_value = _term(high, high_unit)
+        if low_value is None or high_value is None:
+            return None
+        value = (low_value + high_value) / 2
+    else:
+        value = _compound(terms)
+        if value is None:
+            return None
+
+    if value >= MAX_AMOUNT:
+        return None
+    return value.quantize(Decimal('0.01'))
@@ -0,0 +1,216 @@
+"""
+Portfolio analytics computed in Postgres.
+
+Each section of the report is one aggregate query: percentiles come from
+PERCENTILE_CONT, histograms from COUNT(*) FILTER (WHERE ...) per band, and
+breakdowns from GROUP BY. Only the summary rows leave the database.
+Results are cached per scope and filter set for ANALYTICS_CACHE_SECONDS.
+"""
+import hashlib
+import json
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import (
+    Aggregate, Avg, Count, DecimalField, ExpressionWrapper, F, FloatField, OuterRef, Q,
+    Subquery, Sum,
+)
+from django.db.models.functions import Coalesce
+from django.utils.dateparse import parse_date
+
+from .models import Application, BusinessDetails, Loan, SecurityDetails
+
+CACHE_VERSION = 1
+PERCENTILES = (25, 50, 75, 90)
+STATUSES = ('Positive', 'Negative', 'Refer to credit')
+
+LAKH = 100_000
+CRORE = 100 * LAKH
+# (label, lower bound inclusive, upper bound exclusive); None is unbounded
+TURNOVER_BANDS = [
+    ('< 10L', None, 10 * LAKH),
+    ('10L - 25L', 10 * LAKH, 25 * LAKH),
+    ('25L - 50L', 25 * LAKH, 50 * LAKH),
+    ('50L - 1Cr', 50 * LAKH, CRORE),
+    ('1Cr - 5Cr', CRORE, 5 * CRORE),
+    ('>= 5Cr', 5 * CRORE, None),
+]
+EMI_BURDEN_BANDS = [
+    ('< 20%', None, 0.2),
+    ('20% - 40%', 0.2, 0.4),
+    ('40% - 60%', 0.4, 0.6),
+    ('60% - 100%', 0.6, 1.0),
+    ('>= 100%', 1.0, None),
+]
+LTV_BANDS = [
+    ('< 40%', None, 0.4),
+    ('40% - 60%', 0.4, 0.6),
+    ('60% - 80%', 0.6, 0.8),
+    ('80% - 100%', 0.8, 1.0),
+    ('>= 100%', 1.0, None),
+]
+
+FILTERS = {
+    'agent': 'agent_id',
+    'status': 'conclusion__overall_status',
+    'ownership_type': 'business_details__ownership_type',
+    'end_use': 'security_details__end_use',
+    'created_from': 'created_at__date__gte',
+    'created_to': 'created_at__date__lte',
+}
+
+
+class PercentileCont(Aggregate):
+    """PERCENTILE_CONT(fraction) WITHIN GROUP (ORDER BY expression)"""
+    function = 'PERCENTILE_CONT'
+    template = '%(function)s(%(fraction)s) WITHIN GROUP (ORDER BY %(expressions)s)'
+    output_field = FloatField()
+
+    def __init__(self, expression, fraction, **extra):
+        super().__init__(expression, fraction=float(fraction), **extra)
+
+
+def _number(value):
+    if value is None:
+        return None
+    if isinstance(value, Decimal):
+        return float(value)
+    return round(value, 4) if isinstance(value, float) else value
+
+
+def _distribution(queryset, field, bands):
+    """Count, mean, percentiles and band histogram of `field` in one query"""
+    aggregates = {
+        'count': Count('pk', filter=Q(**{f'{field}__isnull': False})),
+        'mean': Avg(field),
+    }
+    for pct in PERCENTILES:
+        aggregates[f'p{pct}'] = PercentileCont(field, pct / 100)
+    for index, (_, low, high) in enumerate(bands):
+        condition = Q()
+        if low is not None:
+            condition &= Q(**{f'{field}__gte': low})
+        if high is not None:
+            condition &= Q(**{f'{field}__lt': high})
+        aggregates[f'band_{index}'] = Count('pk', filter=condition & Q(**{f'{field}__isnull': False}))
+
+    row = queryset.aggregate(**aggregates)
+    return {
+        'count': row['count'],
+        'mean': _number(row['mean']),
+        'percentiles': {f'p{pct}': _number(row[f'p{pct}']) for pct in PERCENTILES},
+        'histogram': [
+            {'band': label, 'count': row[f'band_{index}']}
+            for index, (label, _, _) in enumerate(bands)
+        ],
+    }
+
+
+def _status_breakdown(applications, field):
+    """Application counts per `field` value and overall status (GROUP BY both)"""
+    rows = (
+        applications.order_by()
+        .values(group=F(field), status=F('conclusion__overall_status'))
+        .annotate(count=Count('pk'))
+    )
+    breakdown = {}
+    for row in rows:
+        group = breakdown.setdefault(row['group'] or 'Unknown', {
+            'total': 0, **{status: 0 for status in STATUSES}, 'Pending': 0,
+        })
+        group[row['status'] or 'Pending'] += row['count']
+        group['total'] += row['count']
+    return breakdown
+
+
+def portfolio(applications):
+    """Compute the portfolio report for a queryset of applications"""
+    application_ids = applications.order_by().values('pk')
+    businesses = BusinessDetails.objects.filter(application__in=application_ids)
+    securities = SecurityDetails.objects.filter(application__in=application_ids)
+
+    totals = applications.order_by().aggregate(
+        applications=Count('pk'),
+        amount_required=Sum('security_details__amount_required'),
+    )
+    loan_totals = Loan.objects.filter(application__in=application_ids).aggregate(
+        loans=Count('pk'),
+        loan_exposure=Sum('loan_amount_numeric'),
+        monthly_emi=Sum('emi'),
+    )
+
+    # Yearly EMI outflow as a share of declared yearly net income
+    monthly_emi = Subquery(
+        Loan.objects.filter(application=OuterRef('application'))
+        .order_by().values('application')
+        .annotate(total=Sum('emi')).values('total'),
+        output_field=DecimalField(),
+    )
+    burden = businesses.filter(net_income_numeric__gt=0).annotate(
+        emi_burden=ExpressionWrapper(
+            Coalesce(monthly_emi, Decimal(0)) * 12 / F('net_income_numeric'),
+            output_field=FloatField(),
+        )
+    )
+    ltv = securities.filter(house_market_value__gt=0).annotate(
+        ltv=ExpressionWrapper(
+            F('amount_required') * Decimal('1.0') / F('house_market_value'),
+            output_field=FloatField(),
+        )
+    )
+
+    return {
+        'totals': {
+            'applications': totals['applications'],
+            'amount_required': _number(totals['amount_required']),
+            'loans': loan_totals['loans'],
+            'loan_exposure': _number(loan_totals['loan_exposure']),
+            'monthly_emi': _number(loan_totals['monthly_emi']),
+        },
+        'turnover': _distribution(businesses, 'turnover_numeric', TURNOVER_BANDS),
+        'emi_burden': _distribution(burden, 'emi_burden', EMI_BURDEN_BANDS),
+        'ltv': _distribution(ltv, 'ltv', LTV_BANDS),
+        'status_by_ownership_type': _status_breakdown(applications, 'business_details__ownership_type'),
+        'status_by_end_use': _status_breakdown(applications, 'security_details__end_use'),
+    }
+
+
+def parse_filters(params, allow_agent):
+    """Pick the supported filters out of query params; raises ValueError if one is malformed"""
+    filters = {}
+    for name, lookup in FILTERS.items():
+        value = params.get(name)
+        if not value or (name == 'agent' and not allow_agent):
+            continue
+        if name == 'agent':
+            if not value.isdigit():
+                raise ValueError('agent must be a user id')
+            value = int(value)
+        elif name.startswith('created_'):
+            value = parse_date(value)
+            if value is None:
+                raise ValueError(f'{name} must be a YYYY-MM-DD date')
+            value = value.isoformat()
+        filters[lookup] = value
+    return filters
+
+
+def cached_portfolio(user, filters, refresh=False):
+    """
+    The portfolio report for everything `user` may see, narrowed by `filters`.
+
+    Staff see the whole portfolio; agents see their own applications.
+    """
+    scope = 'all' if user.is_staff else f'agent:{user.pk}'
+    digest = hashlib.sha1(json.dumps(filters, sort_keys=True).encode()).hexdigest()
+    key = f'analytics:portfolio:v{CACHE_VERSION}:{scope}:{digest}'
+
+    result = None if refresh else cache.get(key)
+    if result is None:
+        applications = Application.objects.all()
+        if not user.is_staff:
+            applications = applications.filter(agent=user)
+        result = portfolio(applications.filter(**filters))
+        cache.set(key, result, settings.ANALYTICS_CACHE_SECONDS)
+    return result
@@ -0,0 +1,112 @@
+"""
+Archival of old, finalized applications.
+
+Applications submitted more than ARCHIVE_AFTER_DAYS ago are moved out of
+the hot tables in batches. Each application becomes one ArchivedApplication
+row: its full serialized form, children included, plus a few columns to
+filter on. The originals and their child rows are then deleted. Hot tables
+stay bounded by recent volume, and the detail endpoint serves archived
+applications from the payload.
+"""
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .audit import record_many
+from .jobs import enqueue
+from .models import Application, ArchivedApplication, Blob
+from .reports import report_queryset
+from .serializers import ApplicationDetailSerializer, AttachmentSerializer
+
+
+def archive_cutoff(days=None):
+    return timezone.now() - timedelta(days=settings.ARCHIVE_AFTER_DAYS if days is None else days)
+
+
+def archivable(cutoff):
+    return Application.objects.filter(submitted_at__lt=cutoff)
+
+
+def archive_ids(ids, user=None):
+    """Move the given applications into the archive; returns the number moved"""
+    with transaction.atomic():
+        locked = list(
+            Application.objects.filter(pk__in=ids).select_for_update(skip_locked=True)
+            .values_list('pk', flat=True)
+        )
+        applications = list(
+            report_queryset().filter(pk__in=locked).prefetch_related('attachments__blob')
+        )
+        if not applications:
+            return 0
+
+        archives, blob_ids, agent_ids = [], [], set()
+        for application in applications:
+            payload = ApplicationDetailSerializer(application).data
+            attachments = list(application.attachments.all())
+            payload['attachments'] = AttachmentSerializer(attachments, many=True).data
+            blob_ids += [attachment.blob_id for attachment in attachments]
+            conclusion = getattr(application, 'conclusion', None)
+            archives.append(ArchivedApplication(
+                id=application.pk,
+                agent_id=application.agent_id,
+                file_no=application.file_no,
+                applicant_name=application.applicant_name,
+                overall_status=conclusion.overall_status if conclusion else '',
+                created_at=application.created_at,
+                submitted_at=application.submitted_at,
+                payload=payload,
+            ))
+            agent_ids.add(application.agent_id)
+
+        ArchivedApplication.objects.bulk_create(archives)
+        # Keep archived attachment content out of cleanup_attachments' reach
+        for blob_id, references in Counter(blob_ids).items():
+            Blob.objects.filter(pk=blob_id).update(
+                archived_references=F('archived_references') + references
+            )
+        Application.objects.filter(pk__in=[a.pk for a in applications]).delete()
+        # Incremental snapshot exports list archivals from the change history
+        record_many(user, [(a.pk, {'archived': False}, {'archived': True}) for a in applications])
+        for agent_id in agent_ids:
+            enqueue('stats.refresh_agent', {'agent_id': agent_id}, unique=True)
+    return len(applications)
+
+
+def archive_old_applications(cutoff, batch_size=500, max_batches=None):
+    """Archive everything submitted before `cutoff`, one transaction per batch"""
+    moved = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        ids = list(archivable(cutoff).order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            break
+        count = archive_ids(ids)
+        if not count:
+            break
+        moved += count
+        batches += 1
+    return moved
+
+
+def archived_counts(agent_id):
+    """Status counts of an agent's archived applications (one grouped query)"""
+    return ArchivedApplication.objects.filter(agent_id=agent_id).aggregate(
+        total=Count('id'),
+        submitted=Count('id', filter=Q(submitted_at__isnull=False)),
+        positive=Count('id', filter=Q(overall_status='Positive')),
+        negative=Count('id', filter=Q(overall_status='Negative')),
+        refer_to_credit=Count('id', filter=Q(overall_status='Refer to credit')),
+    )
+
+
+def archived_detail(application_id, agent):
+    """Archived payload for the detail endpoint, or None"""
+    archived = ArchivedApplication.objects.filter(pk=application_id, agent=agent).first()
+    if archived is None:
+        return None
+    return {**archived.payload, 'archived': True, 'archived_at': archived.archived_at}
@@ -0,0 +1,181 @@
+"""
+Chunked, resumable uploads that end up as deduplicated attachments.
+
+Protocol:
+1. POST /api/uploads/ {application, filename, size, content_type, kind}
+   creates an UploadSession.
+2. PUT /api/uploads/{id}/ with an `Upload-Offset` header and a raw body
+   appends one chunk. The body is streamed to disk, never buffered whole.
+3. GET /api/uploads/{id}/ tells a reconnecting client where to resume.
+
+When the last byte arrives, the file is hashed. If the content is already
+stored, the upload is dropped and the existing Blob reused. Thumbnails are
+generated by the job worker.
+"""
+import io
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from PIL import Image
+
+from .jobs import enqueue
+from .models import Attachment, Blob, UploadSession
+from .storage import get_storage
+
+
+# Shown inline by /content/; anything else (HTML, SVG, scripts) is served as
+# an opaque download, since the type comes from the uploader and a blob is
+# shared by everyone who uploads the same bytes
+INLINE_CONTENT_TYPES = {'image/jpeg', 'image/png', 'image/gif', 'image/webp', 'application/pdf'}
+
+
+class UploadError(Exception):
+    """Raised when a chunk is rejected; `status` is the HTTP status to return"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class RangeNotSatisfiable(Exception):
+    """Raised for a Range header outside of the file"""
+
+
+def start_upload(application, user, filename, size, content_type, kind):
+    if size > settings.ATTACHMENT_MAX_FILE_BYTES:
+        raise UploadError(
+            f'File is larger than {settings.ATTACHMENT_MAX_FILE_BYTES} bytes', status=413
+        )
+    session = UploadSession.objects.create(
+        application=application, uploaded_by=user, filename=filename,
+        size=size, content_type=content_type or 'application/octet-stream', kind=kind,
+    )
+    get_storage().start_upload(session.pk)
+    return session
+
+
+def append_chunk(session, offset, stream, length):
+    """Write one chunk at `offset`; finalizes the upload when it is complete"""
+    with transaction.atomic():
+        # Held while the chunk is written, so concurrent PUTs to one session run one at a time
+        session = UploadSession.objects.select_for_update().get(pk=session.pk)
+        if session.is_complete:
+            raise UploadError('Upload is already complete', status=409)
+        if offset != session.received:
+            raise UploadError(f'Expected offset {session.received}', status=409)
+        if length > settings.ATTACHMENT_MAX_CHUNK_BYTES:
+            raise UploadError(
+                f'Chunk is larger than {settings.ATTACHMENT_MAX_CHUNK_BYTES} bytes', status=413
+            )
+        if offset + length > session.size:
+            raise UploadError('Chunk runs past the declared file size')
+
+        written = get_storage().write_chunk(session.pk, offset, stream, length)
+        session.received = offset + written
+        session.save(update_fields=['received', 'updated_at'])
+
+        # Same transaction: if finalizing fails, `received` rolls back and the
+        # client re-sends the last chunk instead of being left with a session
+        # that is full but has no attachment
+        if session.received == session.size:
+            finalize_upload(session)
+    return session
+
+
+def finalize_upload(session):
+    """Hash the completed upload and attach it, reusing identical stored content"""
+    storage = get_storage()
+    sha256 = storage.hash_upload(session.pk)
+
+    with transaction.atomic():
+        # Locked so delete_attachment cannot remove content that is being reused
+        blob = Blob.objects.select_for_update().filter(sha256=sha256).first()
+        created = False
+        if blob is None:
+            try:
+                with transaction.atomic():
+                    blob = Blob.objects.create(
+                        sha256=sha256, size=session.size,
+                        content_type=session.content_type, path=storage.blob_path(sha256),
+                    )
+                created = True
+            except IntegrityError:
+                # Same content finished concurrently; its file is identical
+                blob = Blob.objects.select_for_update().get(sha256=sha256)
+
+        attachment = Attachment.objects.create(
+            application_id=session.application_id, blob=blob, kind=session.kind,
+            filename=session.filename, uploaded_by_id=session.uploaded_by_id,
+        )
+        session.attachment = attachment
+        session.save(update_fields=['attachment', 'updated_at'])
+        if blob.content_type.startswith('image/') and not blob.thumbnail:
+            enqueue('attachments.thumbnail', {'blob_id': blob.pk}, unique=True)
+
+        if created:
+            # Last, so a failure before it leaves the upload in place for a retry
+            storage.commit_upload(session.pk, sha256)
+        else:
+            transaction.on_commit(lambda: storage.discard_upload(session.pk))
+    return attachment
+
+
+def delete_attachment(attachment):
+    """Delete an attachment and its content once nothing references it"""
+    with transaction.atomic():
+        # Same lock finalize_upload takes before reusing the blob
+        blob = Blob.objects.select_for_update().get(pk=attachment.blob_id)
+        attachment.delete()
+        if blob.attachments.exists():
+            return
+        blob.delete()
+        # Before the lock is released: an upload of the same content waiting on
+        # it then creates a new blob and its file is not removed afterwards
+        storage = get_storage()
+        storage.delete(blob.path)
+        if blob.thumbnail:
+            storage.delete(blob.thumbnail)
+
+
+def make_thumbnail(blob):
+    """Render a JPEG thumbnail of an image blob"""
+    storage = get_storage()
+    with storage.open(blob.path) as handle:
+        image = Image.open(handle)
+        image.thumbnail((settings.ATTACHMENT_THUMBNAIL_SIZE, settings.ATTACHMENT_THUMBNAIL_SIZE))
+        output = io.BytesIO()
+        image.convert('RGB').save(output, 'JPEG', quality=80)
+
+    relative = storage.thumbnail_path(blob.sha256)
+    target = storage.full_path(relative)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_bytes(output.getvalue())
+    blob.thumbnail = relative
+    blob.save(update_fields=['thumbnail'])
+    return relative
+
+
+def parse_range(header, size):
+    """
+    Parse a single `bytes=start-end` Range header.
+
+    Returns (start, end) inclusive, None to serve the whole file, or raises
+    RangeNotSatisfiable.
+    """
+    if not header or not header.startswith('bytes=') or ',' in header:
+        return None
+    start_text, _, end_text = header[len('bytes='):].strip().partition('-')
+    try:
+        if start_text == '':
+            length = int(end_text)
+            if length <= 0:
+                raise RangeNotSatisfiable(header)
+            start, end = max(size - length, 0), size - 1
+        else:
+            start = int(start_text)
+            end = int(end_text) if end_text else size - 1
+    except ValueError:
+        return None
+    if start >= size or start > end:
+        raise RangeNotSatisfiable(header)
+    return start, min(end, size - 1)
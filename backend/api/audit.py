@@ -0,0 +1,180 @@
+"""
+Append-only change history for applications (the ChangeLog table).
+
+Views hand `record` a before/after pair of ApplicationDetailSerializer
+representations, which they already have in memory. Nothing is diffed or
+written on the request path. Once the transaction commits, the pair goes
+into a per-process buffer. A background thread drains the buffer every
+AUDIT_FLUSH_SECONDS (sooner once AUDIT_BATCH_SIZE entries are waiting),
+diffs each pair, and writes all resulting rows with one bulk INSERT. If
+the buffer reaches AUDIT_BUFFER_LIMIT, the adding thread flushes it itself
+rather than dropping history. The buffer is also drained at interpreter
+exit.
+
+Child rows are replaced wholesale on update, so list sections are compared
+by position, not by id.
+"""
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .models import ChangeLog
+
+logger = logging.getLogger(__name__)
+
+# Serializer fields that are not user edits (ids, timestamps, derived values)
+IGNORED_FIELDS = {
+    'id', 'agent_name', 'created_at', 'updated_at',
+    'pre_score', 'pre_score_status', 'pre_scored_at',
+}
+ONE_TO_ONE_SECTIONS = ('business_details', 'co_applicant', 'security_details', 'conclusion')
+LIST_SECTIONS = ('other_businesses', 'loans', 'bank_accounts')
+BUSINESS_LIST_SECTIONS = ('owners', 'persons_met')
+
+
+def _fields(data, nested=()):
+    return {
+        key: value for key, value in (data or {}).items()
+        if key not in IGNORED_FIELDS and key not in nested and not key.endswith('_numeric')
+    }
+
+
+def _diff(section, before, after, nested=()):
+    """One (section, action, changes) tuple, or None when nothing changed"""
+    if not before and not after:
+        return None
+    if not before:
+        action = ChangeLog.ACTION_CREATE
+    elif not after:
+        action = ChangeLog.ACTION_DELETE
+    else:
+        action = ChangeLog.ACTION_UPDATE
+    old, new = _fields(before, nested), _fields(after, nested)
+    changes = {
+        key: [old.get(key), new.get(key)]
+        for key in sorted(old.keys() | new.keys())
+        if old.get(key) != new.get(key)
+    }
+    if action == ChangeLog.ACTION_UPDATE and not changes:
+        return None
+    return section, action, changes
+
+
+def _diff_list(section, before, after):
+    before, after = before or [], after or []
+    for index in range(max(len(before), len(after))):
+        entry = _diff(
+            f'{section}[{index}]',
+            before[index] if index < len(before) else None,
+            after[index] if index < len(after) else None,
+        )
+        if entry:
+            yield entry
+
+
+def diff_application(before, after):
+    """Yield (section, action, changes) for every section that differs"""
+    nested = ONE_TO_ONE_SECTIONS + LIST_SECTIONS
+    entry = _diff('application', before, after, nested)
+    if entry:
+        yield entry
+    for section in ONE_TO_ONE_SECTIONS:
+        old, new = (before or {}).get(section), (after or {}).get(section)
+        entry = _diff(section, old, new, BUSINESS_LIST_SECTIONS)
+        if entry:
+            yield entry
+        if section == 'business_details':
+            for child in BUSINESS_LIST_SECTIONS:
+                yield from _diff_list(
+                    f'{section}.{child}', (old or {}).get(child), (new or {}).get(child)
+                )
+    for section in LIST_SECTIONS:
+        yield from _diff_list(section, (before or {}).get(section), (after or {}).get(section))
+
+
+class AuditBuffer:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = []
+        self.wakeup = threading.Event()
+        self.thread = None
+
+    def add(self, *items):
+        with self.lock:
+            self.pending.extend(items)
+            size = len(self.pending)
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self.run, name='audit-writer', daemon=True)
+                self.thread.start()
+        if size >= settings.AUDIT_BUFFER_LIMIT:
+            self.flush()
+        elif size >= settings.AUDIT_BATCH_SIZE:
+            self.wakeup.set()
+
+    def run(self):
+        while True:
+            self.wakeup.wait(settings.AUDIT_FLUSH_SECONDS)
+            self.wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Audit flush failed')
+            finally:
+                close_old_connections()
+
+    def flush(self):
+        with self.lock:
+            items, self.pending = self.pending, []
+        if not items:
+            return 0
+        rows = [
+            ChangeLog(
+                application_id=application_id, section=section, action=action,
+                changes=changes, actor_id=actor_id, created_at=at,
+            )
+            for application_id, actor_id, at, before, after, event in items
+            for section, action, changes in (
+                [('application', event, {})] if event else diff_application(before, after)
+            )
+        ]
+        try:
+            ChangeLog.objects.bulk_create(rows, batch_size=settings.AUDIT_BATCH_SIZE)
+        except Exception:
+            with self.lock:
+                # Retry with the next flush, unless that would grow the buffer without bound
+                if len(self.pending) + len(items) <= settings.AUDIT_BUFFER_LIMIT:
+                    self.pending[:0] = items
+                else:
+                    logger.error('Dropping %d audit entries', len(items))
+            raise
+        return len(rows)
+
+
+buffer = AuditBuffer()
+atexit.register(buffer.flush)
+
+
+def record(application, user, before=None, after=None, action=None):
+    """
+    Queue history for `application` once the current transaction commits.
+
+    Pass before/after serializer representations to record a field-level
+    diff, or `action` ('create' or 'delete') to record just that event.
+    """
+    item = (
+        application.pk, user.pk if user and user.is_authenticated else None,
+        timezone.now(), before, after, action,
+    )
+    transaction.on_commit(lambda: buffer.add(item))
+
+
+def record_many(user, changes):
+    """Queue (application_id, before, after) diffs from a bulk action in one go"""
+    actor_id = user.pk if user and user.is_authenticated else None
+    at = timezone.now()
+    items = [(application_id, actor_id, at, before, after, None) for application_id, before, after in changes]
+    transaction.on_commit(lambda: buffer.add(*items))
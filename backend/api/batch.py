@@ -0,0 +1,132 @@
+"""
+Batched application API calls (/api/batch/).
+
+A client that has been offline replays its queued operations in one
+request. Each operation is {id, method, path, body}. It is dispatched to
+the regular view for `path` in order, using the batch request's
+already-authenticated user, so no per-operation token lookup happens.
+
+The whole batch runs in one transaction, and each operation gets its own
+savepoint. A failed operation (an exception or any 4xx/5xx response) is
+rolled back on its own. Its on_commit work (events, audit, jobs) is
+discarded, and the following operations still run. With `stop_on_error`
+the remaining operations are skipped instead and answered with 424.
+
+Paths may refer to earlier results as {<operation id>.<field>}, e.g.
+"/api/applications/{new1.id}/submit/" after an operation "new1" that
+created the application. An operation whose reference cannot be resolved
+fails with 424.
+"""
+import io
+import logging
+import re
+
+import orjson
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import transaction
+from django.urls import Resolver404, resolve
+
+logger = logging.getLogger(__name__)
+
+# URL names (router basename + action) an operation may target
+ALLOWED_ROUTES = {
+    'application-list', 'application-detail', 'application-submit', 'application-history',
+    'draft-list', 'draft-detail', 'draft-finalize',
+}
+REFERENCE = re.compile(r'\{([\w-]+)\.(\w+)\}')
+
+
+class _Rollback(Exception):
+    """Raised inside an operation's atomic block to undo a failed response"""
+
+
+class OperationFailed(Exception):
+    def __init__(self, message, status):
+        super().__init__(message)
+        self.status = status
+
+
+def _resolve_path(path, results):
+    def substitute(match):
+        previous = results.get(match.group(1))
+        if previous is None or previous['status'] >= 400 or not isinstance(previous['body'], dict):
+            raise OperationFailed(f'Operation {match.group(1)} did not succeed', 424)
+        value = previous['body'].get(match.group(2))
+        if value is None:
+            raise OperationFailed(f'Operation {match.group(1)} has no {match.group(2)}', 424)
+        return str(value)
+    return REFERENCE.sub(substitute, path)
+
+
+def _inner_request(request, method, path, query, body):
+    """A request for one operation, sharing the batch request's client and user"""
+    content = orjson.dumps(body) if body is not None else b''
+    environ = {
+        key: value for key, value in request.META.items()
+        if key.startswith('HTTP_') and key not in ('HTTP_CONTENT_ENCODING', 'HTTP_CONTENT_LENGTH')
+    }
+    environ.update({
+        'REQUEST_METHOD': method,
+        'PATH_INFO': path,
+        'SCRIPT_NAME': '',
+        'QUERY_STRING': query,
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(content)),
+        'REMOTE_ADDR': request.META.get('REMOTE_ADDR', ''),
+        'SERVER_NAME': request.META.get('SERVER_NAME', 'localhost'),
+        'SERVER_PORT': request.META.get('SERVER_PORT', '80'),
+        'wsgi.input': io.BytesIO(content),
+        'wsgi.url_scheme': request.scheme,
+    })
+    inner = WSGIRequest(environ)
+    # Picked up by rest_framework.request.Request: reuse the batch's authentication
+    inner._force_auth_user = request.user
+    inner._force_auth_token = request.auth
+    return inner
+
+
+def _dispatch(request, operation, results):
+    path, _, query = _resolve_path(operation['path'], results).partition('?')
+    try:
+        match = resolve(path)
+    except Resolver404:
+        raise OperationFailed('No such endpoint', 404)
+    if match.url_name not in ALLOWED_ROUTES:
+        raise OperationFailed('Endpoint not allowed in a batch', 400)
+    inner = _inner_request(request, operation['method'], path, query, operation.get('body'))
+    response = match.func(inner, *match.args, **match.kwargs)
+    return response.status_code, getattr(response, 'data', None)
+
+
+def run_batch(request, operations, stop_on_error=False):
+    """Run operations in order; returns one {id, status, body} per operation"""
+    results = {}
+    ordered = []
+    failed = False
+    with transaction.atomic():
+        for index, operation in enumerate(operations):
+            op_id = operation.get('id') or str(index)
+            if failed and stop_on_error:
+                result = {'id': op_id, 'status': 424, 'body': {'error': 'Skipped after an earlier failure'}}
+                ordered.append(result)
+                continue
+            try:
+                # A nested atomic block, not a bare savepoint: rolling it back
+                # also drops the on_commit callbacks registered inside it
+                with transaction.atomic():
+                    try:
+                        status_code, body = _dispatch(request, operation, results)
+                    except OperationFailed as exc:
+                        status_code, body = exc.status, {'error': str(exc)}
+                    if status_code >= 400:
+                        raise _Rollback
+            except _Rollback:
+                failed = True
+            except Exception:
+                logger.exception('Batch operation %s failed', op_id)
+                status_code, body = 500, {'error': 'Internal error'}
+                failed = True
+            result = {'id': op_id, 'status': status_code, 'body': body}
+            results[op_id] = result
+            ordered.append(result)
+    return ordered
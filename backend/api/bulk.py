@@ -0,0 +1,165 @@
+"""
+Supervisor bulk actions over team applications.
+
+A bulk action picks applications by explicit ids or by the team list
+filters (see team.filter_team_applications). It then applies one change as
+set-based UPDATEs in a single transaction, with no per-application
+serializer round trip:
+
+- reassign: move the applications to another agent of the team
+- set_status: set Conclusion.overall_status (applications without a
+  conclusion are skipped)
+- archive: move submitted applications into the archive (unsubmitted ones
+  are skipped)
+
+The selected rows are locked first, so concurrent edits cannot interleave.
+With `dry_run` the counts are computed and nothing is written. Changes
+are audited, announced as events in one pg_notify statement, and each
+affected agent's stats are refreshed by the job worker.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.http import QueryDict
+from django.utils import timezone
+
+from .audit import record_many
+from .events import EVENT_ARCHIVED, EVENT_UPDATED, publish_many
+from .jobs import enqueue
+from .models import Application, Conclusion
+from .team import filter_team_applications, team_applications, team_members
+
+ACTION_REASSIGN = 'reassign'
+ACTION_SET_STATUS = 'set_status'
+ACTION_ARCHIVE = 'archive'
+ACTIONS = (ACTION_REASSIGN, ACTION_SET_STATUS, ACTION_ARCHIVE)
+
+ARCHIVE_BATCH_SIZE = 500
+
+
+class BulkError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def as_query(filters):
+    """
+    Validated filters (serializers.BulkFilterSerializer) -> QueryDict, so
+    the list-view filters apply unchanged
+    """
+    query = QueryDict(mutable=True)
+    for key, value in filters.items():
+        if isinstance(value, bool):
+            value = '1' if value else '0'
+        values = value if isinstance(value, list) else [value]
+        query.setlist(key, [str(item) for item in values])
+    return query
+
+
+def select(user, ids=None, filters=None):
+    """Team applications chosen by ids or filters"""
+    queryset = team_applications(user)
+    if ids is not None:
+        return queryset.filter(pk__in=ids)
+    return filter_team_applications(queryset, as_query(filters))
+
+
+def run(user, action, ids=None, filters=None, agent_id=None, overall_status=None, dry_run=False):
+    """Apply a bulk action; returns a summary of what matched and changed"""
+    if action == ACTION_REASSIGN and not team_members(user).filter(pk=agent_id, is_active=True).exists():
+        raise BulkError('agent must be an active member of your team')
+
+    with transaction.atomic():
+        selected = select(user, ids, filters).order_by('pk')
+        if not dry_run:
+            selected = selected.select_for_update(of=('self',))
+        rows = list(selected.values(
+            'pk', 'agent_id', 'file_no', 'submitted_at', overall_status_now=F('conclusion__overall_status'),
+        )[:settings.BULK_MAX_APPLICATIONS + 1])
+        if len(rows) > settings.BULK_MAX_APPLICATIONS:
+            raise BulkError(
+                f'More than {settings.BULK_MAX_APPLICATIONS} applications match; narrow the selection'
+            )
+
+        if action == ACTION_REASSIGN:
+            targets = [row for row in rows if row['agent_id'] != agent_id]
+            skipped = {'already_assigned': len(rows) - len(targets)}
+        elif action == ACTION_SET_STATUS:
+            with_conclusion = [row for row in rows if row['overall_status_now'] is not None]
+            targets = [row for row in with_conclusion if row['overall_status_now'] != overall_status]
+            skipped = {
+                'no_conclusion': len(rows) - len(with_conclusion),
+                'already_set': len(with_conclusion) - len(targets),
+            }
+        else:
+            targets = [row for row in rows if row['submitted_at'] is not None]
+            skipped = {'not_submitted': len(rows) - len(targets)}
+
+        summary = {
+            'action': action,
+            'dry_run': dry_run,
+            'matched': len(rows),
+            'updated': len(targets),
+            'skipped': skipped,
+        }
+        if dry_run or not targets:
+            return summary
+
+        target_ids = [row['pk'] for row in targets]
+        if action == ACTION_REASSIGN:
+            _reassign(user, targets, target_ids, agent_id)
+        elif action == ACTION_SET_STATUS:
+            _set_status(user, targets, target_ids, overall_status)
+        else:
+            summary['updated'] = _archive(user, targets, target_ids)
+
+        for affected in {row['agent_id'] for row in targets} | ({agent_id} if agent_id else set()):
+            enqueue('stats.refresh_agent', {'agent_id': affected}, unique=True)
+    return summary
+
+
+def _event_row(row, **changes):
+    return {
+        'application_id': row['pk'],
+        'agent_id': row['agent_id'],
+        'file_no': row['file_no'],
+        'overall_status': row['overall_status_now'],
+        'submitted_at': row['submitted_at'],
+        **changes,
+    }
+
+
+def _reassign(user, targets, target_ids, agent_id):
+    # updated_at is bumped too, so cached reports and clients see a new version
+    Application.objects.filter(pk__in=target_ids).update(agent_id=agent_id, updated_at=timezone.now())
+    record_many(user, [
+        (row['pk'], {'agent': row['agent_id']}, {'agent': agent_id}) for row in targets
+    ])
+    publish_many(EVENT_UPDATED, [
+        _event_row(row, agent_id=agent_id, previous_agent_id=row['agent_id']) for row in targets
+    ])
+
+
+def _set_status(user, targets, target_ids, overall_status):
+    Conclusion.objects.filter(application_id__in=target_ids).update(overall_status=overall_status)
+    Application.objects.filter(pk__in=target_ids).update(updated_at=timezone.now())
+    record_many(user, [
+        (
+            row['pk'],
+            {'conclusion': {'overall_status': row['overall_status_now']}},
+            {'conclusion': {'overall_status': overall_status}},
+        )
+        for row in targets
+    ])
+    publish_many(EVENT_UPDATED, [_event_row(row, overall_status=overall_status) for row in targets])
+
+
+def _archive(user, targets, target_ids):
+    from .archive import archive_ids  # archive -> serializers -> this module
+
+    moved = 0
+    for start in range(0, len(target_ids), ARCHIVE_BATCH_SIZE):
+        moved += archive_ids(target_ids[start:start + ARCHIVE_BATCH_SIZE], user)
+    publish_many(EVENT_ARCHIVED, [_event_row(row) for row in targets])
+    return moved
@@ -0,0 +1,156 @@
+"""
+Duplicate-applicant detection.
+
+Each application gets a few normalized "blocking keys" (phone digits,
+phonetic name key, GST number and the PAN embedded in it) stored in the
+indexed `ApplicationDedupKey` table. Finding candidate duplicates is then a
+handful of index lookups on (kind, value) instead of a pairwise comparison
+of every application.
+
+A key shared by more than DEDUP_MAX_KEY_MATCHES applications (a common
+name's phonetic key, a placeholder phone or GST number) says little about
+duplication and would make the lookup linear in the portfolio, so it is
+ignored.
+"""
+import re
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Application, ApplicationDedupKey
+
+KEY_WEIGHTS = {
+    ApplicationDedupKey.KIND_GST: 3,
+    ApplicationDedupKey.KIND_PAN: 3,
+    ApplicationDedupKey.KIND_PHONE: 2,
+    ApplicationDedupKey.KIND_NAME: 1,
+}
+
+_HONORIFICS = {'MR', 'MRS', 'MS', 'MISS', 'DR', 'SHRI', 'SMT', 'KUMARI', 'SRI'}
+_SOUNDEX_CODES = {
+    **dict.fromkeys('BFPV', '1'),
+    **dict.fromkeys('CGJKQSXZ', '2'),
+    **dict.fromkeys('DT', '3'),
+    'L': '4',
+    **dict.fromkeys('MN', '5'),
+    'R': '6',
+}
+_GSTIN = re.compile(r'^\d{2}([A-Z]{5}\d{4}[A-Z])[A-Z0-9]{3}$')
+
+
+def normalize_phone(value):
+    """Last 10 digits of a phone number (drops +91 / leading 0)"""
+    digits = re.sub(r'\D', '', value or '')
+    return digits[-10:] if len(digits) >= 10 else ''
+
+
+def soundex(word):
+    """American Soundex code of a single word"""
+    word = re.sub(r'[^A-Z]', '', word.upper())
+    if not word:
+        return ''
+    code = word[0]
+    previous = _SOUNDEX_CODES.get(word[0], '')
+    for char in word[1:]:
+        digit = _SOUNDEX_CODES.get(char, '')
+        if digit and digit != previous:
+            code += digit
+        if char not in 'HW':
+            previous = digit
+    return (code + '000')[:4]
+
+
+def name_key(value):
+    """Order-insensitive phonetic key of a person's name"""
+    tokens = [
+        token for token in re.split(r'[^A-Za-z]+', (value or '').upper())
+        if token and token not in _HONORIFICS
+    ]
+    return ' '.join(sorted(soundex(token) for token in tokens))
+
+
+def normalize_gst(value):
+    """Uppercase alphanumeric GSTIN"""
+    return re.sub(r'[^A-Z0-9]', '', (value or '').upper())
+
+
+def dedup_keys_for(application):
+    """Blocking keys of one application as a set of (kind, value)"""
+    keys = set()
+    phone = normalize_phone(application.telephone)
+    if phone:
+        keys.add((ApplicationDedupKey.KIND_PHONE, phone))
+    name = name_key(application.applicant_name)
+    if name:
+        keys.add((ApplicationDedupKey.KIND_NAME, name))
+
+    business = getattr(application, 'business_details', None)
+    gst = normalize_gst(business.gst_number) if business else ''
+    if gst:
+        keys.add((ApplicationDedupKey.KIND_GST, gst))
+        match = _GSTIN.match(gst)
+        if match:
+            keys.add((ApplicationDedupKey.KIND_PAN, match.group(1)))
+    return keys
+
+
+def refresh_dedup_keys(application):
+    """Replace the stored blocking keys of an application"""
+    with transaction.atomic():
+        ApplicationDedupKey.objects.filter(application=application).delete()
+        ApplicationDedupKey.objects.bulk_create([
+            ApplicationDedupKey(application=application, kind=kind, value=value)
+            for kind, value in dedup_keys_for(application)
+        ])
+
+
+def find_duplicates(application, limit=50):
+    """
+    Candidate duplicates of an application, strongest first.
+
+    Returns dicts with the candidate's id, file_no, applicant_name,
+    agent_name, created_at, the key kinds it matched on and a score.
+    """
+    keys = list(
+        ApplicationDedupKey.objects.filter(application=application).values_list('kind', 'value')
+    )
+    if not keys:
+        return []
+
+    matches = defaultdict(set)
+    cap = settings.DEDUP_MAX_KEY_MATCHES
+    for kind, value in keys:
+        # At most cap + 1 rows per key, straight off the (kind, value) index
+        application_ids = list(
+            ApplicationDedupKey.objects.filter(kind=kind, value=value).exclude(application=application)
+            .order_by().values_list('application_id', flat=True)[:cap + 1]
+        )
+        if len(application_ids) > cap:
+            continue
+        for application_id in application_ids:
+            matches[application_id].add(kind)
+
+    scored = sorted(
+        matches.items(),
+        key=lambda item: (-sum(KEY_WEIGHTS[kind] for kind in item[1]), item[0])
+    )[:limit]
+    details = {
+        row['id']: row for row in Application.objects.filter(
+            pk__in=[application_id for application_id, _ in scored]
+        ).values('id', 'file_no', 'applicant_name', 'agent__username', 'created_at')
+    }
+
+    candidates = []
+    for application_id, kinds in scored:
+        row = details[application_id]
+        candidates.append({
+            'id': row['id'],
+            'file_no': row['file_no'],
+            'applicant_name': row['applicant_name'],
+            'agent_name': row['agent__username'],
+            'created_at': row['created_at'],
+            'matched_on': sorted(kinds),
+            'score': sum(KEY_WEIGHTS[kind] for kind in kinds),
+        })
+    return candidates
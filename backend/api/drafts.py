@@ -0,0 +1,64 @@
+"""
+Server-side drafts of in-progress application forms.
+
+The form autosaves its raw JSON under a key it picked. An autosave is a
+single INSERT ... ON CONFLICT statement keyed on (agent, key). The statement
+only rewrites the row when the content digest changed, so repeated saves of
+an unchanged form cost an index probe and no write. Nothing is validated
+until finalize, which runs the data through ApplicationDetailSerializer
+(see views.DraftViewSet.finalize).
+"""
+import hashlib
+
+import orjson
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from .models import Draft
+
+
+class DraftError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def encode(data):
+    """Canonical JSON (sorted keys) of a draft body; raises DraftError if unusable"""
+    if not isinstance(data, dict):
+        raise DraftError('data must be a JSON object')
+    encoded = orjson.dumps(data, option=orjson.OPT_SORT_KEYS)
+    if len(encoded) > settings.DRAFT_MAX_BYTES:
+        raise DraftError(f'Draft exceeds {settings.DRAFT_MAX_BYTES} bytes', status=413)
+    return encoded
+
+
+def save_draft(agent, key, data):
+    """
+    Create or replace a draft in one statement.
+
+    Returns (digest, size, changed); `changed` is False when the stored draft
+    already had this content and nothing was written.
+    """
+    encoded = encode(data)
+    digest = hashlib.sha256(encoded).hexdigest()
+    now = timezone.now()
+    table = Draft._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'''
+            INSERT INTO {table} (agent_id, key, data, digest, size, created_at, updated_at)
+            VALUES (%s, %s, %s::jsonb, %s, %s, %s, %s)
+            ON CONFLICT (agent_id, key) DO UPDATE SET
+                data = EXCLUDED.data,
+                digest = EXCLUDED.digest,
+                size = EXCLUDED.size,
+                updated_at = EXCLUDED.updated_at
+            WHERE {table}.digest <> EXCLUDED.digest
+            RETURNING id
+            ''',
+            [agent.pk, key, encoded.decode(), digest, len(encoded), now, now],
+        )
+        changed = cursor.fetchone() is not None
+    return digest, len(encoded), changed
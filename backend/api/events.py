@@ -0,0 +1,190 @@
+"""
+Live application events, fanned out over Postgres LISTEN/NOTIFY.
+
+`publish` issues pg_notify on the request's own connection. Postgres only
+delivers the notification when that transaction commits, so a rolled-back
+change never reaches a dashboard. Every server process runs one `EventHub`
+listener thread on a dedicated connection. The thread hands each
+notification to the server-sent-event streams (see
+views.application_events) that are allowed to see that agent's
+applications.
+
+Payloads are deliberately small (ids and status); clients fetch details
+through the regular API.
+"""
+import asyncio
+import itertools
+import json
+import logging
+import select
+import threading
+import time
+
+import psycopg2
+import psycopg2.extensions
+from django.conf import settings
+from django.db import connection, connections
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'application_events'
+
+EVENT_CREATED = 'application.created'
+EVENT_UPDATED = 'application.updated'
+EVENT_SUBMITTED = 'application.submitted'
+EVENT_DELETED = 'application.deleted'
+EVENT_ARCHIVED = 'application.archived'
+# Sent to a subscriber that fell behind and lost events; it should refetch
+EVENT_RESYNC = 'resync'
+
+
+def _payload(event_type, application_id, agent_id, file_no, overall_status, submitted_at, **extra):
+    return json.dumps({
+        'type': event_type,
+        'application_id': application_id,
+        'agent_id': agent_id,
+        'file_no': file_no,
+        'overall_status': overall_status,
+        'submitted_at': submitted_at.isoformat() if submitted_at else None,
+        'at': timezone.now().isoformat(),
+        **extra,
+    })
+
+
+def publish(event_type, application, **extra):
+    """Queue an event about `application`; delivered when the transaction commits"""
+    conclusion = getattr(application, 'conclusion', None) if event_type != EVENT_DELETED else None
+    payload = _payload(
+        event_type, application.pk, application.agent_id, application.file_no,
+        conclusion.overall_status if conclusion else None, application.submitted_at, **extra,
+    )
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_notify(%s, %s)', [CHANNEL, payload])
+
+
+def publish_many(event_type, rows):
+    """
+    Queue one event per row in a single statement (bulk actions).
+
+    Rows are dicts with application_id, agent_id, file_no, overall_status and
+    submitted_at; any other keys are passed through.
+    """
+    payloads = [_payload(event_type, **row) for row in rows]
+    if payloads:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT pg_notify(%s, payload) FROM unnest(%s::text[]) AS payload',
+                [CHANNEL, payloads],
+            )
+
+
+class Subscription:
+    """One stream's view of the hub: a bounded asyncio queue plus an agent filter"""
+
+    def __init__(self, hub, key, loop, agent_ids):
+        self.hub = hub
+        self.key = key
+        self.loop = loop
+        self.agent_ids = agent_ids  # None means every agent
+        self.queue = asyncio.Queue(maxsize=settings.EVENTS_QUEUE_SIZE)
+
+    def wants(self, event):
+        if self.agent_ids is None:
+            return True
+        # A reassignment is news to both the old and the new agent
+        return event.get('agent_id') in self.agent_ids or event.get('previous_agent_id') in self.agent_ids
+
+    def offer(self, event):
+        """Runs on the subscriber's event loop"""
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({'type': EVENT_RESYNC})
+
+    async def get(self, timeout):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def close(self):
+        self.hub.unsubscribe(self.key)
+
+
+class EventHub:
+    """Per-process LISTEN loop that dispatches notifications to subscriptions"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscriptions = {}
+        self.keys = itertools.count()
+        self.thread = None
+
+    def subscribe(self, agent_ids):
+        loop = asyncio.get_running_loop()
+        with self.lock:
+            key = next(self.keys)
+            subscription = Subscription(self, key, loop, agent_ids)
+            self.subscriptions[key] = subscription
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self.listen, name='event-hub', daemon=True)
+                self.thread.start()
+        return subscription
+
+    def unsubscribe(self, key):
+        with self.lock:
+            self.subscriptions.pop(key, None)
+
+    def dispatch(self, event, broadcast=False):
+        with self.lock:
+            targets = [s for s in self.subscriptions.values() if broadcast or s.wants(event)]
+        for subscription in targets:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, event)
+            except RuntimeError:
+                # The stream's loop is gone (server shutting down)
+                self.unsubscribe(subscription.key)
+
+    def listen(self):
+        """Hold a LISTEN connection open, reconnecting on failure"""
+        params = connections['default'].get_connection_params()
+        backoff = 1
+        while True:
+            try:
+                conn = psycopg2.connect(**params)
+                conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                with conn.cursor() as cursor:
+                    cursor.execute(f'LISTEN {CHANNEL}')
+                backoff = 1
+                self.poll(conn)
+            except psycopg2.Error:
+                logger.exception('Event listener lost its database connection')
+                # Anything published meanwhile is lost; tell streams to refetch
+                self.dispatch({'type': EVENT_RESYNC}, broadcast=True)
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+
+    def poll(self, conn):
+        try:
+            while True:
+                if select.select([conn], [], [], 30) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    notify = conn.notifies.pop(0)
+                    try:
+                        event = json.loads(notify.payload)
+                    except ValueError:
+                        logger.warning('Ignoring malformed event payload: %r', notify.payload)
+                        continue
+                    self.dispatch(event)
+        finally:
+            conn.close()
+
+
+hub = EventHub()
+
+
+def format_event(event):
+    """Encode one event as a server-sent-events frame"""
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
@@ -0,0 +1,79 @@
+"""
+Filters and facet counts over the JSON list fields.
+
+`Application.family_members` and `BusinessDetails.payment_modes` are jsonb
+arrays with GIN (jsonb_path_ops) indexes. Filters are containment lookups
+(`@>`), so they are served by those indexes. Facet counts unnest the arrays
+for every facet in one statement. Rows holding a non-array value (written
+before the API validated these fields) count as empty lists.
+"""
+from django.db import connection
+
+from .models import Application, BusinessDetails
+
+# query param -> containment lookup on Application
+LIST_FILTERS = {
+    'payment_mode': 'business_details__payment_modes__contains',
+    'family_member': 'family_members__contains',
+}
+
+
+def filter_by_list_fields(queryset, params):
+    """
+    Narrow applications to those whose lists contain every requested value.
+
+    Params may repeat: ?payment_mode=UPI&payment_mode=NEFT means both.
+    """
+    for param, lookup in LIST_FILTERS.items():
+        values = [value for value in params.getlist(param) if value]
+        if values:
+            queryset = queryset.filter(**{lookup: values})
+    return queryset
+
+
+def _array_elements(column):
+    """SQL unnesting a jsonb array column; any other value unnests to no rows"""
+    return f"jsonb_array_elements_text(CASE WHEN jsonb_typeof({column}) = 'array' THEN {column} ELSE '[]' END)"
+
+
+def facet_counts(queryset):
+    """
+    Application counts per payment mode, family member and family composition.
+
+    A composition is the sorted, comma-joined family_members list ('' when
+    empty). All three facets come back from a single query.
+    """
+    scope_sql, scope_params = queryset.order_by().values('pk').query.sql_with_params()
+    applications = Application._meta.db_table
+    businesses = BusinessDetails._meta.db_table
+    sql = f'''
+        WITH scope AS ({scope_sql})
+        SELECT 'payment_modes', mode.value, COUNT(DISTINCT b.application_id)
+        FROM {businesses} b
+        JOIN scope ON scope.id = b.application_id
+        CROSS JOIN LATERAL {_array_elements('b.payment_modes')} AS mode(value)
+        GROUP BY mode.value
+        UNION ALL
+        SELECT 'family_members', member.value, COUNT(DISTINCT a.id)
+        FROM {applications} a
+        JOIN scope ON scope.id = a.id
+        CROSS JOIN LATERAL {_array_elements('a.family_members')} AS member(value)
+        GROUP BY member.value
+        UNION ALL
+        SELECT 'family_composition', composition.value, COUNT(*)
+        FROM {applications} a
+        JOIN scope ON scope.id = a.id
+        CROSS JOIN LATERAL (
+            SELECT COALESCE(string_agg(value, ', ' ORDER BY value), '') AS value
+            FROM {_array_elements('a.family_members')} AS value
+        ) AS composition
+        GROUP BY composition.value
+    '''
+    facets = {'payment_modes': {}, 'family_members': {}, 'family_composition': {}}
+    with connection.cursor() as cursor:
+        cursor.execute(sql, scope_params)
+        for facet, value, count in cursor.fetchall():
+            facets[facet][value] = count
+    for facet, counts in facets.items():
+        facets[facet] = dict(sorted(counts.items(), key=lambda item: (-item[1], item[0])))
+    return facets
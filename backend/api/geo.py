@@ -0,0 +1,114 @@
+"""
+Geospatial helpers for visit locations.
+
+`BusinessDetails.gps_location` is free text ("28.613900, 77.209000"). It is
+parsed into numeric latitude/longitude plus a geohash so that nearby-visit
+lookups can be answered from plain B-tree indexes without PostGIS: a
+handful of geohash prefix range scans narrow the candidates, a lat/lon box
+trims them and the exact great-circle distance is computed only for the
+survivors.
+"""
+import math
+import re
+
+EARTH_RADIUS_KM = 6371.0088
+GEOHASH_PRECISION = 9
+MAX_COVER_CELLS = 16
+
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+_NUMBER = re.compile(r'[-+]?\d+(?:\.\d+)?')
+
+
+def parse_gps_location(value):
+    """Return (lat, lon) from a free-form GPS string, or None if unparseable"""
+    if not value:
+        return None
+    numbers = _NUMBER.findall(value)
+    if len(numbers) != 2:
+        return None
+    lat, lon = float(numbers[0]), float(numbers[1])
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return None
+    return lat, lon
+
+
+def geohash_encode(lat, lon, precision=GEOHASH_PRECISION):
+    """Standard base32 geohash of a point"""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bit = 0
+    ch = 0
+    even = True
+    while len(chars) < precision:
+        if even:
+            mid = (lon_range[0] + lon_range[1]) / 2
+            if lon >= mid:
+                ch |= 1 << (4 - bit)
+                lon_range[0] = mid
+            else:
+                lon_range[1] = mid
+        else:
+            mid = (lat_range[0] + lat_range[1]) / 2
+            if lat >= mid:
+                ch |= 1 << (4 - bit)
+                lat_range[0] = mid
+            else:
+                lat_range[1] = mid
+        even = not even
+        if bit < 4:
+            bit += 1
+        else:
+            chars.append(_BASE32[ch])
+            bit = 0
+            ch = 0
+    return ''.join(chars)
+
+
+def cell_size(precision):
+    """(lat_height, lon_width) in degrees of a geohash cell"""
+    bits = precision * 5
+    lon_bits = (bits + 1) // 2
+    lat_bits = bits // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lon_bits)
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance between two points in kilometres"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def bounding_box(lat, lon, radius_km):
+    """(min_lat, min_lon, max_lat, max_lon) enclosing a circle"""
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    cos_lat = math.cos(math.radians(lat))
+    dlon = 180.0 if cos_lat < 1e-9 else min(180.0, dlat / cos_lat)
+    return (
+        max(-90.0, lat - dlat), max(-180.0, lon - dlon),
+        min(90.0, lat + dlat), min(180.0, lon + dlon),
+    )
+
+
+def geohash_cover(min_lat, min_lon, max_lat, max_lon, max_cells=MAX_COVER_CELLS):
+    """
+    Geohash prefixes that together cover a bounding box.
+
+    Picks the finest precision that needs at most `max_cells` cells, so the
+    query becomes a few index range scans instead of a table scan.
+    """
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        height, width = cell_size(precision)
+        rows = int((max_lat - min_lat) / height) + 2
+        cols = int((max_lon - min_lon) / width) + 2
+        if rows * cols > max_cells * 4:
+            continue
+        lats = [min(min_lat + i * height, max_lat) for i in range(rows)]
+        lons = [min(min_lon + j * width, max_lon) for j in range(cols)]
+        cells = {geohash_encode(a, b, precision) for a in lats for b in lons}
+        if len(cells) <= max_cells:
+            return sorted(cells)
+    return []
@@ -0,0 +1,260 @@
+"""
+Lightweight background job queue backed by the `Job` table.
+
+Jobs are enqueued inside the caller's transaction, so they only become
+visible once the business change commits. Workers (`manage.py run_jobs`)
+claim rows with SELECT ... FOR UPDATE SKIP LOCKED, so any number of worker
+threads or processes can share the table without an external broker.
+
+Handlers are registered with the `job` decorator:
+
+    @job('stats.refresh_agent', concurrency=2)
+    def refresh_agent_stats(agent_id):
+        ...
+
+and enqueued with `enqueue('stats.refresh_agent', {'agent_id': 1})`.
+"""
+import logging
+import os
+import socket
+import threading
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+
+class JobHandler:
+    def __init__(self, name, func, concurrency=None, max_attempts=None, atomic=True):
+        self.name = name
+        self.func = func
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts or settings.JOBS_MAX_ATTEMPTS
+        self.atomic = atomic
+
+
+def job(name, concurrency=None, max_attempts=None, atomic=True):
+    """
+    Register a function as the handler of job `name`.
+
+    Handlers run in a transaction unless `atomic=False`, for jobs that
+    manage their own (e.g. a different isolation level).
+    """
+    def decorator(func):
+        _registry[name] = JobHandler(name, func, concurrency, max_attempts, atomic)
+        return func
+    return decorator
+
+
+def get_handler(name):
+    return _registry.get(name)
+
+
+def enqueue(name, payload=None, delay=0, unique=False):
+    """
+    Queue a job, visible to workers once the current transaction commits.
+
+    With `unique=True` the job is skipped if an identical one is still
+    queued (e.g. several stats refreshes for the same agent collapse into one).
+    """
+    payload = payload or {}
+    if unique and Job.objects.filter(
+        name=name, payload=payload, status=Job.STATUS_QUEUED
+    ).exists():
+        return None
+
+    handler = get_handler(name)
+    created = Job.objects.create(
+        name=name,
+        payload=payload,
+        run_at=timezone.now() + timedelta(seconds=delay),
+        max_attempts=handler.max_attempts if handler else settings.JOBS_MAX_ATTEMPTS,
+    )
+    if settings.JOBS_RUN_EAGERLY:
+        transaction.on_commit(lambda: run_job(created.pk))
+    return created
+
+
+def _saturated_names():
+    """Job names that have reached their concurrency limit"""
+    limited = {name: h.concurrency for name, h in _registry.items() if h.concurrency}
+    if not limited:
+        return []
+    running = Job.objects.filter(
+        status=Job.STATUS_RUNNING, name__in=limited
+    ).values('name').annotate(n=Count('id'))
+    return [row['name'] for row in running if row['n'] >= limited[row['name']]]
+
+
+def _running_count(name):
+    return Job.objects.filter(status=Job.STATUS_RUNNING, name=name).count()
+
+
+def _lock_name(name):
+    """Serialize claims of one job name until the current transaction ends"""
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_advisory_xact_lock(hashtext(%s))', [f'jobs:{name}'])
+
+
+def claim(worker_id, names=None):
+    """Atomically take the next due job, or return None"""
+    with transaction.atomic():
+        queryset = Job.objects.select_for_update(skip_locked=True).filter(
+            status=Job.STATUS_QUEUED, run_at__lte=timezone.now()
+        )
+        if names:
+            queryset = queryset.filter(name__in=names)
+        saturated = set(_saturated_names())
+        while True:
+            claimed = queryset.exclude(name__in=saturated).order_by('run_at').first()
+            if claimed is None:
+                return None
+            handler = get_handler(claimed.name)
+            if handler is None or not handler.concurrency:
+                break
+            # The count above is only a hint; re-check under the name's lock,
+            # which is held until this claim commits
+            _lock_name(claimed.name)
+            if _running_count(claimed.name) < handler.concurrency:
+                break
+            saturated.add(claimed.name)
+        claimed.status = Job.STATUS_RUNNING
+        claimed.attempts += 1
+        claimed.locked_by = worker_id
+        claimed.locked_at = timezone.now()
+        claimed.save(update_fields=['status', 'attempts', 'locked_by', 'locked_at'])
+        return claimed
+
+
+def execute(claimed):
+    """Run a claimed job and record success, retry or failure"""
+    handler = get_handler(claimed.name)
+    try:
+        if handler is None:
+            raise LookupError(f'No handler registered for job {claimed.name!r}')
+        if handler.atomic:
+            with transaction.atomic():
+                handler.func(**claimed.payload)
+        else:
+            handler.func(**claimed.payload)
+    except Exception:
+        error = traceback.format_exc()
+        logger.exception('Job %s #%s failed (attempt %s)', claimed.name, claimed.pk, claimed.attempts)
+        claimed.last_error = error[-4000:]
+        if handler is not None and claimed.attempts < claimed.max_attempts:
+            claimed.status = Job.STATUS_QUEUED
+            backoff = settings.JOBS_RETRY_BACKOFF_SECONDS * 2 ** (claimed.attempts - 1)
+            claimed.run_at = timezone.now() + timedelta(seconds=backoff)
+        else:
+            claimed.status = Job.STATUS_FAILED
+            claimed.finished_at = timezone.now()
+    else:
+        claimed.status = Job.STATUS_DONE
+        claimed.finished_at = timezone.now()
+    claimed.locked_by = ''
+    claimed.locked_at = None
+    claimed.save(update_fields=[
+        'status', 'run_at', 'last_error', 'finished_at', 'locked_by', 'locked_at'
+    ])
+    return claimed
+
+
+def run_job(job_id):
+    """Claim and run one specific job right away (eager mode)"""
+    with transaction.atomic():
+        claimed = Job.objects.select_for_update(skip_locked=True).filter(
+            pk=job_id, status=Job.STATUS_QUEUED
+        ).first()
+        if claimed is None:
+            return None
+        claimed.status = Job.STATUS_RUNNING
+        claimed.attempts += 1
+        claimed.locked_by = 'eager'
+        claimed.locked_at = timezone.now()
+        claimed.save(update_fields=['status', 'attempts', 'locked_by', 'locked_at'])
+    return execute(claimed)
+
+
+def run_pending(names=None, worker_id='inline'):
+    """Drain all due jobs in the current thread; returns the number run"""
+    count = 0
+    while True:
+        claimed = claim(worker_id, names)
+        if claimed is None:
+            return count
+        execute(claimed)
+        count += 1
+
+
+def requeue_stale():
+    """Put back jobs whose worker died while running them; fail those out of attempts"""
+    now = timezone.now()
+    stale = Job.objects.filter(
+        status=Job.STATUS_RUNNING, locked_at__lt=now - timedelta(seconds=settings.JOBS_LOCK_TIMEOUT_SECONDS)
+    )
+    stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Job.STATUS_FAILED, locked_by='', locked_at=None, finished_at=now,
+        last_error='Worker died while running the job',
+    )
+    return stale.update(status=Job.STATUS_QUEUED, locked_by='', locked_at=None)
+
+
+def purge_finished(days):
+    """Delete done jobs older than `days`"""
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted, _ = Job.objects.filter(status=Job.STATUS_DONE, finished_at__lt=cutoff).delete()
+    return deleted
+
+
+class Worker:
+    """Polls the queue with `concurrency` threads until stopped"""
+
+    def __init__(self, concurrency=1, names=None, poll_interval=1.0):
+        self.concurrency = concurrency
+        self.names = names
+        self.poll_interval = poll_interval
+        self.stopping = threading.Event()
+        self.prefix = f'{socket.gethostname()}:{os.getpid()}'
+
+    def _loop(self, index):
+        worker_id = f'{self.prefix}:{index}'
+        while not self.stopping.is_set():
+            close_old_connections()
+            claimed = claim(worker_id, self.names)
+            if claimed is None:
+                self.stopping.wait(self.poll_interval)
+                continue
+            execute(claimed)
+
+    def run(self):
+        requeue_stale()
+        threads = [
+            threading.Thread(target=self._loop, args=(i,), name=f'job-worker-{i}', daemon=True)
+            for i in range(self.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        last_sweep = time.monotonic()
+        try:
+            while any(thread.is_alive() for thread in threads):
+                time.sleep(self.poll_interval)
+                if time.monotonic() - last_sweep > 60 and not self.stopping.is_set():
+                    requeue_stale()
+                    last_sweep = time.monotonic()
+        except KeyboardInterrupt:
+            self.stop()
+        for thread in threads:
+            thread.join()
+
+    def stop(self):
+        self.stopping.set()
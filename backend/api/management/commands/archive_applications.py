@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from api.archive import archivable, archive_cutoff, archive_old_applications
+
+
+class Command(BaseCommand):
+    help = 'Move finalized applications older than the archive age into the archive table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=int, default=None,
+                            help='Defaults to the ARCHIVE_AFTER_DAYS setting')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--max-batches', type=int, default=None)
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        cutoff = archive_cutoff(options['older_than_days'])
+        if options['dry_run']:
+            count = archivable(cutoff).count()
+            self.stdout.write(f'{count} applications submitted before {cutoff:%Y-%m-%d} would be archived')
+            return
+        moved = archive_old_applications(cutoff, options['batch_size'], options['max_batches'])
+        self.stdout.write(self.style.SUCCESS(f'Archived {moved} applications'))
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.models import BankAccount, BusinessDetails, CoApplicant, Loan, OtherBusiness
+
+MODELS = [BusinessDetails, CoApplicant, OtherBusiness, Loan, BankAccount]
+
+
+class Command(BaseCommand):
+    help = 'Parse free-text amounts (lakhs, crores, commas) into their numeric columns'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        for model in MODELS:
+            numeric_fields = [f'{field}_numeric' for field in model.AMOUNT_FIELDS]
+            rows = model.objects.only('pk', *model.AMOUNT_FIELDS).order_by('pk')
+            updated = parsed = 0
+            last_pk = 0
+            # Walk primary-key ranges so each batch is an index scan, not an OFFSET
+            while True:
+                batch = list(rows.filter(pk__gt=last_pk)[:batch_size])
+                if not batch:
+                    break
+                for row in batch:
+                    row.set_amounts()
+                    parsed += any(getattr(row, field) is not None for field in numeric_fields)
+                with transaction.atomic():
+                    model.objects.bulk_update(batch, numeric_fields)
+                updated += len(batch)
+                last_pk = batch[-1].pk
+            self.stdout.write(
+                f'{model.__name__}: {updated} rows, {parsed} with at least one parsed amount'
+            )
+        self.stdout.write(self.style.SUCCESS('Amount columns backfilled'))
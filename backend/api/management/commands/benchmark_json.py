@@ -0,0 +1,65 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from api.middleware import brotli, compress
+from api.models import Application
+from api.renderers import ORJSONRenderer
+from api.serializers import ApplicationDetailSerializer, ApplicationListSerializer
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+class Command(BaseCommand):
+    help = 'Compare JSON encode time and bytes on the wire for list and detail payloads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--list-size', type=int, default=1000,
+                            help='Applications in the list payload')
+        parser.add_argument('--detail-size', type=int, default=100,
+                            help='Applications rendered with the detail serializer')
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        applications = Application.objects.select_related(
+            'agent', 'business_details', 'co_applicant', 'security_details', 'conclusion'
+        ).prefetch_related(
+            'other_businesses', 'loans', 'bank_accounts',
+            'business_details__owners', 'business_details__persons_met'
+        ).order_by('-pk')
+        list_rows = list(applications[:options['list_size']])
+        if not list_rows:
+            raise CommandError('No applications to benchmark; run generate_synthetic_data first')
+
+        payloads = {
+            'list': ApplicationListSerializer(list_rows, many=True).data,
+            'detail': ApplicationDetailSerializer(list_rows[:options['detail_size']], many=True).data,
+        }
+        renderers = {'drf-json': JSONRenderer(), 'orjson': ORJSONRenderer()}
+        encodings = ['gzip', 'br'] if brotli is not None else ['gzip']
+
+        header = f"{'payload':<8}{'renderer':<10}{'encode ms':>11}{'raw KB':>9}"
+        header += ''.join(f'{encoding + " KB":>9}{encoding + " ms":>9}' for encoding in encodings)
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for name, data in payloads.items():
+            for renderer_name, renderer in renderers.items():
+                seconds, body = best_of(lambda: renderer.render(data), options['repeat'])
+                line = f'{name:<8}{renderer_name:<10}{seconds * 1000:>11.1f}{len(body) / 1024:>9.1f}'
+                for encoding in encodings:
+                    compress_seconds, compressed = best_of(
+                        lambda: compress(body, encoding), options['repeat']
+                    )
+                    line += f'{len(compressed) / 1024:>9.1f}{compress_seconds * 1000:>9.1f}'
+                self.stdout.write(line)
+            if json.loads(renderers['orjson'].render(data)) != json.loads(renderers['drf-json'].render(data)):
+                self.stdout.write(self.style.WARNING(f'  {name}: renderers produced different JSON'))
@@ -0,0 +1,38 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.models import Blob, UploadSession
+from api.storage import get_storage
+
+
+class Command(BaseCommand):
+    help = 'Delete abandoned upload sessions and stored files no attachment references'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--session-max-age-hours', type=int, default=48)
+
+    def handle(self, *args, **options):
+        storage = get_storage()
+        cutoff = timezone.now() - timedelta(hours=options['session_max_age_hours'])
+
+        stale = UploadSession.objects.filter(attachment__isnull=True, updated_at__lt=cutoff)
+        sessions = 0
+        for session_id in stale.values_list('pk', flat=True).iterator():
+            storage.discard_upload(session_id)
+            sessions += 1
+        stale.delete()
+
+        blobs = 0
+        unreferenced = Blob.objects.filter(attachments__isnull=True, archived_references=0)
+        for blob in unreferenced.iterator():
+            storage.delete(blob.path)
+            if blob.thumbnail:
+                storage.delete(blob.thumbnail)
+            blob.delete()
+            blobs += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Removed {sessions} abandoned uploads and {blobs} unreferenced files'
+        ))
@@ -0,0 +1,94 @@
+import time
+import uuid
+from concurrent.futures import as_completed
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from api.parallel import process_pool
+from api.synthetic import SyntheticData, bulk_create_applications
+from api.tasks import refresh_agent_stats
+
+
+def generate_batch(agent_ids, start, size, run_tag, seed):
+    """Worker process: build and insert one batch, returns the number created"""
+    data = SyntheticData(None if seed is None else seed + start)
+    agents = list(User.objects.filter(pk__in=agent_ids))
+    payloads = [
+        data.application_payload(file_no=f'SYN-{run_tag}-{start + i:07d}')
+        for i in range(size)
+    ]
+    bulk_create_applications(payloads, agents, data.rng)
+    connections.close_all()
+    return size
+
+
+class Command(BaseCommand):
+    help = 'Bulk-generate synthetic agents and applications with realistic child rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--agents', type=int, default=10)
+        parser.add_argument('--applications', type=int, default=1000)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--processes', type=int, default=1,
+                            help='Generate batches in parallel worker processes')
+        parser.add_argument('--password', default='synthetic-pass-123',
+                            help='Password of every generated agent (used by loadtest)')
+        parser.add_argument('--prefix', default='synthetic',
+                            help='Username prefix of generated agents')
+        parser.add_argument('--seed', type=int, default=None)
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        data = SyntheticData(options['seed'])
+        prefix = options['prefix']
+
+        # Hash once: every agent shares the password, and hashing dominates otherwise
+        password = make_password(options['password'])
+        existing = set(
+            User.objects.filter(username__startswith=f'{prefix}_agent_').values_list('username', flat=True)
+        )
+        new_users = [
+            User(username=f'{prefix}_agent_{i}', password=password, first_name=data.name().split()[0])
+            for i in range(options['agents'])
+            if f'{prefix}_agent_{i}' not in existing
+        ]
+        User.objects.bulk_create(new_users)
+        agent_ids = list(
+            User.objects.filter(username__startswith=f'{prefix}_agent_')
+            .order_by('pk').values_list('pk', flat=True)[:options['agents']]
+        )
+
+        run_tag = uuid.uuid4().hex[:6].upper()
+        total = options['applications']
+        batch_size = options['batch_size']
+        batches = [
+            (agent_ids, start, min(batch_size, total - start), run_tag, options['seed'])
+            for start in range(0, total, batch_size)
+        ]
+
+        created = 0
+        if options['processes'] > 1:
+            with process_pool(options['processes']) as pool:
+                futures = [pool.submit(generate_batch, *batch) for batch in batches]
+                for future in as_completed(futures):
+                    created += future.result()
+                    self._progress(created, total, started)
+        else:
+            for batch in batches:
+                created += generate_batch(*batch)
+                self._progress(created, total, started)
+
+        for agent_id in agent_ids:
+            refresh_agent_stats(agent_id)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {len(new_users)} agents and {created} applications '
+            f'in {time.monotonic() - started:.1f}s'
+        ))
+
+    def _progress(self, created, total, started):
+        rate = created / (time.monotonic() - started)
+        self.stdout.write(f'{created}/{total} applications ({rate:.0f}/s)')
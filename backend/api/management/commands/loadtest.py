@@ -0,0 +1,211 @@
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.synthetic import SyntheticData
+
+DEFAULT_MIX = 'list=30,detail=30,create=10,update=10,submit=5,stats=15'
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def record(self, endpoint, seconds, ok):
+        with self.lock:
+            self.latencies[endpoint].append(seconds)
+            if not ok:
+                self.errors[endpoint] += 1
+
+
+class VirtualUser:
+    """One simulated agent: logs in once, then issues a weighted mix of requests"""
+
+    def __init__(self, base_url, username, password, recorder, seed):
+        self.base_url = base_url.rstrip('/')
+        self.username = username
+        self.password = password
+        self.recorder = recorder
+        self.rng = random.Random(seed)
+        self.data = SyntheticData(seed)
+        self.token = None
+        self.seen_ids = []
+        self.own_ids = []
+
+    def request(self, endpoint, method, path, body=None):
+        data = json.dumps(body).encode() if body is not None else None
+        req = urllib.request.Request(self.base_url + path, data=data, method=method)
+        req.add_header('Content-Type', 'application/json')
+        if self.token:
+            req.add_header('Authorization', f'Token {self.token}')
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(req, timeout=60) as response:
+                payload = response.read()
+                ok = True
+        except urllib.error.HTTPError as exc:
+            payload = exc.read()
+            ok = False
+        except (urllib.error.URLError, TimeoutError):
+            payload = b''
+            ok = False
+        self.recorder.record(endpoint, time.perf_counter() - started, ok)
+        if ok and payload:
+            try:
+                return json.loads(payload)
+            except ValueError:
+                return None
+        return None
+
+    def login(self):
+        result = self.request('login', 'POST', '/auth/login/', {
+            'username': self.username, 'password': self.password,
+        })
+        self.token = result and result.get('token')
+        return bool(self.token)
+
+    # ---- operations ----
+
+    def op_list(self):
+        result = self.request('list', 'GET', '/applications/')
+        if isinstance(result, dict):
+            result = result.get('results', [])
+        if result:
+            self.seen_ids = [row['id'] for row in result[:200]]
+
+    def op_detail(self):
+        if not self.seen_ids:
+            return self.op_list()
+        self.request('detail', 'GET', f'/applications/{self.rng.choice(self.seen_ids)}/')
+
+    def op_create(self):
+        result = self.request('create', 'POST', '/applications/', self.data.application_payload())
+        if result and 'id' in result:
+            self.own_ids.append(result['id'])
+
+    def op_update(self):
+        if not self.own_ids:
+            return self.op_create()
+        application_id = self.rng.choice(self.own_ids)
+        payload = self.data.application_payload()
+        payload.pop('file_no', None)
+        self.request('update', 'PUT', f'/applications/{application_id}/', payload)
+
+    def op_submit(self):
+        if not self.own_ids:
+            return self.op_create()
+        self.request('submit', 'POST', f'/applications/{self.rng.choice(self.own_ids)}/submit/')
+
+    def op_stats(self):
+        self.request('stats', 'GET', '/applications/stats/')
+
+    def run(self, mix, deadline, max_requests):
+        if not self.login():
+            return
+        operations = [getattr(self, f'op_{name}') for name in mix]
+        weights = list(mix.values())
+        done = 0
+        while time.monotonic() < deadline and (max_requests is None or done < max_requests):
+            self.rng.choices(operations, weights=weights)[0]()
+            done += 1
+
+
+class Command(BaseCommand):
+    help = 'Drive the API with concurrent simulated agents and report latency percentiles'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://localhost:8000/api')
+        parser.add_argument('--prefix', default='synthetic',
+                            help='Log in as <prefix>_agent_<n> (see generate_synthetic_data)')
+        parser.add_argument('--password', default='synthetic-pass-123')
+        parser.add_argument('--agents', type=int, default=10,
+                            help='Number of distinct agent accounts to spread users over')
+        parser.add_argument('--concurrency', type=int, default=10)
+        parser.add_argument('--duration', type=float, default=30, help='Seconds to run')
+        parser.add_argument('--requests', type=int, default=None,
+                            help='Stop each virtual user after this many requests')
+        parser.add_argument('--mix', default=DEFAULT_MIX,
+                            help=f'Weighted operation mix (default: {DEFAULT_MIX})')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--json', dest='json_path', help='Also write results to this file')
+
+    def handle(self, *args, **options):
+        try:
+            mix = {
+                name.strip(): float(weight)
+                for name, weight in (item.split('=') for item in options['mix'].split(','))
+            }
+        except ValueError:
+            raise CommandError('--mix must look like list=30,detail=30,...')
+        unknown = [name for name in mix if not hasattr(VirtualUser, f'op_{name}')]
+        if unknown:
+            raise CommandError(f'Unknown operations in --mix: {", ".join(unknown)}')
+
+        recorder = Recorder()
+        users = [
+            VirtualUser(
+                options['base_url'],
+                f"{options['prefix']}_agent_{i % options['agents']}",
+                options['password'], recorder, options['seed'] + i,
+            )
+            for i in range(options['concurrency'])
+        ]
+        started = time.monotonic()
+        deadline = started + options['duration']
+        crashed = 0
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            futures = [pool.submit(user.run, mix, deadline, options['requests']) for user in users]
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as exc:
+                    crashed += 1
+                    self.stderr.write(f'Virtual user stopped early: {exc!r}')
+        elapsed = time.monotonic() - started
+
+        rows = []
+        for endpoint in sorted(recorder.latencies):
+            values = sorted(recorder.latencies[endpoint])
+            rows.append({
+                'endpoint': endpoint,
+                'requests': len(values),
+                'errors': recorder.errors[endpoint],
+                'rps': len(values) / elapsed,
+                'p50_ms': percentile(values, 50) * 1000,
+                'p95_ms': percentile(values, 95) * 1000,
+                'p99_ms': percentile(values, 99) * 1000,
+            })
+
+        header = f"{'endpoint':<10}{'requests':>10}{'errors':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for row in rows:
+            self.stdout.write(
+                f"{row['endpoint']:<10}{row['requests']:>10}{row['errors']:>8}{row['rps']:>9.1f}"
+                f"{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}"
+            )
+        total = sum(row['requests'] for row in rows)
+        self.stdout.write(f'\n{total} requests in {elapsed:.1f}s ({total / elapsed:.1f} req/s)')
+        if crashed:
+            self.stderr.write(f'{crashed}/{len(users)} virtual users crashed; the figures above undercount')
+
+        if options['json_path']:
+            with open(options['json_path'], 'w') as handle:
+                json.dump({'elapsed_s': elapsed, 'endpoints': rows}, handle, indent=2)
@@ -0,0 +1,19 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from api.tasks import refresh_agent_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute the AgentStats rollup of every agent with (archived) applications'
+
+    def handle(self, *args, **options):
+        agent_ids = User.objects.filter(
+            Q(applications__isnull=False) | Q(archived_applications__isnull=False) | Q(stats__isnull=False)
+        ).distinct().order_by('pk').values_list('pk', flat=True)
+        count = 0
+        for agent_id in agent_ids.iterator():
+            refresh_agent_stats(agent_id)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt stats for {count} agents'))
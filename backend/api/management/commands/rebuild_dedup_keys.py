@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from api.dedup import refresh_dedup_keys
+from api.models import Application
+
+
+class Command(BaseCommand):
+    help = 'Recompute duplicate-detection keys for every application'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        applications = Application.objects.select_related('business_details').only(
+            'id', 'applicant_name', 'telephone', 'business_details__gst_number'
+        )
+        count = 0
+        for application in applications.iterator(chunk_size=options['chunk_size']):
+            refresh_dedup_keys(application)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt dedup keys for {count} applications'))
@@ -0,0 +1,64 @@
+from concurrent.futures import as_completed
+from datetime import date, datetime, time, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+
+from api.models import Application
+from api.parallel import process_pool
+from api.reports import FORMATS, FORMAT_PDF, get_report, report_queryset
+
+
+def render_chunk(application_ids, fmt):
+    """Worker process: render one chunk of reports, returning (rendered, errors)"""
+    rendered, errors = 0, []
+    for application in report_queryset().filter(pk__in=application_ids):
+        try:
+            get_report(application, fmt)
+            rendered += 1
+        except Exception as exc:
+            errors.append(f'{application.pk}: {exc}')
+    connections.close_all()
+    return rendered, errors
+
+
+class Command(BaseCommand):
+    help = "Render (and cache) verification reports for a day's submissions in parallel"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Submission date YYYY-MM-DD (default: today)')
+        parser.add_argument('--format', dest='fmt', choices=list(FORMATS), default=FORMAT_PDF)
+        parser.add_argument('--processes', type=int, default=4)
+        parser.add_argument('--chunk-size', type=int, default=50)
+
+    def handle(self, *args, **options):
+        try:
+            day = date.fromisoformat(options['date']) if options['date'] else timezone.localdate()
+        except ValueError:
+            raise CommandError('--date must be in YYYY-MM-DD format')
+
+        start = timezone.make_aware(datetime.combine(day, time.min))
+        ids = list(
+            Application.objects.filter(
+                submitted_at__gte=start, submitted_at__lt=start + timedelta(days=1)
+            ).order_by('pk').values_list('pk', flat=True)
+        )
+        if not ids:
+            self.stdout.write(f'No submissions on {day}')
+            return
+
+        chunk_size = options['chunk_size']
+        chunks = [ids[i:i + chunk_size] for i in range(0, len(ids), chunk_size)]
+        rendered = 0
+        with process_pool(options['processes']) as pool:
+            futures = [pool.submit(render_chunk, chunk, options['fmt']) for chunk in chunks]
+            for future in as_completed(futures):
+                count, errors = future.result()
+                rendered += count
+                for error in errors:
+                    self.stderr.write(f'Failed to render {error}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rendered {rendered}/{len(ids)} {options["fmt"]} reports for {day}'
+        ))
@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import Conclusion
+from api.scoring import get_weights, score_applications
+
+
+class Command(BaseCommand):
+    help = 'Recompute the automatic pre-score of every application with a conclusion'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--only-missing', action='store_true',
+                            help='Score only applications that have never been scored')
+
+    def handle(self, *args, **options):
+        try:
+            weights = get_weights()
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        conclusions = Conclusion.objects.order_by('application_id')
+        if options['only_missing']:
+            conclusions = conclusions.filter(pre_score__isnull=True)
+        application_ids = conclusions.values_list('application_id', flat=True)
+
+        started = time.monotonic()
+        scored = 0
+        last_id = 0
+        while True:
+            batch = list(application_ids.filter(application_id__gt=last_id)[:options['batch_size']])
+            if not batch:
+                break
+            scored += score_applications(batch, weights)
+            last_id = batch[-1]
+            self.stdout.write(f'  {scored} scored')
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Scored {scored} applications in {elapsed:.1f}s'
+        ))
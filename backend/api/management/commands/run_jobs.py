@@ -0,0 +1,41 @@
+import signal
+
+from django.core.management.base import BaseCommand
+
+from api import tasks  # noqa: F401  (registers job handlers)
+from api.jobs import Worker, purge_finished, run_pending
+
+
+class Command(BaseCommand):
+    help = 'Run background jobs from the database queue'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=2,
+                            help='Number of worker threads')
+        parser.add_argument('--name', action='append', dest='names',
+                            help='Only run jobs with this name (repeatable)')
+        parser.add_argument('--poll-interval', type=float, default=1.0)
+        parser.add_argument('--once', action='store_true',
+                            help='Drain due jobs and exit instead of polling forever')
+        parser.add_argument('--purge-days', type=int, default=None,
+                            help='Delete finished jobs older than this many days and exit')
+
+    def handle(self, *args, **options):
+        if options['purge_days'] is not None:
+            deleted = purge_finished(options['purge_days'])
+            self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} finished jobs'))
+            return
+
+        if options['once']:
+            count = run_pending(options['names'])
+            self.stdout.write(self.style.SUCCESS(f'Ran {count} jobs'))
+            return
+
+        worker = Worker(
+            concurrency=options['concurrency'],
+            names=options['names'],
+            poll_interval=options['poll_interval'],
+        )
+        signal.signal(signal.SIGTERM, lambda *_: worker.stop())
+        self.stdout.write(f'Job worker started with {worker.concurrency} threads')
+        worker.run()
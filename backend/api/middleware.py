@@ -0,0 +1,174 @@
+"""
+Request/response middleware for the API.
+
+`CompressionMiddleware` compresses responses with brotli when the client
+accepts it and the `brotli` package is installed, otherwise with gzip.
+Streaming responses (event streams, file downloads) and already-compressed
+content types are left alone. Against BREACH, a response that carries a
+secret (the login token) sets `response.contains_secret = True` and is never
+compressed, and gzip output gets up to COMPRESSION_GZIP_MAX_RANDOM_BYTES of
+random padding in its header, as Django's GZipMiddleware does.
+
+`GzipRequestMiddleware` inflates JSON request bodies sent with
+`Content-Encoding: gzip`, capped at DATA_UPLOAD_MAX_MEMORY_SIZE so a small
+compressed body cannot expand without bound.
+
+`ProfilingMiddleware` profiles requests on demand for staff users (see
+api/profiling.py).
+"""
+import gzip
+import io
+import re
+import secrets
+import zlib
+
+from django.conf import settings
+from django.http import JsonResponse
+from django.utils.cache import patch_vary_headers
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+from .profiling import run_profiled
+
+try:
+    import brotli
+except ImportError:  # optional; gzip only
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    'application/json', 'application/javascript', 'application/xml', 'text/',
+    'image/svg+xml',
+)
+MIN_SIZE = 200
+
+_accepts_br = re.compile(r'\bbr\b')
+_accepts_gzip = re.compile(r'\bgzip\b')
+_strong_etag = re.compile(r'^"')
+
+
+def choose_encoding(accept_encoding):
+    if brotli is not None and _accepts_br.search(accept_encoding):
+        return 'br'
+    if _accepts_gzip.search(accept_encoding):
+        return 'gzip'
+    return None
+
+
+def compress(content, encoding):
+    if encoding == 'br':
+        return brotli.compress(content, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    compressed = gzip.compress(content, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+    if not settings.COMPRESSION_GZIP_MAX_RANDOM_BYTES:
+        return compressed
+    # A random-length FNAME field in the header changes the response length
+    # independently of the content (django.utils.text.compress_string)
+    header = bytearray(compressed[:10])
+    header[3] |= gzip.FNAME
+    length = secrets.randbelow(settings.COMPRESSION_GZIP_MAX_RANDOM_BYTES) + 1
+    filename = secrets.token_hex(length)[:length].encode() + b'\x00'
+    return bytes(header) + filename + compressed[10:]
+
+
+class CompressionMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            response.streaming
+            or getattr(response, 'contains_secret', False)
+            or response.has_header('Content-Encoding')
+            or len(response.content) < MIN_SIZE
+            or not response.get('Content-Type', '').startswith(COMPRESSIBLE_TYPES)
+        ):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+        compressed = compress(response.content, encoding)
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = encoding
+        # The body changed, so a strong validator no longer matches it byte for byte
+        etag = response.get('ETag')
+        if etag and _strong_etag.match(etag):
+            response['ETag'] = 'W/' + etag
+        return response
+
+
+class GzipRequestMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if (
+            request.META.get('HTTP_CONTENT_ENCODING', '').lower() == 'gzip'
+            and request.content_type == 'application/json'
+        ):
+            error = self.inflate(request)
+            if error is not None:
+                return error
+        return self.get_response(request)
+
+    def inflate(self, request):
+        limit = settings.DATA_UPLOAD_MAX_MEMORY_SIZE
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        output = io.BytesIO()
+        try:
+            for chunk in iter(lambda: request.read(64 * 1024), b''):
+                # max_length 0 means unlimited (DATA_UPLOAD_MAX_MEMORY_SIZE = None)
+                max_length = 0 if limit is None else limit + 1 - output.tell()
+                output.write(decompressor.decompress(chunk, max_length))
+                if limit is not None and (output.tell() > limit or decompressor.unconsumed_tail):
+                    return JsonResponse({'error': 'Request body too large'}, status=413)
+            output.write(decompressor.flush())
+        except zlib.error:
+            return JsonResponse({'error': 'Malformed gzip request body'}, status=400)
+        if not decompressor.eof:
+            return JsonResponse({'error': 'Truncated gzip request body'}, status=400)
+
+        body = output.getvalue()
+        request._stream = io.BytesIO(body)
+        request._read_started = False
+        if hasattr(request, '_body'):
+            del request._body
+        request.META['CONTENT_LENGTH'] = str(len(body))
+        del request.META['HTTP_CONTENT_ENCODING']
+        return None
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.PROFILING_ENABLED or not self.requested(request):
+            return self.get_response(request)
+        user = self.staff_user(request)
+        if user is None:
+            # Not an error: the flag is simply ignored for everyone else
+            return self.get_response(request)
+        request.profile_user = user
+        response, profile_id = run_profiled(request, self.get_response)
+        response['X-Profile-Id'] = profile_id
+        return response
+
+    def requested(self, request):
+        return request.META.get('HTTP_X_PROFILE') == '1' or request.GET.get('_profile') == '1'
+
+    def staff_user(self, request):
+        """The staff user behind the session or the DRF token, if any"""
+        user = getattr(request, 'user', None)
+        if user is None or not user.is_authenticated:
+            try:
+                authenticated = TokenAuthentication().authenticate(request)
+            except AuthenticationFailed:
+                return None
+            user = authenticated[0] if authenticated else None
+        return user if user is not None and user.is_staff else None
@@ -0,0 +1,51 @@
+# Generated by Django 5.0.1 on 2026-10-19 11:52
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_alter_securitydetails_end_use'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FileNoSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=100, unique=True)),
+                ('prefix', models.CharField(max_length=50)),
+                ('width', models.PositiveSmallIntegerField(default=5)),
+                ('next_value', models.PositiveBigIntegerField(default=1)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AgentProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('branch_code', models.CharField(blank=True, db_index=True, max_length=20)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='agent_profile', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='FileNoBlock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start', models.PositiveBigIntegerField()),
+                ('end', models.PositiveBigIntegerField()),
+                ('issued_at', models.DateTimeField(auto_now_add=True)),
+                ('released_at', models.DateTimeField(blank=True, null=True)),
+                ('issued_to', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='file_no_blocks', to=settings.AUTH_USER_MODEL)),
+                ('sequence', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='blocks', to='api.filenosequence')),
+            ],
+            options={
+                'ordering': ['-issued_at'],
+                'indexes': [models.Index(fields=['sequence', 'start'], name='api_filenob_sequenc_45a0c7_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.0.1 on 2026-10-19 11:52
+
+from django.db import migrations, models
+
+from api.geo import geohash_encode, parse_gps_location
+
+
+def backfill_coordinates(apps, schema_editor):
+    BusinessDetails = apps.get_model('api', 'BusinessDetails')
+    rows = BusinessDetails.objects.exclude(gps_location__isnull=True).exclude(gps_location='')
+    batch = []
+    for business in rows.only('id', 'gps_location').iterator(chunk_size=2000):
+        point = parse_gps_location(business.gps_location)
+        if point is None:
+            continue
+        business.latitude, business.longitude = point
+        business.geohash = geohash_encode(*point)
+        batch.append(business)
+        if len(batch) >= 2000:
+            BusinessDetails.objects.bulk_update(batch, ['latitude', 'longitude', 'geohash'])
+            batch = []
+    if batch:
+        BusinessDetails.objects.bulk_update(batch, ['latitude', 'longitude', 'geohash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_file_no_allocation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='businessdetails',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, max_length=12),
+        ),
+        migrations.AddField(
+            model_name='businessdetails',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='businessdetails',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='businessdetails',
+            index=models.Index(fields=['latitude', 'longitude'], name='api_busines_latitud_29dc13_idx'),
+        ),
+        migrations.RunPython(backfill_coordinates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.0.1 on 2026-10-19 11:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_businessdetails_coordinates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ApplicationDedupKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('phone', 'Phone digits'), ('name', 'Phonetic name'), ('gst', 'GST number'), ('pan', 'PAN (from GST)')], max_length=10)),
+                ('value', models.CharField(max_length=100)),
+                ('application', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dedup_keys', to='api.application')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'value'], name='api_applica_kind_de9117_idx')],
+            },
+        ),
+    ]
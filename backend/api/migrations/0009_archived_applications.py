@@ -0,0 +1,39 @@
+# Generated by Django 5.0.1 on 2026-10-19 12:01
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_attachments'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blob',
+            name='archived_references',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='ArchivedApplication',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('file_no', models.CharField(max_length=100, unique=True)),
+                ('applicant_name', models.CharField(max_length=255)),
+                ('overall_status', models.CharField(blank=True, max_length=20)),
+                ('created_at', models.DateTimeField()),
+                ('submitted_at', models.DateTimeField(blank=True, null=True)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('payload', models.JSONField()),
+                ('agent', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_applications', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['agent', 'overall_status'], name='api_archive_agent_i_df440d_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.0.1 on 2026-10-19 12:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_archived_applications'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bankaccount',
+            name='cc_limit_numeric',
+            field=models.DecimalField(blank=True, db_index=True, decimal_places=2, editable=False, max_digits=15, null=True),
+        ),
+        migrations.AddField(
+            model_name='businessdetails',
+            name='net_income_numeric',
+            field=models.DecimalField(blank=True, db_index=True, decimal_places=2, editable=False, max_digits=15, null=True),
+        ),
+        migrations.AddField(
+            model_name='businessdetails',
+            name='stock_value_numeric',
+            field=models.DecimalField(blank=True, db_index=True, decimal_places=2, editable=False, max_digits=15, null=True),
+        ),
+        migrations.AddField(
+            model_name='businessdetails',
+            name='turnover_numeric',
+            field=models.DecimalField(blank=True, db_index=True, decimal_places=2, editable=False, max_digits=15, null=True),
+        ),
+        migrations.AddField(
+            model_name='coapplicant',
+            name='net_income_numeric',
+            field=models.DecimalField(blank=True, db_index=True, decimal_places=2, editable=False, max_digits=15, null=True),
+        ),
+        migrations.AddField(
+            model_name='coapplicant',
+            name='stock_value_numeric',
+            field=models.DecimalField(blank=True, db_index=True, decimal_places=2, editable=False, max_digits=15, null=True),
+        ),
+        migrations.AddField(
+            model_name='coapplicant',
+            name='turnover_numeric',
+            field=models.DecimalField(blank=True, db_index=True, decimal_places=2, editable=False, max_digits=15, null=True),
+        ),
+        migrations.AddField(
+            model_name='loan',
+            name='loan_amount_numeric',
+            field=models.DecimalField(blank=True, db_index=True, decimal_places=2, editable=False, max_digits=15, null=True),
+        ),
+        migrations.AddField(
+            model_name='otherbusiness',
+            name='yearly_income_numeric',
+            field=models.DecimalField(blank=True, db_index=True, decimal_places=2, editable=False, max_digits=15, null=True),
+        ),
+    ]
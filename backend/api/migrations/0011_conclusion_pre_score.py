@@ -0,0 +1,28 @@
+# Generated by Django 5.0.1 on 2026-10-19 12:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_amount_numeric_columns'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conclusion',
+            name='pre_score',
+            field=models.FloatField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='conclusion',
+            name='pre_score_status',
+            field=models.CharField(blank=True, choices=[('Positive', 'Positive'), ('Negative', 'Negative'), ('Refer to credit', 'Refer to credit')], max_length=20),
+        ),
+        migrations.AddField(
+            model_name='conclusion',
+            name='pre_scored_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
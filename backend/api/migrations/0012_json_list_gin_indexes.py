@@ -0,0 +1,24 @@
+# Generated by Django 5.0.1 on 2026-10-19 12:07
+
+import django.contrib.postgres.indexes
+from django.conf import settings
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_conclusion_pre_score'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='application',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['family_members'], name='api_app_family_members_gin', opclasses=['jsonb_path_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='businessdetails',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['payment_modes'], name='api_biz_payment_modes_gin', opclasses=['jsonb_path_ops']),
+        ),
+    ]
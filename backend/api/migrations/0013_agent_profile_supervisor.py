@@ -0,0 +1,26 @@
+# Generated by Django 5.0.1 on 2026-10-19 12:08
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_json_list_gin_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='agentprofile',
+            name='role',
+            field=models.CharField(choices=[('agent', 'Agent'), ('supervisor', 'Supervisor')], default='agent', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='agentprofile',
+            name='supervisor',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='team_profiles', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.0.1 on 2026-10-19 12:28
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_snapshot_export'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataQualityScan',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mode', models.CharField(choices=[('full', 'Full'), ('incremental', 'Incremental')], max_length=12)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='running', max_length=10)),
+                ('since', models.DateTimeField(blank=True, null=True)),
+                ('rules', models.JSONField(default=list)),
+                ('scanned', models.PositiveIntegerField(default=0)),
+                ('findings', models.JSONField(default=dict)),
+                ('error', models.TextField(blank=True)),
+                ('started_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DataQualityFinding',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('rule', models.CharField(max_length=50)),
+                ('severity', models.CharField(choices=[('error', 'Error'), ('warning', 'Warning')], max_length=10)),
+                ('section', models.CharField(max_length=100)),
+                ('field', models.CharField(max_length=100)),
+                ('message', models.CharField(max_length=255)),
+                ('detected_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('application', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='quality_findings', to='api.application')),
+                ('scan', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api.dataqualityscan')),
+            ],
+            options={
+                'ordering': ['application_id', 'rule'],
+                'indexes': [models.Index(fields=['rule', 'severity'], name='api_dq_rule_idx')],
+            },
+        ),
+    ]
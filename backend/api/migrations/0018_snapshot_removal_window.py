@@ -0,0 +1,23 @@
+# Generated by Django 5.0.1 on 2026-10-19 12:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_data_quality'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='snapshotexport',
+            name='changelog_id',
+        ),
+        migrations.AddIndex(
+            model_name='changelog',
+            index=models.Index(condition=models.Q(models.Q(('action', 'delete'), ('section', 'application')), ('changes__has_key', 'archived'), _connector='OR'), fields=['created_at'], name='api_changelog_removal_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-19 12:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0018_snapshot_removal_window'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='filenosequence',
+            name='width',
+            field=models.PositiveSmallIntegerField(),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.1 on 2026-10-19 12:55
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0019_file_no_width'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('applicant_name'), name='text_pattern_ops'), name='api_app_name_prefix_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['telephone'], name='api_app_telephone_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='businessdetails',
+            index=models.Index(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('business_name'), name='text_pattern_ops'), name='api_biz_name_prefix_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='businessdetails',
+            index=models.Index(fields=['gst_number'], name='api_biz_gst_number_idx'),
+        ),
+    ]
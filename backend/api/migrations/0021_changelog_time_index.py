@@ -0,0 +1,23 @@
+# Generated by Django 5.0.1 on 2026-10-19 12:57
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0020_admin_search_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='changelog',
+            name='api_changelog_app_idx',
+        ),
+        migrations.AddIndex(
+            model_name='changelog',
+            index=models.Index(fields=['application_id', 'created_at', 'id'], name='api_changelog_app_time_idx'),
+        ),
+    ]
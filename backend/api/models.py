@@ -1,5 +1,41 @@
+import uuid
+
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.db.models.functions import Upper
 from django.contrib.auth.models import User
+from django.utils import timezone
+
+from .amounts import parse_amount
+from .geo import geohash_encode, parse_gps_location
+
+
+def amount_field():
+    """Numeric shadow of a free-text amount, filled by AmountFieldsMixin"""
+    return models.DecimalField(max_digits=15, decimal_places=2, blank=True, null=True,
+                               db_index=True, editable=False)
+
+
+class AmountFieldsMixin:
+    """
+    Keeps `<field>_numeric` in sync with each free-text amount in AMOUNT_FIELDS,
+    so totals and ratios can be computed in SQL.
+    """
+    AMOUNT_FIELDS = ()
+
+    def set_amounts(self):
+        for field in self.AMOUNT_FIELDS:
+            setattr(self, f'{field}_numeric', parse_amount(getattr(self, field)))
+
+    def save(self, *args, **kwargs):
+        self.set_amounts()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | {
+                f'{field}_numeric' for field in self.AMOUNT_FIELDS if field in update_fields
+            }
+        super().save(*args, **kwargs)
 
 
 class Item(models.Model):
@@ -76,15 +112,28 @@ class Application(models.Model):
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    submitted_at = models.DateTimeField(blank=True, null=True)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # jsonb_path_ops serves family_members__contains (@>) lookups
+            GinIndex(fields=['family_members'], opclasses=['jsonb_path_ops'],
+                     name='api_app_family_members_gin'),
+            # Incremental snapshot exports select by updated_at range
+            models.Index(fields=['updated_at'], name='api_app_updated_at_idx'),
+            # Admin search: istartswith is UPPER(col) LIKE 'X%', which needs a
+            # pattern opclass on the same expression under a non-C collation
+            models.Index(OpClass(Upper('applicant_name'), name='text_pattern_ops'),
+                         name='api_app_name_prefix_idx'),
+            models.Index(fields=['telephone'], name='api_app_telephone_idx'),
+        ]
     
     def __str__(self):
         return f"{self.applicant_name} - {self.file_no}"
 
 
-class BusinessDetails(models.Model):
+class BusinessDetails(AmountFieldsMixin, models.Model):
     """Step 2 & 3: Business & Financial Details"""
     
     OWNERSHIP_TYPE_CHOICES = [
@@ -138,6 +187,46 @@ class BusinessDetails(models.Model):
     purchase_area = models.CharField(max_length=255, blank=True, null=True)
     sale_area = models.CharField(max_length=255, blank=True, null=True)
     
+    # Parsed from gps_location on save, for nearby-visit queries
+    latitude = models.FloatField(blank=True, null=True)
+    longitude = models.FloatField(blank=True, null=True)
+    geohash = models.CharField(max_length=12, blank=True, db_index=True)
+    
+    # Parsed from the free-text amounts on save
+    turnover_numeric = amount_field()
+    net_income_numeric = amount_field()
+    stock_value_numeric = amount_field()
+    
+    AMOUNT_FIELDS = ('turnover', 'net_income', 'stock_value')
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['latitude', 'longitude']),
+            GinIndex(fields=['payment_modes'], opclasses=['jsonb_path_ops'],
+                     name='api_biz_payment_modes_gin'),
+            # Admin search, see Application.Meta
+            models.Index(OpClass(Upper('business_name'), name='text_pattern_ops'),
+                         name='api_biz_name_prefix_idx'),
+            models.Index(fields=['gst_number'], name='api_biz_gst_number_idx'),
+        ]
+    
+    def save(self, *args, **kwargs):
+        self.set_coordinates()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'gps_location' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'latitude', 'longitude', 'geohash'}
+        super().save(*args, **kwargs)
+    
+    def set_coordinates(self):
+        """Derive latitude/longitude/geohash from the free-form gps_location"""
+        point = parse_gps_location(self.gps_location)
+        if point is None:
+            self.latitude = self.longitude = None
+            self.geohash = ''
+        else:
+            self.latitude, self.longitude = point
+            self.geohash = geohash_encode(*point)
+    
     def __str__(self):
         return f"Business: {self.business_name}"
 
@@ -161,7 +250,7 @@ class PersonMet(models.Model):
         return f"{self.name} - {self.phone}"
 
 
-class CoApplicant(models.Model):
+class CoApplicant(AmountFieldsMixin, models.Model):
     """Optional Co-Applicant Details - Step 3"""
     
     INVOLVEMENT_CHOICES = [
@@ -196,11 +285,18 @@ class CoApplicant(models.Model):
     # For 'Other' involvement
     other_details = models.TextField(blank=True, null=True)
     
+    # Parsed from the free-text amounts on save
+    turnover_numeric = amount_field()
+    net_income_numeric = amount_field()
+    stock_value_numeric = amount_field()
+    
+    AMOUNT_FIELDS = ('turnover', 'net_income', 'stock_value')
+    
     def __str__(self):
         return f"Co-Applicant for {self.application.applicant_name}"
 
 
-class OtherBusiness(models.Model):
+class OtherBusiness(AmountFieldsMixin, models.Model):
     """Step 4: Other Businesses (Dynamic)"""
     
     RELATIONSHIP_CHOICES = [
@@ -216,12 +312,15 @@ class OtherBusiness(models.Model):
     yearly_income = models.CharField(max_length=100)
     vintage_year = models.PositiveIntegerField()
     remarks = models.TextField()
+    yearly_income_numeric = amount_field()
+    
+    AMOUNT_FIELDS = ('yearly_income',)
     
     def __str__(self):
         return f"Other Business: {self.business_name}"
 
 
-class Loan(models.Model):
+class Loan(AmountFieldsMixin, models.Model):
     """Step 5: Loan Details (Dynamic)"""
     
     LOAN_TYPE_CHOICES = [
@@ -237,12 +336,15 @@ class Loan(models.Model):
     bank_name = models.CharField(max_length=255)
     loan_amount = models.CharField(max_length=100)
     emi = models.DecimalField(max_digits=12, decimal_places=2)
+    loan_amount_numeric = amount_field()
+    
+    AMOUNT_FIELDS = ('loan_amount',)
     
     def __str__(self):
         return f"{self.loan_type} - {self.bank_name}"
 
 
-class BankAccount(models.Model):
+class BankAccount(AmountFieldsMixin, models.Model):
     """Step 5: Bank Account Details (Dynamic)"""
     
     ACCOUNT_TYPE_CHOICES = [
@@ -255,6 +357,9 @@ class BankAccount(models.Model):
     branch = models.CharField(max_length=255)
     account_type = models.CharField(max_length=20, choices=ACCOUNT_TYPE_CHOICES)
     cc_limit = models.CharField(max_length=100)
+    cc_limit_numeric = amount_field()
+    
+    AMOUNT_FIELDS = ('cc_limit',)
     
     def __str__(self):
         return f"{self.bank_name} - {self.branch}"
@@ -361,5 +466,430 @@ class Conclusion(models.Model):
     overall_status = models.CharField(max_length=20, choices=OVERALL_STATUS_CHOICES)
     status_remark = models.TextField(blank=True, null=True)
     
+    # Advisory score computed by api/scoring.py on save and by rescore_applications
+    pre_score = models.FloatField(blank=True, null=True, db_index=True)
+    pre_score_status = models.CharField(max_length=20, choices=OVERALL_STATUS_CHOICES, blank=True)
+    pre_scored_at = models.DateTimeField(blank=True, null=True)
+    
     def __str__(self):
         return f"Conclusion for {self.application.applicant_name} - {self.overall_status}"
+
+
+class AgentProfile(models.Model):
+    """Extra per-agent settings (branch membership, role, supervisor)"""
+
+    ROLE_AGENT = 'agent'
+    ROLE_SUPERVISOR = 'supervisor'
+    ROLE_CHOICES = [
+        (ROLE_AGENT, 'Agent'),
+        (ROLE_SUPERVISOR, 'Supervisor'),
+    ]
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='agent_profile')
+    branch_code = models.CharField(max_length=20, blank=True, db_index=True)
+    role = models.CharField(max_length=20, choices=ROLE_CHOICES, default=ROLE_AGENT)
+    # The supervisor whose team this agent belongs to
+    supervisor = models.ForeignKey(
+        User, on_delete=models.SET_NULL, blank=True, null=True, related_name='team_profiles'
+    )
+
+    def __str__(self):
+        return f"{self.user.username} ({self.branch_code or 'no branch'})"
+
+
+class FileNoSequence(models.Model):
+    """Server-side counter that file numbers are allocated from (per branch or per agent)"""
+    key = models.CharField(max_length=100, unique=True)  # e.g. 'branch:DEL' or 'agent:42'
+    prefix = models.CharField(max_length=50)
+    width = models.PositiveSmallIntegerField()  # digits; new sequences take FILE_NO_WIDTH
+    next_value = models.PositiveBigIntegerField(default=1)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def format(self, value):
+        return f"{self.prefix}{value:0{self.width}d}"
+
+    def __str__(self):
+        return f"{self.key} (next {self.next_value})"
+
+
+class FileNoBlock(models.Model):
+    """A contiguous range of file numbers reserved by one agent/device"""
+    sequence = models.ForeignKey(FileNoSequence, on_delete=models.PROTECT, related_name='blocks')
+    issued_to = models.ForeignKey(User, on_delete=models.CASCADE, related_name='file_no_blocks')
+    start = models.PositiveBigIntegerField()
+    end = models.PositiveBigIntegerField()  # inclusive
+    issued_at = models.DateTimeField(auto_now_add=True)
+    released_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['-issued_at']
+        indexes = [
+            models.Index(fields=['sequence', 'start']),
+        ]
+
+    @property
+    def size(self):
+        return self.end - self.start + 1
+
+    @property
+    def file_numbers(self):
+        return [self.sequence.format(value) for value in range(self.start, self.end + 1)]
+
+    def __str__(self):
+        return f"{self.sequence.format(self.start)} .. {self.sequence.format(self.end)}"
+
+
+class ApplicationDedupKey(models.Model):
+    """Normalized blocking key used to find candidate duplicate applicants"""
+    KIND_PHONE = 'phone'
+    KIND_NAME = 'name'
+    KIND_GST = 'gst'
+    KIND_PAN = 'pan'
+    KIND_CHOICES = [
+        (KIND_PHONE, 'Phone digits'),
+        (KIND_NAME, 'Phonetic name'),
+        (KIND_GST, 'GST number'),
+        (KIND_PAN, 'PAN (from GST)'),
+    ]
+
+    application = models.ForeignKey(Application, on_delete=models.CASCADE, related_name='dedup_keys')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    value = models.CharField(max_length=100)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['kind', 'value']),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}:{self.value}"
+
+
+class Job(models.Model):
+    """Background job row; workers claim them with SELECT ... FOR UPDATE SKIP LOCKED"""
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_at = models.DateTimeField()
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['run_at']
+        indexes = [
+            models.Index(
+                fields=['run_at'], name='api_job_queued_run_at_idx',
+                condition=models.Q(status='queued')
+            ),
+            models.Index(fields=['status', 'name']),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+
+
+class AgentStats(models.Model):
+    """Per-agent rollup of application counts, refreshed by a background job"""
+    agent = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    total = models.PositiveIntegerField(default=0)
+    submitted = models.PositiveIntegerField(default=0)
+    positive = models.PositiveIntegerField(default=0)
+    negative = models.PositiveIntegerField(default=0)
+    refer_to_credit = models.PositiveIntegerField(default=0)
+    pending = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Stats for {self.agent.username}"
+
+
+class Blob(models.Model):
+    """Stored file content, deduplicated by SHA-256"""
+    sha256 = models.CharField(max_length=64, unique=True)
+    size = models.PositiveBigIntegerField()
+    content_type = models.CharField(max_length=100)
+    path = models.CharField(max_length=255)  # relative to the storage root
+    thumbnail = models.CharField(max_length=255, blank=True)
+    archived_references = models.PositiveIntegerField(default=0)  # from ArchivedApplication payloads
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.size} bytes)"
+
+
+class Attachment(models.Model):
+    """Photo or document attached to an application"""
+
+    KIND_CHOICES = [
+        ('stock_picture', 'Stock picture'),
+        ('document', 'Document'),
+        ('other', 'Other'),
+    ]
+
+    application = models.ForeignKey(Application, on_delete=models.CASCADE, related_name='attachments')
+    blob = models.ForeignKey(Blob, on_delete=models.PROTECT, related_name='attachments')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, default='other')
+    filename = models.CharField(max_length=255)
+    uploaded_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='attachments')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['created_at']
+
+    def __str__(self):
+        return self.filename
+
+
+class UploadSession(models.Model):
+    """State of a chunked, resumable upload until it becomes an Attachment"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    application = models.ForeignKey(Application, on_delete=models.CASCADE, related_name='upload_sessions')
+    uploaded_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='upload_sessions')
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100)
+    kind = models.CharField(max_length=20, choices=Attachment.KIND_CHOICES, default='other')
+    size = models.PositiveBigIntegerField()
+    received = models.PositiveBigIntegerField(default=0)
+    attachment = models.OneToOneField(
+        Attachment, on_delete=models.SET_NULL, null=True, blank=True, related_name='upload_session'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def is_complete(self):
+        return self.attachment_id is not None
+
+    def __str__(self):
+        return f"{self.filename} ({self.received}/{self.size})"
+
+
+class ArchivedApplication(models.Model):
+    """
+    Finalized application moved out of the hot tables.
+    
+    The full ApplicationDetailSerializer output (children included) is kept in
+    `payload`; the id is the original application id so detail URLs keep working.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    agent = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_applications')
+    file_no = models.CharField(max_length=100, unique=True)
+    applicant_name = models.CharField(max_length=255)
+    overall_status = models.CharField(max_length=20, blank=True)
+    created_at = models.DateTimeField()
+    submitted_at = models.DateTimeField(blank=True, null=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+    payload = models.JSONField()
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['agent', 'overall_status']),
+        ]
+
+    def __str__(self):
+        return f"{self.applicant_name} - {self.file_no} (archived)"
+
+
+class Draft(models.Model):
+    """
+    In-progress application form, stored as the raw JSON the form produced.
+    
+    Nothing is validated until the draft is finalized into an Application;
+    `key` is chosen by the client so autosaves are idempotent upserts.
+    """
+    agent = models.ForeignKey(User, on_delete=models.CASCADE, related_name='drafts')
+    key = models.CharField(max_length=64)
+    data = models.JSONField(default=dict)
+    digest = models.CharField(max_length=64)  # SHA-256 of the canonical JSON
+    size = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-updated_at']
+        constraints = [
+            models.UniqueConstraint(fields=['agent', 'key'], name='api_draft_agent_key_uniq'),
+        ]
+
+    def __str__(self):
+        return f"Draft {self.key} ({self.agent.username})"
+
+
+class ChangeLog(models.Model):
+    """
+    Append-only audit entry: one section of an application changed.
+    
+    `section` names the model instance ('application', 'conclusion',
+    'loans[1]', 'business_details.owners[0]'); `changes` maps each changed
+    field to [old, new]. `application_id` is a plain column so history
+    outlives deletion and archival.
+    """
+    ACTION_CREATE = 'create'
+    ACTION_UPDATE = 'update'
+    ACTION_DELETE = 'delete'
+    ACTION_CHOICES = [
+        (ACTION_CREATE, 'Create'),
+        (ACTION_UPDATE, 'Update'),
+        (ACTION_DELETE, 'Delete'),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    application_id = models.BigIntegerField()
+    section = models.CharField(max_length=100)
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    changes = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    actor = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-id']
+        indexes = [
+            # History pages, newest first; ids from different processes are not in time order
+            models.Index(fields=['application_id', 'created_at', 'id'], name='api_changelog_app_time_idx'),
+            # Removals for incremental snapshot exports, by time
+            models.Index(
+                fields=['created_at'], name='api_changelog_removal_idx',
+                condition=models.Q(action='delete', section='application') | models.Q(changes__has_key='archived'),
+            ),
+        ]
+
+    def __str__(self):
+        return f"#{self.application_id} {self.section} {self.action}"
+
+
+class SnapshotExport(models.Model):
+    """
+    One analytics snapshot run (api/snapshots.py).
+    
+    An incremental run exports applications updated in (since, until], and
+    the deletions and archivals the ChangeLog recorded in the same window.
+    """
+    KIND_FULL = 'full'
+    KIND_INCREMENTAL = 'incremental'
+    KIND_CHOICES = [
+        (KIND_FULL, 'Full'),
+        (KIND_INCREMENTAL, 'Incremental'),
+    ]
+    FORMAT_PARQUET = 'parquet'
+    FORMAT_ARROW = 'arrow'
+    FORMAT_CHOICES = [
+        (FORMAT_PARQUET, 'Parquet'),
+        (FORMAT_ARROW, 'Arrow IPC'),
+    ]
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=12, choices=KIND_CHOICES)
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES, default=FORMAT_PARQUET)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    since = models.DateTimeField(blank=True, null=True)
+    until = models.DateTimeField(blank=True, null=True)
+    path = models.CharField(max_length=255, blank=True)  # relative to SNAPSHOT_DIR
+    row_counts = models.JSONField(default=dict)
+    error = models.TextField(blank=True)
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['-id']
+
+    def __str__(self):
+        return f"{self.kind} snapshot #{self.pk} ({self.status})"
+
+
+class DataQualityScan(models.Model):
+    """
+    One run of the data-quality scanner (api/quality.py).
+    
+    An incremental run re-checks applications updated since the previous
+    finished run started; `rules` lists the rule names that were applied.
+    """
+    MODE_FULL = 'full'
+    MODE_INCREMENTAL = 'incremental'
+    MODE_CHOICES = [
+        (MODE_FULL, 'Full'),
+        (MODE_INCREMENTAL, 'Incremental'),
+    ]
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    mode = models.CharField(max_length=12, choices=MODE_CHOICES)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_RUNNING)
+    since = models.DateTimeField(blank=True, null=True)
+    rules = models.JSONField(default=list)
+    scanned = models.PositiveIntegerField(default=0)
+    findings = models.JSONField(default=dict)  # rule -> findings written
+    error = models.TextField(blank=True)
+    started_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['-id']
+
+    def __str__(self):
+        return f"{self.mode} quality scan #{self.pk} ({self.status})"
+
+
+class DataQualityFinding(models.Model):
+    """An inconsistency one quality rule found in an application"""
+    SEVERITY_ERROR = 'error'
+    SEVERITY_WARNING = 'warning'
+    SEVERITY_CHOICES = [
+        (SEVERITY_ERROR, 'Error'),
+        (SEVERITY_WARNING, 'Warning'),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    # Cascades in the ORM only: a scan writing while an application is deleted
+    # must not fail either side; finish_scan removes such strays
+    application = models.ForeignKey(
+        Application, on_delete=models.CASCADE, db_constraint=False, related_name='quality_findings'
+    )
+    rule = models.CharField(max_length=50)
+    severity = models.CharField(max_length=10, choices=SEVERITY_CHOICES)
+    section = models.CharField(max_length=100)  # e.g. 'business_details', 'loans[1]'
+    field = models.CharField(max_length=100)
+    message = models.CharField(max_length=255)
+    scan = models.ForeignKey(DataQualityScan, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    detected_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['application_id', 'rule']
+        indexes = [
+            models.Index(fields=['rule', 'severity'], name='api_dq_rule_idx'),
+        ]
+
+    def __str__(self):
+        return f"#{self.application_id} {self.rule}: {self.message}"
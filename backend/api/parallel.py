@@ -0,0 +1,16 @@
+"""
+Process pools for management commands that use the ORM in worker processes.
+
+Forked workers must not share the parent's database connections: the
+parent closes its own before the workers start, and each worker starts
+with none (the initializer) and opens its own on first use.
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+from django.db import connections
+
+
+def process_pool(processes):
+    """A ProcessPoolExecutor whose workers open their own DB connections"""
+    connections.close_all()
+    return ProcessPoolExecutor(max_workers=processes, initializer=connections.close_all)
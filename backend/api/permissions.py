@@ -0,0 +1,11 @@
+from rest_framework import permissions
+
+from .team import is_supervisor
+
+
+class IsSupervisor(permissions.BasePermission):
+    """Supervisors (and staff) only"""
+    message = 'Supervisor access required.'
+
+    def has_permission(self, request, view):
+        return is_supervisor(request.user)
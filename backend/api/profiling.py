@@ -0,0 +1,165 @@
+"""
+On-demand request profiling for staff.
+
+A staff user adds `X-Profile: 1` (or `?_profile=1`) to any API request. The
+request then runs under cProfile, and every SQL statement it issues is
+recorded with its duration. The result goes into a ring buffer of the last
+PROFILE_KEEP profiles under PROFILE_DIR: a JSON summary plus the raw pstats
+dump. The admin-only /api/admin/profiles/ endpoints serve them; the
+response carries the new profile's id in `X-Profile-Id`.
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+TOP_FUNCTIONS = 40
+MAX_QUERIES = 1000
+
+
+class QueryLog:
+    """execute_wrapper that records each statement's SQL and duration"""
+
+    def __init__(self):
+        self.queries = []
+        self.total = 0.0
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.total += duration
+            self.count += 1
+            if len(self.queries) < MAX_QUERIES:
+                self.queries.append({
+                    'alias': context['connection'].alias,
+                    'sql': sql,
+                    'many': many,
+                    'ms': round(duration * 1000, 3),
+                })
+
+
+def profile_dir():
+    path = Path(settings.PROFILE_DIR)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def run_profiled(request, get_response):
+    """Run the request under cProfile and SQL capture; returns (response, profile_id)"""
+    log = QueryLog()
+    profiler = cProfile.Profile()
+    wrappers = [connection.execute_wrapper(log) for connection in connections.all()]
+    for wrapper in wrappers:
+        wrapper.__enter__()
+    started = time.perf_counter()
+    try:
+        profiler.enable()
+        try:
+            response = get_response(request)
+        finally:
+            profiler.disable()
+    finally:
+        elapsed = time.perf_counter() - started
+        for wrapper in reversed(wrappers):
+            wrapper.__exit__(None, None, None)
+
+    profile_id = save_profile(request, response, profiler, log, elapsed)
+    return response, profile_id
+
+
+def _top_functions(stats):
+    output = io.StringIO()
+    stats.stream = output
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(TOP_FUNCTIONS)
+    return output.getvalue()
+
+
+def save_profile(request, response, profiler, log, elapsed):
+    """Write one profile into the ring buffer and drop the oldest beyond PROFILE_KEEP"""
+    directory = profile_dir()
+    profile_id = f'{time.time_ns()}-{uuid.uuid4().hex[:8]}'
+    stats = pstats.Stats(profiler)
+
+    summary = {
+        'id': profile_id,
+        'created_at': timezone.now().isoformat(),
+        'method': request.method,
+        'path': request.get_full_path(),
+        'user': getattr(getattr(request, 'profile_user', None), 'username', None),
+        'status': response.status_code,
+        'total_ms': round(elapsed * 1000, 2),
+        'sql_count': log.count,
+        'sql_ms': round(log.total * 1000, 2),
+        'python_ms': round((elapsed - log.total) * 1000, 2),
+        'function_calls': stats.total_calls,
+        'top_functions': _top_functions(stats),
+        'queries': log.queries,
+    }
+
+    _write_atomic(directory / f'{profile_id}.prof', profiler.dump_stats)
+    _write_atomic(
+        directory / f'{profile_id}.json',
+        lambda path: Path(path).write_text(json.dumps(summary, indent=1)),
+    )
+    _trim(directory)
+    return profile_id
+
+
+def _write_atomic(path, write):
+    tmp = path.with_suffix(path.suffix + '.tmp')
+    write(str(tmp))
+    os.replace(tmp, path)
+
+
+def _trim(directory):
+    summaries = sorted(directory.glob('*.json'))
+    for stale in summaries[:-settings.PROFILE_KEEP]:
+        stale.unlink(missing_ok=True)
+        stale.with_suffix('.prof').unlink(missing_ok=True)
+
+
+def _valid_id(profile_id):
+    stamp, _, suffix = profile_id.partition('-')
+    return stamp.isdigit() and len(suffix) == 8 and suffix.isalnum()
+
+
+def list_profiles():
+    """Summaries (without queries and call listings), newest first"""
+    rows = []
+    for path in sorted(profile_dir().glob('*.json'), reverse=True):
+        try:
+            summary = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue  # trimmed or being written concurrently
+        summary.pop('queries', None)
+        summary.pop('top_functions', None)
+        rows.append(summary)
+    return rows
+
+
+def get_profile(profile_id):
+    if not _valid_id(profile_id):
+        return None
+    try:
+        return json.loads((profile_dir() / f'{profile_id}.json').read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def pstats_path(profile_id):
+    if not _valid_id(profile_id):
+        return None
+    path = profile_dir() / f'{profile_id}.prof'
+    return path if path.exists() else None
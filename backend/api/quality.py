@@ -0,0 +1,297 @@
+"""
+Rule-driven data-quality checks over the application portfolio.
+
+A rule is a function registered with @rule(name, severity). It gets one
+application record and yields (section, field, message) for each problem
+it finds. A record is the application row as a dict. Its one-to-one
+sections ('business_details', 'security_details', 'conclusion',
+'co_applicant') are stored under those keys, or None when missing. Its
+child rows are stored as lists under 'loans', 'bank_accounts' and
+'other_businesses'.
+
+scan_chunk loads one chunk of applications with one query per table. It
+runs every rule and replaces the chunk's findings in one transaction, so a
+chunk can be re-run, and chunks can run in parallel worker processes (see
+manage.py scan_data_quality). A full scan covers id ranges [lo, hi). An
+incremental scan re-checks only the applications updated since the
+previous finished scan started. QUALITY_SCAN_OVERLAP_SECONDS is taken off
+that start, so edits that committed while the previous scan ran are not
+missed. If the rule set has changed since then, the scan is full instead.
+"""
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Exists, Max, Min, OuterRef
+from django.utils import timezone
+
+from .models import (
+    Application, BankAccount, BusinessDetails, CoApplicant, Conclusion, DataQualityFinding,
+    DataQualityScan, Loan, OtherBusiness, SecurityDetails,
+)
+
+ONE_TO_ONE = {
+    'business_details': BusinessDetails,
+    'security_details': SecurityDetails,
+    'conclusion': Conclusion,
+    'co_applicant': CoApplicant,
+}
+CHILDREN = {
+    'loans': Loan,
+    'bank_accounts': BankAccount,
+    'other_businesses': OtherBusiness,
+}
+
+ERROR = DataQualityFinding.SEVERITY_ERROR
+WARNING = DataQualityFinding.SEVERITY_WARNING
+
+RULES = {}  # name -> Rule, in registration order
+
+
+class QualityError(Exception):
+    pass
+
+
+class Rule:
+    def __init__(self, name, severity, check):
+        self.name = name
+        self.severity = severity
+        self.check = check
+
+
+def rule(name, severity=ERROR):
+    """Register a function as quality rule `name`"""
+    def decorator(func):
+        RULES[name] = Rule(name, severity, func)
+        return func
+    return decorator
+
+
+def rule_names():
+    return sorted(RULES)
+
+
+# ============ Rules ============
+
+def parse_date(value):
+    """A DD/MM/YYYY date as typed in the form, or None"""
+    try:
+        return datetime.strptime((value or '').strip(), '%d/%m/%Y').date()
+    except ValueError:
+        return None
+
+
+def years_between(born, on):
+    return on.year - born.year - ((on.month, on.day) < (born.month, born.day))
+
+
+def _reference_date(record):
+    """The day the agent met the applicant, falling back to when the form was created"""
+    return parse_date(record['visit_date']) or timezone.localtime(record['created_at']).date()
+
+
+@rule('age_dob_mismatch')
+def age_dob_mismatch(record):
+    born = parse_date(record['dob'])
+    if born is None:
+        return
+    expected = years_between(born, _reference_date(record))
+    # Agents round, or work the age out on another day
+    if abs(record['age'] - expected) > 1:
+        yield 'application', 'age', f"age {record['age']} but dob {record['dob']} gives {expected}"
+
+
+@rule('invalid_dob', WARNING)
+def invalid_dob(record):
+    dob = (record['dob'] or '').strip()
+    if not dob:
+        return
+    born = parse_date(dob)
+    if born is None:
+        yield 'application', 'dob', f'dob {dob!r} is not a DD/MM/YYYY date'
+    elif born >= _reference_date(record):
+        yield 'application', 'dob', f'dob {dob} is not before the visit'
+
+
+@rule('visit_before_allocation', WARNING)
+def visit_before_allocation(record):
+    allocated, visited = parse_date(record['allocation_date']), parse_date(record['visit_date'])
+    if allocated and visited and visited < allocated:
+        yield 'application', 'visit_date', (
+            f"visit {record['visit_date']} is before allocation {record['allocation_date']}"
+        )
+
+
+# (section, choice field, free-text field, choice value that asks for the text)
+OTHER_FIELDS = [
+    ('application', 'qualification', 'other_qualification', 'Other'),
+    ('application', 'prof_qualification', 'other_prof_qualification', 'Other'),
+    ('application', 'tel_owner', 'other_tel_owner', 'Other'),
+    ('security_details', 'house_ownership', 'other_house_owner', 'Other'),
+    ('security_details', 'end_use', 'other_end_use', 'Other'),
+    ('conclusion', 'qr_availability', 'qr_other_owner', 'Yes - Belongs to other'),
+    ('conclusion', 'signboard_contact', 'signboard_contact_other', 'Yes - Belongs to other'),
+    ('co_applicant', 'involvement_type', 'other_details', 'Other'),
+]
+
+
+def _other_fields(record):
+    for section, choice, other, value in OTHER_FIELDS:
+        row = record if section == 'application' else record[section]
+        if row is not None:
+            yield section, choice, other, value, row[choice], (row[other] or '').strip()
+
+
+@rule('other_without_choice')
+def other_without_choice(record):
+    for section, choice, other, value, chosen, text in _other_fields(record):
+        if text and chosen != value:
+            yield section, other, f'{other} is filled but {choice} is {chosen!r}'
+
+
+@rule('other_not_specified', WARNING)
+def other_not_specified(record):
+    for section, choice, other, value, chosen, text in _other_fields(record):
+        if chosen == value and not text:
+            yield section, other, f'{choice} is {value!r} but {other} is empty'
+
+
+@rule('rent_on_owned_shop')
+def rent_on_owned_shop(record):
+    business = record['business_details']
+    if business and business['shop_ownership'] == 'Owned' and business['rent_amount']:
+        yield 'business_details', 'rent_amount', f"rent {business['rent_amount']} on an owned shop"
+
+
+@rule('rent_missing', WARNING)
+def rent_missing(record):
+    business = record['business_details']
+    if business and business['shop_ownership'] == 'Rented' and not business['rent_amount']:
+        yield 'business_details', 'rent_amount', 'rented shop without a rent amount'
+
+
+@rule('future_year')
+def future_year(record):
+    this_year = date.today().year
+    rows = [
+        ('business_details', 'business_since_year', record['business_details']),
+        ('co_applicant', 'business_since_year', record['co_applicant']),
+        *((f'other_businesses[{i}]', 'vintage_year', row) for i, row in enumerate(record['other_businesses'])),
+    ]
+    for section, field, row in rows:
+        if row and row[field] and row[field] > this_year:
+            yield section, field, f'{field} {row[field]} is in the future'
+
+
+@rule('emi_exceeds_loan', WARNING)
+def emi_exceeds_loan(record):
+    for i, loan in enumerate(record['loans']):
+        if loan['loan_amount_numeric'] is not None and loan['emi'] > loan['loan_amount_numeric']:
+            yield f'loans[{i}]', 'emi', f"EMI {loan['emi']} exceeds the loan amount {loan['loan_amount']}"
+
+
+# ============ Scanning ============
+
+def _scope(field, lo, hi, ids):
+    if ids is not None:
+        return {f'{field}__in': ids}
+    return {f'{field}__gte': lo, f'{field}__lt': hi}
+
+
+def load_records(lo=None, hi=None, ids=None):
+    """Records of the applications with ids in [lo, hi), or in `ids`"""
+    records = {}
+    for row in Application.objects.filter(**_scope('pk', lo, hi, ids)).order_by().values():
+        row.update({name: None for name in ONE_TO_ONE})
+        row.update({name: [] for name in CHILDREN})
+        records[row['id']] = row
+    for name, model in ONE_TO_ONE.items():
+        for row in model.objects.filter(**_scope('application_id', lo, hi, ids)).values():
+            if row['application_id'] in records:
+                records[row['application_id']][name] = row
+    for name, model in CHILDREN.items():
+        for row in model.objects.filter(**_scope('application_id', lo, hi, ids)).order_by('pk').values():
+            if row['application_id'] in records:
+                records[row['application_id']][name].append(row)
+    return list(records.values())
+
+
+def evaluate(records, scan_id=None):
+    """(unsaved findings, errors) of every rule over `records`"""
+    findings, errors = [], []
+    now = timezone.now()
+    for record in records:
+        for check in RULES.values():
+            try:
+                for section, field, message in check.check(record):
+                    findings.append(DataQualityFinding(
+                        application_id=record['id'], rule=check.name, severity=check.severity,
+                        section=section, field=field, message=message[:255],
+                        scan_id=scan_id, detected_at=now,
+                    ))
+            except Exception as exc:
+                errors.append(f"{record['id']} {check.name}: {exc!r}")
+    return findings, errors
+
+
+def scan_chunk(lo=None, hi=None, ids=None, scan_id=None):
+    """Check one chunk and replace its findings; returns (scanned, {rule: findings}, errors)"""
+    records = load_records(lo, hi, ids)
+    findings, errors = evaluate(records, scan_id)
+    with transaction.atomic():
+        DataQualityFinding.objects.filter(**_scope('application_id', lo, hi, ids)).delete()
+        DataQualityFinding.objects.bulk_create(findings, batch_size=1000)
+    return len(records), dict(Counter(finding.rule for finding in findings)), errors
+
+
+def start_scan(full=False, force=False):
+    """Record a new scan; an incremental one without a usable predecessor becomes full"""
+    running = DataQualityScan.objects.filter(status=DataQualityScan.STATUS_RUNNING)
+    if running.exists():
+        if not force:
+            raise QualityError(f'Scan #{running.first().pk} is still running (use --force if it died)')
+        running.update(status=DataQualityScan.STATUS_FAILED, error='Abandoned', finished_at=timezone.now())
+
+    since = None
+    if not full:
+        previous = DataQualityScan.objects.filter(status=DataQualityScan.STATUS_DONE).first()
+        if previous is not None and previous.rules == rule_names():
+            since = previous.started_at - timedelta(seconds=settings.QUALITY_SCAN_OVERLAP_SECONDS)
+    return DataQualityScan.objects.create(
+        mode=DataQualityScan.MODE_FULL if since is None else DataQualityScan.MODE_INCREMENTAL,
+        since=since, rules=rule_names(),
+    )
+
+
+def plan(scan, chunk_size):
+    """The scan's chunks as (lo, hi, ids) tuples"""
+    if scan.since is not None:
+        ids = list(
+            Application.objects.filter(updated_at__gte=scan.since).order_by('pk').values_list('pk', flat=True)
+        )
+        return [(None, None, ids[i:i + chunk_size]) for i in range(0, len(ids), chunk_size)]
+    bounds = Application.objects.aggregate(lo=Min('pk'), hi=Max('pk'))
+    if bounds['lo'] is None:
+        return []
+    return [(lo, lo + chunk_size, None) for lo in range(bounds['lo'], bounds['hi'] + 1, chunk_size)]
+
+
+def finish_scan(scan, scanned, counts, error=''):
+    scan.status = DataQualityScan.STATUS_FAILED if error else DataQualityScan.STATUS_DONE
+    scan.scanned = scanned
+    scan.findings = counts
+    scan.error = error
+    scan.finished_at = timezone.now()
+    scan.save(update_fields=['status', 'scanned', 'findings', 'error', 'finished_at'])
+    # Findings written for an application while it was being deleted
+    DataQualityFinding.objects.filter(
+        ~Exists(Application.objects.filter(pk=OuterRef('application_id')))
+    ).delete()
+
+
+def summary():
+    """Current findings per rule and severity"""
+    return list(
+        DataQualityFinding.objects.values('rule', 'severity').annotate(count=Count('id')).order_by('rule')
+    )
@@ -0,0 +1,30 @@
+"""
+orjson-based JSON rendering.
+
+Renders the same JSON as DRF's JSONRenderer: anything orjson does not
+handle natively (Decimal, lazy strings, timedelta, ...) goes through DRF's
+own encoder. Datetimes are passed through as well so they keep DRF's
+format. Encoding is several times faster, which matters for large lists.
+"""
+import orjson
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+_encoder = JSONEncoder()
+
+
+class ORJSONRenderer(BaseRenderer):
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+
+    options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        options = self.options
+        if accepted_media_type and 'indent=' in accepted_media_type:
+            # orjson only supports 2-space indentation
+            options |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, default=_encoder.default, option=options)
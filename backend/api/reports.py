@@ -0,0 +1,206 @@
+"""
+Verification report rendering.
+
+Reports are built from `ApplicationDetailSerializer` data and cached on disk
+under REPORT_CACHE_DIR/<application id>/<version>.<ext>, where the version
+is derived from the application's `updated_at`. Any edit through the API
+bumps `updated_at`, so stale reports are never served and unchanged ones are
+never rendered twice.
+"""
+import hashlib
+import io
+import os
+import tempfile
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.template.loader import render_to_string
+
+from .models import Application
+from .serializers import ApplicationDetailSerializer
+
+# Bump when the layout changes so cached files are re-rendered
+REPORT_LAYOUT_VERSION = 1
+
+FORMAT_HTML = 'html'
+FORMAT_PDF = 'pdf'
+FORMATS = {
+    FORMAT_HTML: 'text/html; charset=utf-8',
+    FORMAT_PDF: 'application/pdf',
+}
+
+APPLICANT_FIELDS = [
+    'file_no', 'applicant_name', 'gender', 'dob', 'age', 'allocation_date', 'visit_date',
+    'qualification', 'other_qualification', 'prof_qualification', 'other_prof_qualification',
+    'telephone', 'tel_owner', 'other_tel_owner', 'residential_address', 'family_members',
+    'agent_name', 'submitted_at',
+]
+DETAIL_SECTIONS = [
+    ('Business Details', 'business_details'),
+    ('Co-Applicant', 'co_applicant'),
+    ('Security & Loan Requirement', 'security_details'),
+    ('Conclusion', 'conclusion'),
+]
+TABLE_SECTIONS = [
+    ('Business Owners', ('business_details', 'owners')),
+    ('Persons Met', ('business_details', 'persons_met')),
+    ('Other Businesses', ('other_businesses',)),
+    ('Existing Loans', ('loans',)),
+    ('Bank Accounts', ('bank_accounts',)),
+]
+
+
+class ReportError(Exception):
+    """Raised when a report cannot be rendered"""
+
+
+def _label(field):
+    return field.replace('_', ' ').capitalize()
+
+
+def _display(value):
+    if value is None or value == '':
+        return '-'
+    if isinstance(value, (list, tuple)):
+        return ', '.join(str(item) for item in value) or '-'
+    return str(value)
+
+
+def build_sections(data):
+    """Turn serializer data into (title, kind, rows) sections shared by all formats"""
+    sections = [(
+        'Client Particulars', 'fields',
+        [(_label(field), _display(data.get(field))) for field in APPLICANT_FIELDS],
+    )]
+    for title, key in DETAIL_SECTIONS:
+        detail = data.get(key)
+        if detail:
+            rows = [
+                (_label(field), _display(value)) for field, value in detail.items()
+                if field not in ('id', 'owners', 'persons_met')
+            ]
+            sections.append((title, 'fields', rows))
+    for title, path in TABLE_SECTIONS:
+        items = data
+        for key in path:
+            items = (items or {}).get(key)
+        if items:
+            columns = [field for field in items[0] if field != 'id']
+            rows = [[_label(column) for column in columns]]
+            rows += [[_display(item.get(column)) for column in columns] for item in items]
+            sections.append((title, 'table', rows))
+    return sections
+
+
+def report_version(application):
+    raw = f'{application.pk}:{application.updated_at.isoformat()}:{REPORT_LAYOUT_VERSION}'
+    return hashlib.sha1(raw.encode()).hexdigest()[:16]
+
+
+def report_path(application, fmt):
+    return Path(settings.REPORT_CACHE_DIR) / str(application.pk) / f'{report_version(application)}.{fmt}'
+
+
+def render_html(data):
+    return render_to_string('api/report.html', {
+        'data': data,
+        'sections': build_sections(data),
+    }).encode('utf-8')
+
+
+def render_pdf(data):
+    try:
+        from reportlab.lib import colors
+        from reportlab.lib.pagesizes import A4
+        from reportlab.lib.styles import getSampleStyleSheet
+        from reportlab.lib.units import mm
+        from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+    except ImportError as exc:
+        raise ReportError('PDF rendering requires the reportlab package') from exc
+
+    styles = getSampleStyleSheet()
+    cell = styles['BodyText']
+    story = [
+        Paragraph('Verification Report', styles['Title']),
+        Paragraph(escape(f"File No: {_display(data.get('file_no'))}"), styles['Heading3']),
+    ]
+    for title, kind, rows in build_sections(data):
+        story.append(Spacer(1, 4 * mm))
+        story.append(Paragraph(title, styles['Heading2']))
+        if kind == 'fields':
+            table = Table(
+                [[Paragraph(escape(label), cell), Paragraph(escape(value), cell)] for label, value in rows],
+                colWidths=[55 * mm, 115 * mm],
+            )
+            table.setStyle(TableStyle([
+                ('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
+                ('BACKGROUND', (0, 0), (0, -1), colors.whitesmoke),
+                ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ]))
+        else:
+            table = Table([[Paragraph(escape(value), cell) for value in row] for row in rows], repeatRows=1)
+            table.setStyle(TableStyle([
+                ('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
+                ('BACKGROUND', (0, 0), (-1, 0), colors.whitesmoke),
+                ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ]))
+        story.append(table)
+
+    buffer = io.BytesIO()
+    SimpleDocTemplate(buffer, pagesize=A4, title=f"Verification report {data.get('file_no')}").build(story)
+    return buffer.getvalue()
+
+
+RENDERERS = {
+    FORMAT_HTML: render_html,
+    FORMAT_PDF: render_pdf,
+}
+
+
+def get_report(application, fmt=FORMAT_PDF):
+    """Return the path of the cached report, rendering it first if needed"""
+    if fmt not in RENDERERS:
+        raise ReportError(f'Unknown report format: {fmt}')
+    path = report_path(application, fmt)
+    if path.exists():
+        return path
+
+    content = RENDERERS[fmt](ApplicationDetailSerializer(application).data)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Write to a temp file and rename so readers never see a partial report
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as handle:
+        handle.write(content)
+        handle.flush()
+        written = os.fstat(handle.fileno()).st_mtime
+    os.replace(tmp, path)
+
+    # Only older files: a concurrent request may have just written a newer version
+    for stale in path.parent.glob(f'*.{fmt}'):
+        try:
+            if stale != path and stale.stat().st_mtime < written:
+                stale.unlink()
+        except FileNotFoundError:
+            pass
+    return path
+
+
+def open_report(application, fmt=FORMAT_PDF):
+    """Open the cached report, rendering it again if a cleanup removed it before it was opened"""
+    for _ in range(3):
+        try:
+            return open(get_report(application, fmt), 'rb')
+        except FileNotFoundError:
+            continue
+    raise ReportError('Report was removed while it was being served; try again')
+
+
+def report_queryset():
+    """Applications with everything the report serializer touches preloaded"""
+    return Application.objects.select_related(
+        'agent', 'business_details', 'co_applicant', 'security_details', 'conclusion'
+    ).prefetch_related(
+        'other_businesses', 'loans', 'bank_accounts',
+        'business_details__owners', 'business_details__persons_met'
+    )
@@ -1,9 +1,15 @@
+from django.conf import settings
 from rest_framework import serializers
 from django.contrib.auth.models import User
 from .models import (
     Item, Application, BusinessDetails, BusinessOwner, PersonMet,
-    CoApplicant, OtherBusiness, Loan, BankAccount, SecurityDetails, Conclusion
+    CoApplicant, OtherBusiness, Loan, BankAccount, SecurityDetails, Conclusion,
+    FileNoBlock, Attachment, UploadSession, ArchivedApplication, Draft, SnapshotExport
 )
+from .allocation import SCOPES, SCOPE_AGENT, allocate_file_no, client_file_no_allowed
+from .bulk import ACTIONS, ACTION_REASSIGN, ACTION_SET_STATUS
+from .dedup import refresh_dedup_keys
+from .scoring import score_application
 
 
 class ItemSerializer(serializers.ModelSerializer):
@@ -32,6 +38,7 @@ class PersonMetSerializer(serializers.ModelSerializer):
 class BusinessDetailsSerializer(serializers.ModelSerializer):
     owners = BusinessOwnerSerializer(many=True, required=False)
     persons_met = PersonMetSerializer(many=True, required=False)
+    payment_modes = serializers.ListField(child=serializers.CharField(max_length=100), required=False)
     
     class Meta:
         model = BusinessDetails
@@ -41,7 +48,8 @@ class BusinessDetailsSerializer(serializers.ModelSerializer):
             'business_relates_to', 'business_since_year', 'turnover', 'net_income',
             'stock_value', 'txn_type', 'staff_count', 'monthly_salary',
             'creditors_payment_time', 'debtors_payment_time', 'payment_modes',
-            'purchase_area', 'sale_area', 'owners', 'persons_met'
+            'purchase_area', 'sale_area', 'owners', 'persons_met',
+            'turnover_numeric', 'net_income_numeric', 'stock_value_numeric'
         ]
         read_only_fields = ['id']
 
@@ -53,7 +61,8 @@ class CoApplicantSerializer(serializers.ModelSerializer):
             'id', 'involvement_type', 'business_name', 'business_address', 'registered_name',
             'business_relates_to', 'business_since_year', 'turnover', 'net_income',
             'stock_value', 'txn_type', 'staff_count', 'monthly_salary',
-            'employer_name', 'position', 'yearly_salary', 'duration', 'other_details'
+            'employer_name', 'position', 'yearly_salary', 'duration', 'other_details',
+            'turnover_numeric', 'net_income_numeric', 'stock_value_numeric'
         ]
         read_only_fields = ['id']
 
@@ -63,7 +72,7 @@ class OtherBusinessSerializer(serializers.ModelSerializer):
         model = OtherBusiness
         fields = [
             'id', 'business_name', 'owner_name', 'address', 'relationship',
-            'yearly_income', 'vintage_year', 'remarks'
+            'yearly_income', 'vintage_year', 'remarks', 'yearly_income_numeric'
         ]
         read_only_fields = ['id']
 
@@ -71,14 +80,14 @@ class OtherBusinessSerializer(serializers.ModelSerializer):
 class LoanSerializer(serializers.ModelSerializer):
     class Meta:
         model = Loan
-        fields = ['id', 'loan_type', 'bank_name', 'loan_amount', 'emi']
+        fields = ['id', 'loan_type', 'bank_name', 'loan_amount', 'emi', 'loan_amount_numeric']
         read_only_fields = ['id']
 
 
 class BankAccountSerializer(serializers.ModelSerializer):
     class Meta:
         model = BankAccount
-        fields = ['id', 'bank_name', 'branch', 'account_type', 'cc_limit']
+        fields = ['id', 'bank_name', 'branch', 'account_type', 'cc_limit', 'cc_limit_numeric']
         read_only_fields = ['id']
 
 
@@ -102,9 +111,10 @@ class ConclusionSerializer(serializers.ModelSerializer):
             'signboard', 'biz_registration', 'education_proof', 'true_caller_name',
             'qr_availability', 'qr_other_owner', 'signboard_contact', 'signboard_contact_other',
             'electricity_bill', 'rent_agreement', 'commercial_vehicle',
-            'other_findings', 'overall_status', 'status_remark'
+            'other_findings', 'overall_status', 'status_remark',
+            'pre_score', 'pre_score_status', 'pre_scored_at'
         ]
-        read_only_fields = ['id']
+        read_only_fields = ['id', 'pre_score', 'pre_score_status', 'pre_scored_at']
 
 
 class ApplicationListSerializer(serializers.ModelSerializer):
@@ -116,9 +126,10 @@ class ApplicationListSerializer(serializers.ModelSerializer):
         model = Application
         fields = [
             'id', 'applicant_name', 'file_no', 'telephone', 'allocation_date',
-            'visit_date', 'agent_name', 'overall_status', 'created_at', 'updated_at'
+            'visit_date', 'agent_name', 'overall_status', 'created_at', 'updated_at',
+            'submitted_at'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'created_at', 'updated_at', 'submitted_at']
 
 
 class ApplicationDetailSerializer(serializers.ModelSerializer):
@@ -131,6 +142,7 @@ class ApplicationDetailSerializer(serializers.ModelSerializer):
     security_details = SecurityDetailsSerializer(required=False)
     conclusion = ConclusionSerializer(required=False)
     agent_name = serializers.CharField(source='agent.username', read_only=True)
+    family_members = serializers.ListField(child=serializers.CharField(max_length=100), required=False)
     
     class Meta:
         model = Application
@@ -141,9 +153,21 @@ class ApplicationDetailSerializer(serializers.ModelSerializer):
             'telephone', 'tel_owner', 'other_tel_owner', 'residential_address',
             'family_members', 'business_details', 'co_applicant', 'other_businesses',
             'loans', 'bank_accounts', 'security_details', 'conclusion',
-            'created_at', 'updated_at'
+            'created_at', 'updated_at', 'submitted_at'
         ]
-        read_only_fields = ['id', 'agent', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'agent', 'created_at', 'updated_at', 'submitted_at']
+        # Omitted file numbers are allocated server-side from the agent's sequence
+        extra_kwargs = {'file_no': {'required': False}}
+    
+    def validate_file_no(self, value):
+        # The unique constraint only covers the hot table
+        if ArchivedApplication.objects.filter(file_no=value).exists():
+            raise serializers.ValidationError('An archived application already uses this file number.')
+        unchanged = self.instance is not None and self.instance.file_no == value
+        request = self.context.get('request')
+        if not unchanged and request is not None and not client_file_no_allowed(request.user, value):
+            raise serializers.ValidationError('This file number is not in a block issued to you.')
+        return value
     
     def create(self, validated_data):
         # Extract nested data
@@ -157,6 +181,8 @@ class ApplicationDetailSerializer(serializers.ModelSerializer):
         
         # Set agent from request
         validated_data['agent'] = self.context['request'].user
+        if not validated_data.get('file_no'):
+            validated_data['file_no'] = allocate_file_no(validated_data['agent'])
         
         # Create main application
         application = Application.objects.create(**validated_data)
@@ -200,6 +226,9 @@ class ApplicationDetailSerializer(serializers.ModelSerializer):
         if conclusion_data:
             Conclusion.objects.create(application=application, **conclusion_data)
         
+        refresh_dedup_keys(application)
+        score_application(application)
+        
         return application
     
     def update(self, instance, validated_data):
@@ -225,6 +254,7 @@ class ApplicationDetailSerializer(serializers.ModelSerializer):
             business, created = BusinessDetails.objects.update_or_create(
                 application=instance, defaults=business_details_data
             )
+            instance.business_details = business
             
             if owners_data is not None:
                 business.owners.all().delete()
@@ -271,10 +301,13 @@ class ApplicationDetailSerializer(serializers.ModelSerializer):
         
         # Update conclusion
         if conclusion_data is not None:
-            Conclusion.objects.update_or_create(
+            instance.conclusion, created = Conclusion.objects.update_or_create(
                 application=instance, defaults=conclusion_data
             )
         
+        refresh_dedup_keys(instance)
+        score_application(instance)
+        
         return instance
 
 
@@ -284,3 +317,196 @@ class UserSerializer(serializers.ModelSerializer):
         model = User
         fields = ['id', 'username', 'email', 'first_name', 'last_name']
         read_only_fields = ['id']
+
+
+# ============ File Number Allocation Serializers ============
+
+class FileNoBlockSerializer(serializers.ModelSerializer):
+    sequence = serializers.CharField(source='sequence.key', read_only=True)
+    prefix = serializers.CharField(source='sequence.prefix', read_only=True)
+    width = serializers.IntegerField(source='sequence.width', read_only=True)
+    first_file_no = serializers.SerializerMethodField()
+    last_file_no = serializers.SerializerMethodField()
+
+    class Meta:
+        model = FileNoBlock
+        fields = [
+            'id', 'sequence', 'prefix', 'width', 'start', 'end', 'size',
+            'first_file_no', 'last_file_no', 'issued_at', 'released_at'
+        ]
+        read_only_fields = fields
+
+    def get_first_file_no(self, obj):
+        return obj.sequence.format(obj.start)
+
+    def get_last_file_no(self, obj):
+        return obj.sequence.format(obj.end) if obj.size > 0 else None
+
+
+class FileNoAllocationSerializer(serializers.Serializer):
+    """Input for reserving a block of file numbers"""
+    scope = serializers.ChoiceField(choices=SCOPES, default=SCOPE_AGENT)
+    size = serializers.IntegerField(min_value=1, required=False)
+
+
+class FileNoReleaseSerializer(serializers.Serializer):
+    """Input for releasing the unused tail of a block"""
+    last_used = serializers.IntegerField(min_value=1, required=False, allow_null=True)
+
+
+# ============ Attachment Serializers ============
+
+class AttachmentSerializer(serializers.ModelSerializer):
+    size = serializers.IntegerField(source='blob.size', read_only=True)
+    content_type = serializers.CharField(source='blob.content_type', read_only=True)
+    sha256 = serializers.CharField(source='blob.sha256', read_only=True)
+    has_thumbnail = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Attachment
+        fields = [
+            'id', 'application', 'kind', 'filename', 'size', 'content_type',
+            'sha256', 'has_thumbnail', 'created_at'
+        ]
+        read_only_fields = fields
+
+    def get_has_thumbnail(self, obj):
+        return bool(obj.blob.thumbnail)
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    attachment = AttachmentSerializer(read_only=True)
+
+    class Meta:
+        model = UploadSession
+        fields = [
+            'id', 'application', 'filename', 'content_type', 'kind', 'size',
+            'received', 'attachment', 'created_at', 'updated_at'
+        ]
+        read_only_fields = ['id', 'received', 'attachment', 'created_at', 'updated_at']
+        extra_kwargs = {
+            'size': {'min_value': 1},
+            'content_type': {'required': False},
+        }
+
+
+# ============ Supervisor Serializers ============
+
+class BulkFilterSerializer(serializers.Serializer):
+    """The team list filters as a JSON object; unknown keys are rejected"""
+    agent = serializers.IntegerField(required=False)
+    branch = serializers.CharField(max_length=20, required=False)
+    status = serializers.ChoiceField(
+        choices=[value for value, _ in Conclusion.OVERALL_STATUS_CHOICES] + ['pending'], required=False
+    )
+    overdue = serializers.BooleanField(required=False)
+    payment_mode = serializers.ListField(
+        child=serializers.CharField(max_length=100), required=False, allow_empty=False
+    )
+    family_member = serializers.ListField(
+        child=serializers.CharField(max_length=100), required=False, allow_empty=False
+    )
+
+    LIST_FIELDS = ('payment_mode', 'family_member')
+
+    def to_internal_value(self, data):
+        if not isinstance(data, dict):
+            raise serializers.ValidationError('Expected an object of filters.')
+        unknown = set(data) - set(self.fields)
+        if unknown:
+            raise serializers.ValidationError({key: ['Unknown filter.'] for key in sorted(unknown)})
+        # A single value is accepted where a list is expected, as in the query string
+        data = {
+            key: [value] if key in self.LIST_FIELDS and isinstance(value, str) else value
+            for key, value in data.items()
+        }
+        return super().to_internal_value(data)
+
+    def validate(self, attrs):
+        if attrs.get('overdue') is False:
+            del attrs['overdue']
+        if not attrs:
+            raise serializers.ValidationError('At least one filter is required.')
+        return attrs
+
+
+class BulkActionSerializer(serializers.Serializer):
+    """Input for a supervisor bulk action; exactly one of ids or filter"""
+    action = serializers.ChoiceField(choices=ACTIONS)
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False)
+    filter = BulkFilterSerializer(required=False)
+    agent = serializers.IntegerField(required=False)
+    overall_status = serializers.ChoiceField(choices=Conclusion.OVERALL_STATUS_CHOICES, required=False)
+    dry_run = serializers.BooleanField(default=False)
+
+    def validate(self, attrs):
+        if ('ids' in attrs) == ('filter' in attrs):
+            raise serializers.ValidationError('Provide either ids or filter.')
+        if attrs['action'] == ACTION_REASSIGN and 'agent' not in attrs:
+            raise serializers.ValidationError({'agent': 'Required for reassign.'})
+        if attrs['action'] == ACTION_SET_STATUS and 'overall_status' not in attrs:
+            raise serializers.ValidationError({'overall_status': 'Required for set_status.'})
+        return attrs
+
+
+# ============ Draft Serializers ============
+
+class DraftListSerializer(serializers.ModelSerializer):
+    """Draft summary; `applicant_name` is annotated from the JSON, data is not loaded"""
+    applicant_name = serializers.CharField(read_only=True, default=None)
+
+    class Meta:
+        model = Draft
+        fields = ['key', 'applicant_name', 'digest', 'size', 'created_at', 'updated_at']
+        read_only_fields = fields
+
+
+class DraftSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Draft
+        fields = ['key', 'data', 'digest', 'size', 'created_at', 'updated_at']
+        read_only_fields = fields
+
+
+# ============ Batch Serializers ============
+
+class BatchOperationSerializer(serializers.Serializer):
+    id = serializers.CharField(max_length=64, required=False)
+    method = serializers.ChoiceField(choices=['GET', 'POST', 'PUT', 'PATCH', 'DELETE'])
+    path = serializers.RegexField(r'^/api/', max_length=500)
+    body = serializers.JSONField(required=False, allow_null=True)
+
+
+class BatchSerializer(serializers.Serializer):
+    operations = BatchOperationSerializer(many=True, allow_empty=False)
+    stop_on_error = serializers.BooleanField(default=False)
+
+    def validate_operations(self, operations):
+        if len(operations) > settings.BATCH_MAX_OPERATIONS:
+            raise serializers.ValidationError(
+                f'At most {settings.BATCH_MAX_OPERATIONS} operations per batch.'
+            )
+        ids = [operation['id'] for operation in operations if 'id' in operation]
+        if len(ids) != len(set(ids)):
+            raise serializers.ValidationError('Operation ids must be unique.')
+        return operations
+
+
+# ============ Snapshot Serializers ============
+
+class SnapshotExportSerializer(serializers.ModelSerializer):
+    requested_by = serializers.CharField(source='requested_by.username', read_only=True, default=None)
+
+    class Meta:
+        model = SnapshotExport
+        fields = [
+            'id', 'kind', 'format', 'status', 'since', 'until', 'path', 'row_counts',
+            'error', 'requested_by', 'created_at', 'finished_at'
+        ]
+        read_only_fields = fields
+
+
+class SnapshotRequestSerializer(serializers.Serializer):
+    """Input for queueing a snapshot export"""
+    kind = serializers.ChoiceField(choices=SnapshotExport.KIND_CHOICES, default=SnapshotExport.KIND_INCREMENTAL)
+    format = serializers.ChoiceField(choices=SnapshotExport.FORMAT_CHOICES, default=SnapshotExport.FORMAT_PARQUET)
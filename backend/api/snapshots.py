@@ -0,0 +1,301 @@
+"""
+Columnar snapshots of applications for analytics (Parquet or Arrow IPC).
+
+A snapshot is a directory under SNAPSHOT_DIR with one file per table:
+
+- applications: Application joined with BusinessDetails, SecurityDetails
+  and Conclusion. Joined columns are prefixed like Django lookups, e.g.
+  `conclusion__overall_status`.
+- business_owners, persons_met, co_applicants, other_businesses, loans,
+  bank_accounts: child rows with their application_id.
+- removed (incremental runs only): applications deleted or archived in
+  the export window, taken from the ChangeLog.
+
+There is also a manifest.json with the row counts and the time window.
+Rows are read with server-side cursors and written one row group of
+SNAPSHOT_ROW_GROUP_SIZE rows at a time, so memory stays bounded by a
+single row group whatever the table size. All tables are read in one
+REPEATABLE READ transaction, so the files agree with each other.
+
+An incremental run exports applications whose updated_at lies in
+(previous until, until], with all of their children, because children are
+replaced together with their application. `until` trails the start of the
+run by SNAPSHOT_LAG_SECONDS, so that transactions still in flight are
+picked up by the next run. Removals use the same window on the ChangeLog's
+created_at (the time of the change), which also leaves time for the audit
+buffer to write them; ChangeLog ids are no watermark, because entries from
+different processes commit out of id order. Archived applications are not in the hot
+tables and are therefore not exported.
+
+pyarrow is imported lazily; only this export needs it.
+"""
+import json
+import os
+import shutil
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection, models, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import (
+    Application, BankAccount, BusinessDetails, BusinessOwner, ChangeLog, CoApplicant, Conclusion,
+    Loan, OtherBusiness, PersonMet, SecurityDetails, SnapshotExport,
+)
+
+# One-to-one children flattened into the applications file
+JOINED = (
+    ('business_details', BusinessDetails),
+    ('security_details', SecurityDetails),
+    ('conclusion', Conclusion),
+)
+
+# file name -> (model, lookup from the model to Application)
+CHILD_TABLES = {
+    'business_owners': (BusinessOwner, 'business__application'),
+    'persons_met': (PersonMet, 'business__application'),
+    'co_applicants': (CoApplicant, 'application'),
+    'other_businesses': (OtherBusiness, 'application'),
+    'loans': (Loan, 'application'),
+    'bank_accounts': (BankAccount, 'application'),
+}
+
+EXTENSIONS = {SnapshotExport.FORMAT_PARQUET: 'parquet', SnapshotExport.FORMAT_ARROW: 'arrow'}
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet  # noqa: F401
+    except ImportError as exc:
+        raise SnapshotError('Snapshot export requires the pyarrow package') from exc
+    return pyarrow
+
+
+def _column(pa, name, field):
+    """(name, arrow type, value converter or None) for a model field"""
+    if isinstance(field, models.ForeignKey):
+        return name, pa.int64(), None
+    if isinstance(field, models.BooleanField):
+        return name, pa.bool_(), None
+    if isinstance(field, (models.AutoField, models.IntegerField)):
+        return name, pa.int64(), None
+    if isinstance(field, models.FloatField):
+        return name, pa.float64(), None
+    if isinstance(field, models.DecimalField):
+        return name, pa.decimal128(field.max_digits, field.decimal_places), None
+    if isinstance(field, models.DateTimeField):
+        return name, pa.timestamp('us', tz='UTC'), None
+    if isinstance(field, models.DateField):
+        return name, pa.date32(), None
+    if isinstance(field, models.JSONField):
+        if field.default is list:
+            return name, pa.list_(pa.string()), None
+        return name, pa.string(), lambda value: None if value is None else json.dumps(value)
+    if isinstance(field, models.UUIDField):
+        return name, pa.string(), lambda value: None if value is None else str(value)
+    return name, pa.string(), None
+
+
+def _concrete_fields(model, skip=()):
+    return [field for field in model._meta.concrete_fields if field.name not in skip]
+
+
+def application_table(pa):
+    """(columns, lookups) for the denormalized applications file"""
+    columns, lookups = [], []
+    for field in _concrete_fields(Application):
+        columns.append(_column(pa, field.attname, field))
+        lookups.append(field.attname)
+    for prefix, model in JOINED:
+        for field in _concrete_fields(model, skip=('id', 'application')):
+            columns.append(_column(pa, f'{prefix}__{field.attname}', field))
+            lookups.append(f'{prefix}__{field.attname}')
+    return columns, lookups
+
+
+def child_table(pa, model, to_application):
+    """(columns, lookups) for a child file; application_id always comes last"""
+    fields = _concrete_fields(model, skip=('application',))
+    columns = [_column(pa, field.attname, field) for field in fields]
+    lookups = [field.attname for field in fields]
+    columns.append(('application_id', pa.int64(), None))
+    lookups.append(f'{to_application}_id')
+    return columns, lookups
+
+
+class TableWriter:
+    """Streams row groups into one Parquet or Arrow IPC file"""
+
+    def __init__(self, pa, path, columns, fmt):
+        self.pa = pa
+        self.columns = columns
+        self.schema = pa.schema([pa.field(name, pa_type) for name, pa_type, _ in columns])
+        if fmt == SnapshotExport.FORMAT_PARQUET:
+            self.writer = pa.parquet.ParquetWriter(str(path), self.schema, compression='zstd')
+        else:
+            self.writer = pa.ipc.new_file(str(path), self.schema)
+        self.rows = 0
+
+    def write(self, rows):
+        arrays = []
+        for (_, pa_type, convert), values in zip(self.columns, zip(*rows)):
+            if convert is not None:
+                values = [convert(value) for value in values]
+            arrays.append(self.pa.array(values, type=pa_type))
+        self.writer.write_batch(self.pa.RecordBatch.from_arrays(arrays, schema=self.schema))
+        self.rows += len(rows)
+
+    def close(self):
+        self.writer.close()
+
+
+def write_table(pa, path, columns, rows, fmt, row_group_size):
+    """Write an iterable of row tuples in row groups; returns the row count"""
+    writer = TableWriter(pa, path, columns, fmt)
+    try:
+        group = []
+        for row in rows:
+            group.append(row)
+            if len(group) >= row_group_size:
+                writer.write(group)
+                group = []
+        if group:
+            writer.write(group)
+    finally:
+        writer.close()
+    return writer.rows
+
+
+def previous_export():
+    return SnapshotExport.objects.filter(status=SnapshotExport.STATUS_DONE).order_by('-until', '-id').first()
+
+
+def create_export(kind, fmt=SnapshotExport.FORMAT_PARQUET, user=None):
+    """Queue an export; an incremental request without a finished predecessor becomes full"""
+    if kind == SnapshotExport.KIND_INCREMENTAL and previous_export() is None:
+        kind = SnapshotExport.KIND_FULL
+    return SnapshotExport.objects.create(kind=kind, format=fmt, requested_by=user)
+
+
+def run_export(export, row_group_size=None):
+    """
+    Write the snapshot files for `export`; marks it done or failed.
+
+    Must be called outside a transaction: the tables are read in a
+    REPEATABLE READ transaction of its own, and a failure is recorded after
+    that has been rolled back.
+    """
+    if connection.in_atomic_block:
+        raise SnapshotError('run_export must be called outside a transaction')
+    pa = _pyarrow()
+    row_group_size = row_group_size or settings.SNAPSHOT_ROW_GROUP_SIZE
+    previous = previous_export() if export.kind == SnapshotExport.KIND_INCREMENTAL else None
+
+    export.status = SnapshotExport.STATUS_RUNNING
+    export.since = previous.until if previous else None
+    export.until = timezone.now() - timedelta(seconds=settings.SNAPSHOT_LAG_SECONDS)
+    export.path = f'{export.pk:06d}-{export.kind}-{export.until:%Y%m%dT%H%M%S}'
+    export.save(update_fields=['status', 'since', 'until', 'path'])
+
+    root = Path(settings.SNAPSHOT_DIR)
+    directory = root / export.path
+    staging = root / f'.{export.path}.tmp'
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+    extension = EXTENSIONS[export.format]
+
+    try:
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ')
+            counts = _write_tables(pa, export, previous, staging, extension, row_group_size)
+        manifest = {
+            'id': export.pk,
+            'kind': export.kind,
+            'format': export.format,
+            'since': export.since.isoformat() if export.since else None,
+            'until': export.until.isoformat(),
+            'files': {name: f'{name}.{extension}' for name in counts},
+            'row_counts': counts,
+        }
+        (staging / 'manifest.json').write_text(json.dumps(manifest, indent=1))
+        os.replace(staging, directory)
+    except Exception as exc:
+        shutil.rmtree(staging, ignore_errors=True)
+        export.status = SnapshotExport.STATUS_FAILED
+        export.error = str(exc)
+        export.finished_at = timezone.now()
+        export.save(update_fields=['status', 'error', 'finished_at'])
+        raise
+
+    export.status = SnapshotExport.STATUS_DONE
+    export.row_counts = counts
+    export.finished_at = timezone.now()
+    export.save(update_fields=['status', 'row_counts', 'finished_at'])
+    return export
+
+
+def _window_on(field, export):
+    """Q selecting rows whose `field` lies inside the export window"""
+    window = Q(**{f'{field}__lte': export.until})
+    if export.since is not None:
+        window &= Q(**{f'{field}__gt': export.since})
+    return window
+
+
+def _window(lookup, export):
+    """Q selecting rows whose application changed inside the export window"""
+    return _window_on(f'{lookup}updated_at', export)
+
+
+def _write_tables(pa, export, previous, directory, extension, row_group_size):
+    counts = {}
+    chunk = min(row_group_size, 10000)  # rows per server-side cursor fetch
+
+    columns, lookups = application_table(pa)
+    applications = Application.objects.filter(_window('', export)).order_by('pk')
+    counts['applications'] = write_table(
+        pa, directory / f'applications.{extension}', columns,
+        applications.values_list(*lookups).iterator(chunk_size=chunk), export.format, row_group_size,
+    )
+
+    for name, (model, to_application) in CHILD_TABLES.items():
+        columns, lookups = child_table(pa, model, to_application)
+        rows = model.objects.filter(_window(f'{to_application}__', export)).order_by('pk')
+        counts[name] = write_table(
+            pa, directory / f'{name}.{extension}', columns,
+            rows.values_list(*lookups).iterator(chunk_size=chunk), export.format, row_group_size,
+        )
+
+    if previous is not None:
+        removed = ChangeLog.objects.filter(
+            Q(action=ChangeLog.ACTION_DELETE, section='application') | Q(changes__has_key='archived'),
+            _window_on('created_at', export),
+        ).order_by('created_at', 'id').values_list('application_id', 'action', 'created_at')
+        columns = [
+            ('application_id', pa.int64(), None),
+            ('reason', pa.string(), lambda action: 'deleted' if action == ChangeLog.ACTION_DELETE else 'archived'),
+            ('at', pa.timestamp('us', tz='UTC'), None),
+        ]
+        counts['removed'] = write_table(
+            pa, directory / f'removed.{extension}', columns,
+            removed.iterator(chunk_size=chunk), export.format, row_group_size,
+        )
+    return counts
+
+
+def snapshot_file(export, name):
+    """Path of one file of a finished export, or None"""
+    if export.status != SnapshotExport.STATUS_DONE or name not in {
+        'manifest.json', *(f'{table}.{EXTENSIONS[export.format]}' for table in export.row_counts)
+    }:
+        return None
+    path = Path(settings.SNAPSHOT_DIR) / export.path / name
+    return path if path.exists() else None
@@ -0,0 +1,126 @@
+"""
+Process warm-up and readiness.
+
+`boot` does the process-wide work that needs no database: it imports the
+URLconf (and with it every view, serializer, numpy and orjson), builds the
+nested serializer fields and compiles templates. With gunicorn's
+preload_app (see gunicorn.conf.py) this runs once in the master, and the
+forked workers share the result. `warm` runs in each worker after fork. It
+checks that the database answers and reaches the caches, and only then
+marks the worker ready. It does not pre-open connections for requests:
+those run on gthread's request threads, and each thread opens its own and
+keeps it for CONN_MAX_AGE.
+
+Every step's duration lands in TIMINGS, and /api/ready/ reports them. That
+endpoint answers 503 until the worker is warm and the database probe
+succeeds. The probe result is cached for READINESS_PROBE_SECONDS, so
+frequent load-balancer checks cost at most one connection attempt per
+worker per interval.
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from importlib import import_module
+
+import psycopg2
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, connections
+from django.template.loader import get_template
+from django.urls import get_resolver
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+TIMINGS = {}  # step -> seconds, in the order the steps ran
+
+_lock = threading.Lock()
+_state = {'booted': False, 'warm': False}
+_probe = {'ok': False, 'error': 'not checked yet', 'latency_ms': None, 'checked_at': None, 'at': 0.0}
+_probe_lock = threading.Lock()
+
+
+def record(step, seconds):
+    TIMINGS[step] = round(seconds, 4)
+
+
+@contextmanager
+def timed(step):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(step, time.perf_counter() - started)
+
+
+def boot():
+    """Process-wide warm-up without database access; safe before fork"""
+    with _lock:
+        if _state['booted']:
+            return
+        with timed('import_urls'):
+            import_module(settings.ROOT_URLCONF)
+            get_resolver().resolve('/api/health/')
+        with timed('serializers'):
+            from .serializers import ApplicationDetailSerializer, ApplicationListSerializer
+            ApplicationDetailSerializer().fields
+            ApplicationListSerializer().fields
+        with timed('templates'):
+            for name in ('api/report.html', 'admin/change_list.html'):
+                get_template(name)
+        _state['booted'] = True
+
+
+def warm():
+    """Per-worker warm-up: database check and caches; marks the worker ready"""
+    boot()
+    with _lock:
+        if _state['warm']:
+            return
+        with timed('database'):
+            connection.ensure_connection()
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            # Not reused: requests run on other threads with their own connections
+            connection.close()
+        with timed('caches'):
+            from .throttling import get_store
+            caches['default'].get('startup:ping')
+            get_store()
+        _state['warm'] = True
+    probe(force=True)
+    logger.info('Worker warm: %s', TIMINGS)
+
+
+def is_warm():
+    return _state['warm']
+
+
+def probe(force=False):
+    """Database reachability, re-checked at most every READINESS_PROBE_SECONDS"""
+    if force or time.monotonic() - _probe['at'] >= settings.READINESS_PROBE_SECONDS:
+        # One thread probes; concurrent callers get the previous result
+        if _probe_lock.acquire(blocking=force):
+            try:
+                _check_database()
+            finally:
+                _probe_lock.release()
+    return {key: value for key, value in _probe.items() if key != 'at'}
+
+
+def _check_database():
+    params = {**connections['default'].get_connection_params(), 'connect_timeout': 2}
+    started = time.perf_counter()
+    try:
+        conn = psycopg2.connect(**params)
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute('SELECT 1')
+        finally:
+            conn.close()
+    except psycopg2.Error as exc:
+        _probe.update(ok=False, error=str(exc).strip(), latency_ms=None)
+    else:
+        _probe.update(ok=True, error=None, latency_ms=round((time.perf_counter() - started) * 1000, 2))
+    _probe.update(checked_at=timezone.now().isoformat(), at=time.monotonic())
@@ -0,0 +1,123 @@
+"""
+File storage backends for attachments.
+
+Content is stored once per SHA-256 under blobs/ab/cd/<sha256>; in-progress
+uploads live under uploads/<session id>. The backend is chosen with the
+ATTACHMENT_STORAGE setting; `LocalFileStorage` keeps everything on the local
+filesystem, which is all a single VPS (and the tests) need.
+"""
+import fcntl
+import hashlib
+import os
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+CHUNK_SIZE = 64 * 1024
+
+
+class StorageError(Exception):
+    """Raised when stored content cannot be read or written"""
+
+
+class LocalFileStorage:
+    def __init__(self, root):
+        self.root = Path(root)
+
+    # ---- paths (relative to root) ----
+
+    def upload_path(self, session_id):
+        return f'uploads/{session_id}'
+
+    def blob_path(self, sha256):
+        return f'blobs/{sha256[:2]}/{sha256[2:4]}/{sha256}'
+
+    def thumbnail_path(self, sha256):
+        return f'thumbs/{sha256[:2]}/{sha256[2:4]}/{sha256}.jpg'
+
+    def full_path(self, relative):
+        return self.root / relative
+
+    # ---- uploads ----
+
+    def start_upload(self, session_id):
+        path = self.full_path(self.upload_path(session_id))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.touch()
+
+    def write_chunk(self, session_id, offset, stream, length):
+        """
+        Copy `length` bytes from `stream` into the upload at `offset`.
+
+        The stream is consumed in CHUNK_SIZE pieces so a chunk is never held
+        in memory whole. Returns the number of bytes written.
+        """
+        path = self.full_path(self.upload_path(session_id))
+        written = 0
+        with open(path, 'r+b') as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            handle.seek(offset)
+            while written < length:
+                data = stream.read(min(CHUNK_SIZE, length - written))
+                if not data:
+                    break
+                handle.write(data)
+                written += len(data)
+        return written
+
+    def hash_upload(self, session_id):
+        digest = hashlib.sha256()
+        with open(self.full_path(self.upload_path(session_id)), 'rb') as handle:
+            for data in iter(lambda: handle.read(CHUNK_SIZE), b''):
+                digest.update(data)
+        return digest.hexdigest()
+
+    def commit_upload(self, session_id, sha256):
+        """Move a finished upload into content-addressed storage"""
+        target = self.full_path(self.blob_path(sha256))
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(self.full_path(self.upload_path(session_id)), target)
+        return self.blob_path(sha256)
+
+    def discard_upload(self, session_id):
+        self.full_path(self.upload_path(session_id)).unlink(missing_ok=True)
+
+    # ---- reading ----
+
+    def size(self, relative):
+        try:
+            return self.full_path(relative).stat().st_size
+        except FileNotFoundError as exc:
+            raise StorageError(f'Missing file: {relative}') from exc
+
+    @contextmanager
+    def open(self, relative):
+        try:
+            handle = open(self.full_path(relative), 'rb')
+        except FileNotFoundError as exc:
+            raise StorageError(f'Missing file: {relative}') from exc
+        with handle:
+            yield handle
+
+    def iter_range(self, relative, start, end):
+        """Yield bytes start..end (inclusive) of a stored file"""
+        with self.open(relative) as handle:
+            handle.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                data = handle.read(min(CHUNK_SIZE, remaining))
+                if not data:
+                    break
+                remaining -= len(data)
+                yield data
+
+    def delete(self, relative):
+        self.full_path(relative).unlink(missing_ok=True)
+
+
+@lru_cache(maxsize=None)
+def get_storage():
+    return import_string(settings.ATTACHMENT_STORAGE)(settings.ATTACHMENT_ROOT)
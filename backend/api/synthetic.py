@@ -0,0 +1,307 @@
+"""
+Synthetic application data for sizing and load testing.
+
+`SyntheticData.application_payload()` returns a dict shaped like the
+ApplicationDetailSerializer input, used both by the load-test command (sent
+over HTTP) and by `bulk_create_applications`, which turns payloads into
+model rows with a few bulk INSERTs per batch instead of one per row.
+"""
+import random
+import string
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .dedup import dedup_keys_for
+from .models import (
+    Application, ApplicationDedupKey, BankAccount, BusinessDetails, BusinessOwner,
+    CoApplicant, Conclusion, Loan, OtherBusiness, PersonMet, SecurityDetails,
+)
+from .scoring import score_applications
+
+FIRST_NAMES = [
+    'Aarav', 'Vivaan', 'Aditya', 'Arjun', 'Sai', 'Rohan', 'Ramesh', 'Suresh', 'Mahesh', 'Rajesh',
+    'Anil', 'Sunil', 'Vijay', 'Ajay', 'Sanjay', 'Priya', 'Anita', 'Sunita', 'Kavita', 'Pooja',
+    'Neha', 'Meena', 'Rekha', 'Asha', 'Deepak', 'Manoj', 'Amit', 'Sumit', 'Rahul', 'Kiran',
+]
+LAST_NAMES = [
+    'Kumar', 'Sharma', 'Verma', 'Gupta', 'Singh', 'Agarwal', 'Jain', 'Patel', 'Shah', 'Mehta',
+    'Yadav', 'Mishra', 'Tiwari', 'Pandey', 'Chauhan', 'Reddy', 'Nair', 'Iyer', 'Das', 'Bose',
+]
+BUSINESS_WORDS = [
+    'Traders', 'Enterprises', 'Stores', 'Agencies', 'Textiles', 'Electronics', 'Hardware',
+    'General Store', 'Medicals', 'Motors', 'Foods', 'Garments', 'Jewellers', 'Furniture',
+]
+CITIES = [
+    # (name, lat, lon, GST state code)
+    ('Delhi', 28.6139, 77.2090, '07'),
+    ('Mumbai', 19.0760, 72.8777, '27'),
+    ('Jaipur', 26.9124, 75.7873, '08'),
+    ('Lucknow', 26.8467, 80.9462, '09'),
+    ('Ahmedabad', 23.0225, 72.5714, '24'),
+    ('Bengaluru', 12.9716, 77.5946, '29'),
+]
+BANKS = ['SBI', 'HDFC', 'ICICI', 'Axis', 'PNB', 'Bank of Baroda', 'Kotak', 'Canara']
+PAYMENT_MODES = ['Cash', 'UPI', 'RTGS', 'NEFT', 'Cheque', 'Card']
+FAMILY_MEMBERS = ['Spouse', 'Children', 'Parents', 'Siblings']
+
+
+class SyntheticData:
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+
+    # ---- primitive values ----
+
+    def name(self):
+        return f'{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}'
+
+    def phone(self):
+        return self.rng.choice('6789') + ''.join(self.rng.choices(string.digits, k=9))
+
+    def gst(self, state_code):
+        pan = (
+            ''.join(self.rng.choices(string.ascii_uppercase, k=5))
+            + ''.join(self.rng.choices(string.digits, k=4))
+            + self.rng.choice(string.ascii_uppercase)
+        )
+        return f'{state_code}{pan}1Z{self.rng.choice(string.digits)}'
+
+    def amount_text(self, low, high):
+        """Amounts in the formats agents actually type: lakhs, crores, commas"""
+        value = self.rng.uniform(low, high)
+        style = self.rng.random()
+        if style < 0.45:
+            return f'{value / 1e5:.0f} Lakhs'
+        if style < 0.55 and value >= 1e7:
+            return f'{value / 1e7:.1f} Cr'
+        if style < 0.85:
+            return indian_grouping(int(round(value, -3)))
+        return str(int(round(value, -3)))
+
+    def date_text(self, days_back):
+        day = date.today() - timedelta(days=self.rng.randint(0, days_back))
+        return day.strftime('%d/%m/%Y')
+
+    def yes_no(self, p_yes=0.8):
+        return 'YES' if self.rng.random() < p_yes else 'NO'
+
+    def count(self, weights):
+        """Draw a child-row count from a {count: weight} distribution"""
+        return self.rng.choices(list(weights), weights=list(weights.values()))[0]
+
+    # ---- payloads ----
+
+    def application_payload(self, file_no=None):
+        rng = self.rng
+        city, lat, lon, state_code = rng.choice(CITIES)
+        age = rng.randint(23, 65)
+        applicant = self.name()
+        address = f'{rng.randint(1, 999)}, Sector {rng.randint(1, 60)}, {city}'
+        shop_ownership = rng.choice(['Owned', 'Rented'])
+        business_name = f'{applicant.split()[1]} {rng.choice(BUSINESS_WORDS)}'
+
+        payload = {
+            'applicant_name': applicant,
+            'gender': rng.choice(['Male', 'Female']),
+            'allocation_date': self.date_text(400),
+            'visit_date': self.date_text(400),
+            'dob': (date.today() - timedelta(days=age * 365 + rng.randint(0, 364))).strftime('%d/%m/%Y'),
+            'age': age,
+            'qualification': rng.choice(['Graduate', 'Post-Graduate', 'Other']),
+            'prof_qualification': rng.choice(['CA', 'Engineer', 'LLB', 'Architect', 'MBBS', 'Other']),
+            'telephone': self.phone(),
+            'tel_owner': rng.choice(['Applicant', 'Applicant', 'Applicant', 'Co Applicant']),
+            'residential_address': address,
+            'family_members': sorted(rng.sample(FAMILY_MEMBERS, rng.randint(0, 3))),
+            'business_details': {
+                'business_name': business_name,
+                'ownership_type': rng.choice(['Proprietor', 'Proprietor', 'Partner', 'Director']),
+                'business_address': f'Shop {rng.randint(1, 200)}, Main Market, {city}',
+                'visit_address': f'Shop {rng.randint(1, 200)}, Main Market, {city}',
+                'gst_number': self.gst(state_code),
+                'business_location': rng.choice(['Commercial', 'Commercial', 'Residential']),
+                'gps_location': f'{lat + rng.gauss(0, 0.05):.6f}, {lon + rng.gauss(0, 0.05):.6f}',
+                'shop_ownership': shop_ownership,
+                'rent_amount': str(rng.randrange(5000, 80000, 500)) if shop_ownership == 'Rented' else None,
+                'business_relates_to': rng.choice(BUSINESS_WORDS),
+                'business_since_year': rng.randint(1990, date.today().year),
+                'turnover': self.amount_text(10e5, 5e7),
+                'net_income': self.amount_text(2e5, 5e6),
+                'stock_value': self.amount_text(1e5, 1e7),
+                'txn_type': rng.choice(['CASH', 'ONLINE']),
+                'staff_count': rng.randint(0, 25),
+                'monthly_salary': str(rng.randrange(8000, 30000, 500)),
+                'creditors_payment_time': rng.choice(['30 days', '45 days', '60 days']),
+                'debtors_payment_time': rng.choice(['15 days', '30 days', '45 days']),
+                'payment_modes': sorted(rng.sample(PAYMENT_MODES, rng.randint(1, 4))),
+                'purchase_area': city,
+                'sale_area': city,
+                'owners': [{'name': self.name()} for _ in range(self.count({1: 70, 2: 25, 3: 5}))],
+                'persons_met': [
+                    {'name': self.name(), 'phone': self.phone()}
+                    for _ in range(self.count({1: 60, 2: 30, 3: 10}))
+                ],
+            },
+            'other_businesses': [
+                {
+                    'business_name': f'{self.name().split()[1]} {rng.choice(BUSINESS_WORDS)}',
+                    'owner_name': self.name(),
+                    'address': f'{rng.randint(1, 300)}, {city}',
+                    'relationship': rng.choice(['Self', 'Other']),
+                    'yearly_income': self.amount_text(1e5, 2e6),
+                    'vintage_year': rng.randint(1995, date.today().year),
+                    'remarks': 'Verified by neighbour',
+                }
+                for _ in range(self.count({0: 65, 1: 25, 2: 8, 3: 2}))
+            ],
+            'loans': [
+                {
+                    'loan_type': rng.choice(['Car loan', 'Home loan', 'Personal loan', 'Business loan', 'LAP']),
+                    'bank_name': rng.choice(BANKS),
+                    'loan_amount': self.amount_text(1e5, 5e6),
+                    'emi': str(rng.randrange(2000, 90000, 100)),
+                }
+                for _ in range(self.count({0: 35, 1: 35, 2: 20, 3: 7, 4: 3}))
+            ],
+            'bank_accounts': [
+                {
+                    'bank_name': rng.choice(BANKS),
+                    'branch': city,
+                    'account_type': rng.choice(['Saving Account', 'Current Account']),
+                    'cc_limit': self.amount_text(0, 2e6) if rng.random() < 0.4 else '0',
+                }
+                for _ in range(self.count({1: 55, 2: 35, 3: 10}))
+            ],
+            'security_details': {
+                'house_address': address,
+                'house_area': str(rng.randrange(400, 4000, 50)),
+                'house_market_value': str(rng.randrange(2_000_000, 30_000_000, 100_000)),
+                'house_ownership': rng.choice(['Self', 'Self', 'Spouse', 'Father', 'Mother']),
+                'amount_required': str(rng.randrange(500_000, 15_000_000, 100_000)),
+                'end_use': rng.choice(['Home Loan', 'Construction Loan', 'Business Expansion']),
+            },
+        }
+        if file_no:
+            payload['file_no'] = file_no
+        if rng.random() < 0.3:
+            payload['co_applicant'] = {
+                'involvement_type': 'Employment',
+                'employer_name': rng.choice(BANKS) + ' Ltd',
+                'position': 'Manager',
+                'yearly_salary': str(rng.randrange(200_000, 2_000_000, 10_000)),
+                'duration': f'{rng.randint(1, 15)} years',
+            }
+        if rng.random() < 0.8:
+            payload['conclusion'] = self.conclusion_payload(shop_ownership)
+        return payload
+
+    def conclusion_payload(self, shop_ownership='Owned'):
+        rng = self.rng
+        return {
+            'general_observation': 'Business running at the given address.',
+            'nearby_person1': self.name(),
+            'nearby_person2': self.name(),
+            'sale_invoices': rng.choice(['Received', 'Not Received']),
+            'purchase_invoices': rng.choice(['Received', 'Not Received']),
+            'business_setup': rng.choices(
+                ['Exists & Satisfactory', 'Exists & Unsatisfactory', 'Not Exists'], weights=[80, 15, 5]
+            )[0],
+            'stock_pictures': rng.choice(['Available & Attached', 'Available but not attached', 'Not Available']),
+            'signboard': self.yes_no(),
+            'biz_registration': self.yes_no(),
+            'education_proof': self.yes_no(0.6),
+            'true_caller_name': self.name(),
+            'qr_availability': rng.choice(['Yes - Belongs to Applicant', 'Yes - Belongs to other', 'No']),
+            'signboard_contact': rng.choice(['Yes - Belongs to Applicant', 'Yes - Belongs to other', 'No']),
+            'electricity_bill': self.yes_no(0.9),
+            'rent_agreement': 'NA' if shop_ownership == 'Owned' else self.yes_no(0.7),
+            'commercial_vehicle': self.yes_no(0.2),
+            'overall_status': rng.choices(
+                ['Positive', 'Negative', 'Refer to credit'], weights=[70, 10, 20]
+            )[0],
+        }
+
+
+def indian_grouping(value):
+    """12345678 -> '1,23,45,678'"""
+    text = str(value)
+    if len(text) <= 3:
+        return text
+    head, tail = text[:-3], text[-3:]
+    groups = []
+    while len(head) > 2:
+        groups.insert(0, head[-2:])
+        head = head[:-2]
+    if head:
+        groups.insert(0, head)
+    return ','.join(groups + [tail])
+
+
+def bulk_create_applications(payloads, agents, rng, submitted_ratio=0.7):
+    """
+    Insert a batch of application payloads with one bulk INSERT per table.
+
+    `agents` is a list of users the applications are spread across.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        applications = []
+        for payload in payloads:
+            fields = {
+                key: value for key, value in payload.items()
+                if key not in (
+                    'business_details', 'co_applicant', 'other_businesses', 'loans',
+                    'bank_accounts', 'security_details', 'conclusion',
+                )
+            }
+            application = Application(agent=rng.choice(agents), **fields)
+            if 'conclusion' in payload and rng.random() < submitted_ratio:
+                application.submitted_at = now - timedelta(days=rng.randint(0, 400))
+            applications.append(application)
+        Application.objects.bulk_create(applications)
+
+        businesses, co_applicants, securities, conclusions = [], [], [], []
+        other_businesses, loans, bank_accounts = [], [], []
+        for application, payload in zip(applications, payloads):
+            business_data = dict(payload['business_details'])
+            business_data.pop('owners')
+            business_data.pop('persons_met')
+            business = BusinessDetails(application=application, **business_data)
+            business.set_coordinates()
+            businesses.append(business)
+            if 'co_applicant' in payload:
+                co_applicants.append(CoApplicant(application=application, **payload['co_applicant']))
+            securities.append(SecurityDetails(application=application, **payload['security_details']))
+            if 'conclusion' in payload:
+                conclusions.append(Conclusion(application=application, **payload['conclusion']))
+            other_businesses += [OtherBusiness(application=application, **row) for row in payload['other_businesses']]
+            loans += [Loan(application=application, **row) for row in payload['loans']]
+            bank_accounts += [BankAccount(application=application, **row) for row in payload['bank_accounts']]
+
+        # bulk_create skips save(), so derived amount columns are filled here
+        for row in (*businesses, *co_applicants, *other_businesses, *loans, *bank_accounts):
+            row.set_amounts()
+
+        BusinessDetails.objects.bulk_create(businesses)
+        CoApplicant.objects.bulk_create(co_applicants)
+        SecurityDetails.objects.bulk_create(securities)
+        Conclusion.objects.bulk_create(conclusions)
+        OtherBusiness.objects.bulk_create(other_businesses)
+        Loan.objects.bulk_create(loans)
+        BankAccount.objects.bulk_create(bank_accounts)
+
+        owners, persons_met, dedup_keys = [], [], []
+        for application, business, payload in zip(applications, businesses, payloads):
+            owners += [BusinessOwner(business=business, **row) for row in payload['business_details']['owners']]
+            persons_met += [PersonMet(business=business, **row) for row in payload['business_details']['persons_met']]
+            application.business_details = business
+            dedup_keys += [
+                ApplicationDedupKey(application=application, kind=kind, value=value)
+                for kind, value in dedup_keys_for(application)
+            ]
+        BusinessOwner.objects.bulk_create(owners)
+        PersonMet.objects.bulk_create(persons_met)
+        ApplicationDedupKey.objects.bulk_create(dedup_keys)
+        score_applications([application.pk for application in applications])
+    return applications
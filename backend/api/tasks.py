@@ -0,0 +1,87 @@
+"""
+Background job handlers.
+
+Imported by the worker (`manage.py run_jobs`) and by the views that
+enqueue these jobs, so the registry is populated in both places.
+"""
+import logging
+
+from django.conf import settings
+from django.core.mail import send_mail
+from django.db.models import Count, Q
+
+from .archive import archived_counts
+from .attachments import make_thumbnail
+from .jobs import job
+from .models import AgentStats, Application, Blob, SnapshotExport
+from .reports import FORMAT_PDF, get_report, report_queryset
+from .snapshots import run_export
+
+logger = logging.getLogger(__name__)
+
+
+@job('stats.refresh_agent', concurrency=4)
+def refresh_agent_stats(agent_id):
+    """Recompute one agent's AgentStats rollup with a single aggregate query"""
+    counts = Application.objects.filter(agent_id=agent_id).aggregate(
+        total=Count('id'),
+        submitted=Count('id', filter=Q(submitted_at__isnull=False)),
+        positive=Count('id', filter=Q(conclusion__overall_status='Positive')),
+        negative=Count('id', filter=Q(conclusion__overall_status='Negative')),
+        refer_to_credit=Count('id', filter=Q(conclusion__overall_status='Refer to credit')),
+    )
+    for key, value in archived_counts(agent_id).items():
+        counts[key] += value
+    counts['pending'] = (
+        counts['total'] - counts['positive'] - counts['negative'] - counts['refer_to_credit']
+    )
+    AgentStats.objects.update_or_create(agent_id=agent_id, defaults=counts)
+
+
+@job('notifications.submission', max_attempts=5)
+def notify_submission(application_id):
+    """Email the configured recipients that an application was submitted"""
+    recipients = settings.SUBMISSION_NOTIFY_EMAILS
+    if not recipients:
+        return
+    application = Application.objects.select_related('agent', 'conclusion').filter(
+        pk=application_id
+    ).first()
+    if application is None:
+        logger.info('Application %s no longer exists; skipping notification', application_id)
+        return
+    conclusion = getattr(application, 'conclusion', None)
+    send_mail(
+        subject=f'Application {application.file_no} submitted',
+        message=(
+            f'{application.applicant_name} ({application.file_no}) was submitted by '
+            f'{application.agent.username} with status '
+            f'{conclusion.overall_status if conclusion else "N/A"}.'
+        ),
+        from_email=None,
+        recipient_list=recipients,
+    )
+
+
+@job('reports.render', concurrency=2)
+def render_report(application_id, fmt=FORMAT_PDF):
+    """Pre-render (and cache) the verification report of an application"""
+    application = report_queryset().filter(pk=application_id).first()
+    if application is not None:
+        get_report(application, fmt)
+
+
+@job('attachments.thumbnail', concurrency=2)
+def generate_thumbnail(blob_id):
+    """Create the thumbnail of an uploaded image"""
+    blob = Blob.objects.filter(pk=blob_id).first()
+    if blob is not None and not blob.thumbnail:
+        make_thumbnail(blob)
+
+
+@job('snapshots.export', concurrency=1, max_attempts=1, atomic=False)
+def export_snapshot(export_id):
+    """Write a queued analytics snapshot (see api/snapshots.py)"""
+    export = SnapshotExport.objects.filter(pk=export_id, status=SnapshotExport.STATUS_QUEUED).first()
+    if export is not None:
+        run_export(export)
@@ -0,0 +1,113 @@
+"""
+Supervisor views over a team of agents.
+
+A supervisor's team is every agent whose AgentProfile points at them; staff
+users supervise every agent. Per-agent counts come from the AgentStats
+rollup (kept current by the `stats.refresh_agent` job). Overdue visits come
+from one grouped query over the hot table. Neither loops over agents, so a
+team of hundreds costs the same handful of queries as a team of five.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from .facets import filter_by_list_fields
+from .models import AgentProfile, AgentStats, Application
+
+ROLLUP_FIELDS = ('total', 'submitted', 'positive', 'negative', 'refer_to_credit', 'pending')
+
+
+def is_supervisor(user):
+    if not user.is_authenticated:
+        return False
+    if user.is_staff:
+        return True
+    return AgentProfile.objects.filter(user=user, role=AgentProfile.ROLE_SUPERVISOR).exists()
+
+
+def team_members(user):
+    """Users whose applications `user` may see as a supervisor"""
+    if user.is_staff:
+        return User.objects.filter(is_active=True, is_staff=False)
+    return User.objects.filter(agent_profile__supervisor=user)
+
+
+def team_applications(user):
+    return Application.objects.filter(agent__in=team_members(user).values('pk'))
+
+
+def overdue_cutoff():
+    return timezone.now() - timedelta(days=settings.VISIT_SLA_DAYS)
+
+
+def overdue_q():
+    """Pending visits (no conclusion yet) older than VISIT_SLA_DAYS"""
+    return Q(conclusion__isnull=True, created_at__lt=overdue_cutoff())
+
+
+def filter_team_applications(queryset, params):
+    """
+    Narrow team applications by a QueryDict of filters: agent=<user id>,
+    branch=<code>, status=<overall status>|pending, overdue=1, plus the
+    list-field filters.
+    """
+    if str(params.get('agent', '')).isdigit():
+        queryset = queryset.filter(agent_id=params['agent'])
+    if params.get('branch'):
+        queryset = queryset.filter(agent__agent_profile__branch_code=params['branch'])
+    status_filter = params.get('status')
+    if status_filter == 'pending':
+        queryset = queryset.filter(conclusion__isnull=True)
+    elif status_filter:
+        queryset = queryset.filter(conclusion__overall_status=status_filter)
+    if params.get('overdue') == '1':
+        queryset = queryset.filter(overdue_q())
+    return filter_by_list_fields(queryset, params)
+
+
+def agent_rows(user, ordering='username'):
+    """One row per team member: rollup counts plus overdue visits"""
+    rows = list(
+        team_members(user)
+        .annotate(
+            branch_code=F('agent_profile__branch_code'),
+            **{field: F(f'stats__{field}') for field in ROLLUP_FIELDS},
+            stats_updated_at=F('stats__updated_at'),
+        )
+        .values(
+            'id', 'username', 'first_name', 'last_name', 'branch_code',
+            *ROLLUP_FIELDS, 'stats_updated_at',
+        )
+    )
+    overdue = dict(
+        team_applications(user).filter(overdue_q())
+        .order_by().values('agent').annotate(count=Count('id'))
+        .values_list('agent', 'count')
+    )
+    for row in rows:
+        for field in ROLLUP_FIELDS:
+            row[field] = row[field] or 0
+        row['overdue'] = overdue.get(row['id'], 0)
+
+    descending = ordering.startswith('-')
+    key = ordering.lstrip('-')
+    if key not in ('username', 'overdue', *ROLLUP_FIELDS):
+        key = 'username'
+    rows.sort(key=lambda row: row[key], reverse=descending)
+    return rows
+
+
+def team_totals(user):
+    """Team-wide totals from the rollup, plus overdue visits and agent count"""
+    members = team_members(user).values('pk')
+    totals = AgentStats.objects.filter(agent__in=members).aggregate(
+        **{field: Sum(field) for field in ROLLUP_FIELDS}
+    )
+    totals = {field: value or 0 for field, value in totals.items()}
+    totals['agents'] = team_members(user).count()
+    totals['overdue'] = team_applications(user).filter(overdue_q()).count()
+    totals['visit_sla_days'] = settings.VISIT_SLA_DAYS
+    return totals
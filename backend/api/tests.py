@@ -0,0 +1,43 @@
+from decimal import Decimal
+
+from django.test import SimpleTestCase
+
+from .amounts import parse_amount
+
+
+class ParseAmountTests(SimpleTestCase):
+    def assertAmount(self, text, expected):
+        self.assertEqual(parse_amount(text), None if expected is None else Decimal(expected), text)
+
+    def test_plain_numbers(self):
+        self.assertAmount('5,00,000', '500000')
+        self.assertAmount('Rs. 25000/-', '25000')
+        self.assertAmount('₹ 1234.5', '1234.50')
+
+    def test_units(self):
+        self.assertAmount('50 Lakhs', '5000000')
+        self.assertAmount('Rs. 2.5 Cr', '25000000')
+        self.assertAmount('75k', '75000')
+        self.assertAmount('3 million', '3000000')
+
+    def test_compound_amounts_are_added(self):
+        self.assertAmount('12 lakh 50 thousand', '1250000')
+        self.assertAmount('1 crore 20 lakh', '12000000')
+        self.assertAmount('2 lakh 500', '200500')
+
+    def test_ranges_use_the_midpoint(self):
+        self.assertAmount('10-12 lacs', '1100000')
+        self.assertAmount('10 to 12 lakhs', '1100000')
+        self.assertAmount('10 lakh - 1 crore', '5500000')
+        self.assertAmount('40000 – 60000', '50000')
+
+    def test_unreadable(self):
+        self.assertAmount(None, None)
+        self.assertAmount('', None)
+        self.assertAmount('not known', None)
+        self.assertAmount('10 dollars', None)
+        self.assertAmount('10 12 lakh', None)
+        self.assertAmount('20 lakh 1 crore', None)
+        self.assertAmount('5 lakh 5 lakh', None)
+        self.assertAmount('1 2 3', None)
+        self.assertAmount('99999999 crore', None)
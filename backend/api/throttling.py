@@ -0,0 +1,136 @@
+"""
+Token-bucket request throttling.
+
+Each request takes one token from a bucket keyed by scope and client. The
+client is the user id when authenticated and the client IP otherwise. A
+bucket holds up to N tokens and refills at N per period, with rates set in
+THROTTLE_RATES ('N/period'). The scope is the view's `throttle_scope`
+('login', 'upload') if it has one, and otherwise 'read' or 'write' by HTTP
+method. A request touches exactly one bucket.
+
+Buckets live in the THROTTLE_CACHE cache. With Django's Redis backend the
+whole read-refill-take-write step is a single Lua script, so it is one
+atomic round trip shared by every worker. Any other backend (local memory by
+default) does a get and a set under a process lock. That is atomic within
+one worker, and each worker keeps its own buckets.
+
+Rejected requests get 429 with Retry-After (DRF adds the header from `wait`).
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+# KEYS[1] bucket; ARGV: now, capacity, refill per second, ttl (ms)
+# Returns {allowed, seconds until a token is available}
+TAKE_SCRIPT = '''
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'at')
+local now = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local refill = tonumber(ARGV[3])
+local tokens = tonumber(bucket[1]) or capacity
+local at = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - at) * refill)
+if tokens < 1 then
+    return {0, tostring((1 - tokens) / refill)}
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens - 1), 'at', ARGV[1])
+redis.call('PEXPIRE', KEYS[1], ARGV[4])
+return {1, '0'}
+'''
+
+
+def parse_rate(rate):
+    """'60/min' -> (60, 60.0); None disables the scope"""
+    if rate is None:
+        return None
+    count, period = rate.split('/')
+    return int(count), float(PERIODS[period[0]])
+
+
+class LocalBucketStore:
+    """Buckets in any Django cache; get and set under a process-wide lock"""
+    lock = threading.Lock()
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def take(self, key, capacity, refill, ttl):
+        now = time.time()
+        with self.lock:
+            tokens, at = self.cache.get(key) or (capacity, now)
+            tokens = min(capacity, tokens + max(0.0, now - at) * refill)
+            if tokens < 1:
+                return False, (1 - tokens) / refill
+            self.cache.set(key, (tokens - 1, now), ttl)
+        return True, 0.0
+
+
+class RedisBucketStore:
+    """Buckets as Redis hashes, updated atomically by one Lua script"""
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.script = None
+
+    def take(self, key, capacity, refill, ttl):
+        key = self.cache.make_and_validate_key(key)
+        client = self.cache._cache.get_client(key, write=True)
+        if self.script is None:
+            self.script = client.register_script(TAKE_SCRIPT)
+        allowed, wait = self.script(
+            keys=[key], args=[repr(time.time()), capacity, refill, int(ttl * 1000)], client=client,
+        )
+        return bool(allowed), float(wait)
+
+
+_stores = {}
+
+
+def get_store():
+    alias = settings.THROTTLE_CACHE
+    if alias not in _stores:
+        cache = caches[alias]
+        redis_backed = type(cache).__module__ == 'django.core.cache.backends.redis'
+        _stores[alias] = RedisBucketStore(cache) if redis_backed else LocalBucketStore(cache)
+    return _stores[alias]
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Default throttle for the API; see the module docstring"""
+
+    def get_scope(self, request, view):
+        scope = getattr(view, 'throttle_scope', None)
+        if scope:
+            return scope
+        return 'read' if request.method in SAFE_METHODS else 'write'
+
+    def get_client(self, request):
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            return f'user:{user.pk}'
+        return f'ip:{self.get_ident(request)}'
+
+    def allow_request(self, request, view):
+        self.wait_seconds = None
+        scope = self.get_scope(request, view)
+        rate = parse_rate(settings.THROTTLE_RATES.get(scope))
+        if rate is None:
+            return True
+        capacity, period = rate
+        refill = capacity / period
+        key = f'throttle:{scope}:{self.get_client(request)}'
+        # An idle bucket is full again after one period, so it can expire then
+        allowed, wait = get_store().take(key, capacity, refill, period)
+        if not allowed:
+            self.wait_seconds = wait
+        return allowed
+
+    def wait(self):
+        return self.wait_seconds
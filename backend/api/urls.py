@@ -5,17 +5,43 @@ from . import views
 router = DefaultRouter()
 router.register(r'items', views.ItemViewSet)
 router.register(r'applications', views.ApplicationViewSet, basename='application')
+router.register(r'file-numbers', views.FileNoBlockViewSet, basename='file-number-block')
+router.register(r'uploads', views.UploadSessionViewSet, basename='upload')
+router.register(r'attachments', views.AttachmentViewSet, basename='attachment')
+router.register(r'drafts', views.DraftViewSet, basename='draft')
+router.register(r'team/applications', views.TeamApplicationViewSet, basename='team-application')
 
 urlpatterns = [
     path('health/', views.health_check, name='health_check'),
+    path('ready/', views.readiness_check, name='readiness_check'),
     
     # Authentication endpoints
     path('auth/login/', views.LoginView.as_view(), name='login'),
     path('auth/logout/', views.LogoutView.as_view(), name='logout'),
     path('auth/user/', views.CurrentUserView.as_view(), name='current_user'),
     
+    # Several queued application operations in one request
+    path('batch/', views.batch, name='batch'),
+    
     # Application statistics
     path('applications/stats/', views.application_stats, name='application_stats'),
+    path('analytics/portfolio/', views.portfolio_analytics, name='portfolio_analytics'),
+    
+    # Live updates (server-sent events; needs the ASGI server)
+    path('events/', views.application_events, name='application_events'),
+    
+    # Request profiles (staff)
+    path('admin/profiles/', views.profile_list, name='profile_list'),
+    path('admin/profiles/<str:profile_id>/', views.profile_detail, name='profile_detail'),
+    
+    # Analytics snapshots (staff)
+    path('admin/snapshots/', views.snapshot_list, name='snapshot_list'),
+    path('admin/snapshots/<int:export_id>/', views.snapshot_detail, name='snapshot_detail'),
+    
+    # Supervisor dashboard
+    path('team/agents/', views.team_agents, name='team_agents'),
+    path('team/summary/', views.team_summary, name='team_summary'),
+    path('team/bulk/', views.team_bulk_action, name='team_bulk_action'),
     
     # Router URLs
     path('', include(router.urls)),
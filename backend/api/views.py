@@ -1,23 +1,91 @@
-from rest_framework import viewsets, status, permissions
-from rest_framework.decorators import api_view, permission_classes, action
+import asyncio
+import math
+
+from asgiref.sync import sync_to_async
+from rest_framework import viewsets, mixins, status, permissions
+from rest_framework.decorators import api_view, permission_classes, throttle_classes, action
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.authtoken.models import Token
+from django.conf import settings
 from django.contrib.auth import authenticate
 from django.contrib.auth.models import User
-from .models import Item, Application
+from django.http import FileResponse, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils.http import content_disposition_header
+from django.db import transaction
+from django.db.models import ExpressionWrapper, F, FloatField, Q
+from django.db.models.fields.json import KT
+from django.http import Http404
+from django.utils import timezone
+from .models import (
+    Item, Application, ArchivedApplication, ChangeLog, FileNoBlock, Attachment, UploadSession, Draft,
+    SnapshotExport
+)
 from .serializers import (
-    ItemSerializer, ApplicationListSerializer, ApplicationDetailSerializer, UserSerializer
+    ItemSerializer, ApplicationListSerializer, ApplicationDetailSerializer, UserSerializer,
+    FileNoBlockSerializer, FileNoAllocationSerializer, FileNoReleaseSerializer,
+    AttachmentSerializer, UploadSessionSerializer, DraftListSerializer, DraftSerializer,
+    BulkActionSerializer, BatchSerializer, SnapshotExportSerializer, SnapshotRequestSerializer
+)
+from .allocation import AllocationError, allocate_block, release_block
+from .geo import EARTH_RADIUS_KM, bounding_box, geohash_cover, haversine_km
+from .dedup import find_duplicates
+from .jobs import enqueue
+from .reports import FORMATS, FORMAT_PDF, ReportError, open_report
+from .attachments import (
+    INLINE_CONTENT_TYPES, RangeNotSatisfiable, UploadError, append_chunk, delete_attachment, parse_range,
+    start_upload
+)
+from .storage import StorageError, get_storage
+from .archive import archived_counts, archived_detail
+from .analytics import cached_portfolio, parse_filters
+from .facets import facet_counts, filter_by_list_fields
+from .permissions import IsSupervisor
+from .team import (
+    agent_rows, filter_team_applications, is_supervisor, team_applications, team_members, team_totals
 )
+from .audit import record
+from .batch import run_batch
+from .bulk import BulkError, run as run_bulk_action
+from .drafts import DraftError, save_draft
+from .snapshots import create_export, snapshot_file
+from .startup import TIMINGS, is_warm, probe, warm
+from .profiling import get_profile, list_profiles, pstats_path
+from .events import (
+    EVENT_CREATED, EVENT_DELETED, EVENT_SUBMITTED, EVENT_UPDATED, format_event, hub, publish
+)
+from . import tasks  # noqa: F401  (registers job handlers)
 
 
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])
+@throttle_classes([])
 def health_check(request):
     """Health check endpoint."""
     return Response({'status': 'healthy', 'message': 'Django API is running!'})
 
 
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+@throttle_classes([])
+def readiness_check(request):
+    """Ready once this worker is warm and the (cached) database probe succeeds"""
+    if not is_warm():
+        try:
+            warm()
+        except Exception as exc:
+            return Response(
+                {'status': 'starting', 'error': str(exc)},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+    database = probe()
+    return Response(
+        {'status': 'ready' if database['ok'] else 'unavailable', 'database': database, 'boot': TIMINGS},
+        status=status.HTTP_200_OK if database['ok'] else status.HTTP_503_SERVICE_UNAVAILABLE
+    )
+
+
 class ItemViewSet(viewsets.ModelViewSet):
     """ViewSet for Item CRUD operations."""
     queryset = Item.objects.all()
@@ -29,6 +97,7 @@ class ItemViewSet(viewsets.ModelViewSet):
 class LoginView(APIView):
     """Login endpoint for agents"""
     permission_classes = [permissions.AllowAny]
+    throttle_scope = 'login'
     
     def post(self, request):
         username = request.data.get('username')
@@ -44,11 +113,14 @@ class LoginView(APIView):
         
         if user:
             token, created = Token.objects.get_or_create(user=user)
-            return Response({
+            response = Response({
                 'token': token.key,
                 'user': UserSerializer(user).data,
                 'message': 'Login successful'
             })
+            # Never compressed (BREACH), see api.middleware
+            response.contains_secret = True
+            return response
         else:
             return Response(
                 {'error': 'Invalid credentials'},
@@ -78,6 +150,9 @@ class CurrentUserView(APIView):
 
 # ============ Application Views ============
 
+MAX_NEARBY_RADIUS_KM = 50.0
+
+
 class ApplicationViewSet(viewsets.ModelViewSet):
     """
     ViewSet for Application CRUD operations.
@@ -85,10 +160,18 @@ class ApplicationViewSet(viewsets.ModelViewSet):
     Endpoints:
     - GET /api/applications/ - List all applications for the current user
     - POST /api/applications/ - Create a new application
-    - GET /api/applications/{id}/ - Get application details
+    - GET /api/applications/{id}/ - Get application details (archived ones included)
     - PUT /api/applications/{id}/ - Update application
     - DELETE /api/applications/{id}/ - Delete application
     - POST /api/applications/{id}/submit/ - Submit/finalize application
+    - GET /api/applications/nearby/ - Visits near a point or inside a bounding box
+    - GET /api/applications/{id}/duplicates/ - Candidate duplicate applicants
+    - GET /api/applications/{id}/report/?type=pdf|html - Verification report
+    - GET /api/applications/facets/ - Counts per payment mode and family composition
+    - GET /api/applications/{id}/history/ - Field-level change history
+    
+    List and facets accept ?payment_mode= and ?family_member= (repeatable,
+    all must match).
     """
     permission_classes = [permissions.IsAuthenticated]
     
@@ -101,17 +184,36 @@ class ApplicationViewSet(viewsets.ModelViewSet):
             'business_details__owners', 'business_details__persons_met'
         )
     
+    def filter_queryset(self, queryset):
+        return filter_by_list_fields(super().filter_queryset(queryset), self.request.query_params)
+    
     def get_serializer_class(self):
         """Use different serializers for list vs detail views"""
         if self.action == 'list':
             return ApplicationListSerializer
         return ApplicationDetailSerializer
     
+    def retrieve(self, request, *args, **kwargs):
+        """Get application details, falling back to the archive"""
+        try:
+            return super().retrieve(request, *args, **kwargs)
+        except Http404:
+            if not str(kwargs['pk']).isdigit():
+                raise
+            archived = archived_detail(int(kwargs['pk']), request.user)
+            if archived is None:
+                raise
+            return Response(archived)
+    
     def create(self, request, *args, **kwargs):
         """Create a new application"""
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        application = serializer.save()
+        with transaction.atomic():
+            application = serializer.save()
+            enqueue('stats.refresh_agent', {'agent_id': request.user.id}, unique=True)
+            publish(EVENT_CREATED, application)
+            record(application, request.user, action=ChangeLog.ACTION_CREATE)
         
         # Return the full application details
         detail_serializer = ApplicationDetailSerializer(
@@ -119,6 +221,20 @@ class ApplicationViewSet(viewsets.ModelViewSet):
         )
         return Response(detail_serializer.data, status=status.HTTP_201_CREATED)
     
+    def update(self, request, *args, **kwargs):
+        """Update an application; the response doubles as the audit 'after' state"""
+        response = super().update(request, *args, **kwargs)
+        record(self.audit_instance, request.user, before=self.audit_before, after=response.data)
+        return response
+    
+    def perform_update(self, serializer):
+        self.audit_instance = serializer.instance
+        self.audit_before = serializer.to_representation(serializer.instance)
+        with transaction.atomic():
+            application = serializer.save()
+            enqueue('stats.refresh_agent', {'agent_id': application.agent_id}, unique=True)
+            publish(EVENT_UPDATED, application)
+    
     @action(detail=True, methods=['post'])
     def submit(self, request, pk=None):
         """Mark application as submitted/finalized"""
@@ -131,12 +247,210 @@ class ApplicationViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        # Post-processing runs in the job worker so the agent does not wait
+        with transaction.atomic():
+            if application.submitted_at is None:
+                application.submitted_at = timezone.now()
+                application.save(update_fields=['submitted_at', 'updated_at'])
+                record(
+                    application, request.user,
+                    before={'submitted_at': None}, after={'submitted_at': application.submitted_at},
+                )
+            enqueue('stats.refresh_agent', {'agent_id': application.agent_id}, unique=True)
+            enqueue('notifications.submission', {'application_id': application.id})
+            enqueue('reports.render', {'application_id': application.id})
+            publish(EVENT_SUBMITTED, application)
+        
         return Response({
             'message': 'Application submitted successfully',
             'application_id': application.id,
             'file_no': application.file_no,
-            'overall_status': application.conclusion.overall_status
+            'overall_status': application.conclusion.overall_status,
+            'submitted_at': application.submitted_at
+        })
+    
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            agent_id = instance.agent_id
+            publish(EVENT_DELETED, instance)
+            record(instance, self.request.user, action=ChangeLog.ACTION_DELETE)
+            instance.delete()
+            enqueue('stats.refresh_agent', {'agent_id': agent_id}, unique=True)
+    
+    @action(detail=True, methods=['get'])
+    def report(self, request, pk=None):
+        """Download the verification report (rendered once per application version)"""
+        fmt = request.query_params.get('type', FORMAT_PDF)
+        if fmt not in FORMATS:
+            return Response(
+                {'error': f"type must be one of: {', '.join(FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        application = self.get_object()
+        try:
+            report = open_report(application, fmt)
+        except ReportError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        return FileResponse(
+            report,
+            content_type=FORMATS[fmt],
+            as_attachment=fmt == FORMAT_PDF,
+            filename=f'report-{application.file_no}.{fmt}',
+        )
+    
+    @action(detail=True, methods=['get'])
+    def history(self, request, pk=None):
+        """
+        Change history, newest first.
+        
+        Visible to the owning agent (archived applications included) and to
+        supervisors of that agent. Query params: limit (1-200, default 50),
+        before=<entry id> for the next page. Entries are ordered by
+        (created_at, id): ids are not in time order across processes.
+        """
+        user = request.user
+        try:
+            pk = int(pk)
+        except (TypeError, ValueError):
+            return Response({'error': 'Application not found'}, status=status.HTTP_404_NOT_FOUND)
+        visible = (
+            Application.objects.filter(pk=pk, agent=user).exists()
+            or ArchivedApplication.objects.filter(pk=pk, agent=user).exists()
+            or (is_supervisor(user) and team_applications(user).filter(pk=pk).exists())
+        )
+        if not visible:
+            return Response({'error': 'Application not found'}, status=status.HTTP_404_NOT_FOUND)
+        entries = ChangeLog.objects.filter(application_id=pk)
+        try:
+            limit = int(request.query_params.get('limit', 50))
+            if not 1 <= limit <= 200:
+                raise ValueError
+            before = request.query_params.get('before')
+            if before:
+                before = int(before)
+        except ValueError:
+            return Response(
+                {'error': 'limit must be an integer from 1 to 200 and before an entry id'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if before:
+            cursor = entries.filter(id=before).values_list('created_at', flat=True).first()
+            if cursor is None:
+                return Response({'error': 'Unknown before entry'}, status=status.HTTP_400_BAD_REQUEST)
+            entries = entries.filter(Q(created_at__lt=cursor) | Q(created_at=cursor, id__lt=before))
+        results = list(
+            entries.order_by('-created_at', '-id').values(
+                'id', 'section', 'action', 'changes', 'actor', 'created_at',
+                actor_username=F('actor__username'),
+            )[:limit]
+        )
+        return Response({
+            'results': results,
+            'next_before': results[-1]['id'] if len(results) == limit else None,
         })
+    
+    @action(detail=True, methods=['get'])
+    def duplicates(self, request, pk=None):
+        """Candidate duplicates of this applicant across all agents"""
+        application = self.get_object()
+        try:
+            limit = min(int(request.query_params.get('limit', 50)), 200)
+        except ValueError:
+            return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        candidates = find_duplicates(application, limit=limit)
+        return Response({'count': len(candidates), 'results': candidates})
+    
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        """Faceted counts over the (filtered) applications, in one query"""
+        return Response(facet_counts(self.filter_queryset(Application.objects.filter(agent=request.user))))
+    
+    @action(detail=False, methods=['get'])
+    def nearby(self, request):
+        """
+        Visits near a point or inside a bounding box.
+        
+        Query params: lat, lon, radius_km (default 1) - or application=<id> to
+        centre on another visit - or min_lat, min_lon, max_lat, max_lon.
+        Optional: limit (default 100, max 500).
+        """
+        params = request.query_params
+        applications = self.get_queryset().prefetch_related(None)
+        try:
+            limit = int(params.get('limit', 100))
+            if not 1 <= limit <= 500:
+                raise ValueError
+            center = None
+            if 'min_lat' in params:
+                box = tuple(float(params[key]) for key in ('min_lat', 'min_lon', 'max_lat', 'max_lon'))
+                if not (-90 <= box[0] <= box[2] <= 90 and -180 <= box[1] <= box[3] <= 180):
+                    raise ValueError
+            else:
+                if 'application' in params:
+                    origin = applications.filter(
+                        pk=int(params['application'])
+                    ).values_list('business_details__latitude', 'business_details__longitude').first()
+                    if origin is None or origin[0] is None:
+                        return Response(
+                            {'error': 'Application has no GPS location'},
+                            status=status.HTTP_400_BAD_REQUEST
+                        )
+                    center = origin
+                else:
+                    center = (float(params['lat']), float(params['lon']))
+                    if not (-90 <= center[0] <= 90 and -180 <= center[1] <= 180):
+                        raise ValueError
+                radius_km = float(params.get('radius_km', 1))
+                # Also rejects nan and inf
+                if not 0 < radius_km <= MAX_NEARBY_RADIUS_KM:
+                    raise ValueError
+                box = bounding_box(center[0], center[1], radius_km)
+        except (KeyError, ValueError):
+            return Response(
+                {'error': 'Provide lat & lon (optionally radius_km up to '
+                          f'{MAX_NEARBY_RADIUS_KM:g}), application, or a bounding box; limit 1-500'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        min_lat, min_lon, max_lat, max_lon = box
+        cells = geohash_cover(*box)
+        cell_filter = Q()
+        for cell in cells:
+            cell_filter |= Q(business_details__geohash__startswith=cell)
+        
+        rows = applications.filter(
+            cell_filter,
+            business_details__latitude__range=(min_lat, max_lat),
+            business_details__longitude__range=(min_lon, max_lon),
+        )
+        if center is None:
+            rows = rows.order_by('-pk')
+        else:
+            # Equirectangular distance: cheap in SQL and accurate at these radii.
+            # Ordering and the limit run in the database; haversine is exact below.
+            km_per_degree = math.radians(EARTH_RADIUS_KM)
+            dy = (F('business_details__latitude') - center[0]) * km_per_degree
+            dx = (F('business_details__longitude') - center[1]) * km_per_degree * math.cos(math.radians(center[0]))
+            rows = rows.alias(
+                distance2=ExpressionWrapper(dy * dy + dx * dx, output_field=FloatField())
+            ).filter(distance2__lte=radius_km ** 2).order_by('distance2')
+        rows = rows.values(
+            'id', 'file_no', 'applicant_name', 'visit_date',
+            'business_details__business_name',
+            'business_details__latitude', 'business_details__longitude',
+        )[:limit]
+        
+        results = []
+        for row in rows:
+            lat, lon = row.pop('business_details__latitude'), row.pop('business_details__longitude')
+            row['business_name'] = row.pop('business_details__business_name')
+            row['latitude'], row['longitude'] = lat, lon
+            if center is not None:
+                row['distance_km'] = round(haversine_km(center[0], center[1], lat, lon), 3)
+                if row['distance_km'] > radius_km:
+                    continue
+            results.append(row)
+        return Response({'count': len(results), 'results': results})
 
 
 @api_view(['GET'])
@@ -144,11 +458,15 @@ class ApplicationViewSet(viewsets.ModelViewSet):
 def application_stats(request):
     """Get application statistics for the current user"""
     applications = Application.objects.filter(agent=request.user)
+    archived = archived_counts(request.user.id)
     
-    total = applications.count()
-    positive = applications.filter(conclusion__overall_status='Positive').count()
-    negative = applications.filter(conclusion__overall_status='Negative').count()
-    refer_to_credit = applications.filter(conclusion__overall_status='Refer to credit').count()
+    total = applications.count() + archived['total']
+    positive = applications.filter(conclusion__overall_status='Positive').count() + archived['positive']
+    negative = applications.filter(conclusion__overall_status='Negative').count() + archived['negative']
+    refer_to_credit = (
+        applications.filter(conclusion__overall_status='Refer to credit').count()
+        + archived['refer_to_credit']
+    )
     pending = total - positive - negative - refer_to_credit
     
     return Response({
@@ -158,3 +476,493 @@ def application_stats(request):
         'refer_to_credit': refer_to_credit,
         'pending': pending
     })
+
+
+# ============ Draft Views ============
+
+class DraftViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin,
+                   mixins.DestroyModelMixin, viewsets.GenericViewSet):
+    """
+    Unvalidated drafts of the current user's in-progress forms.
+    
+    Endpoints:
+    - GET /api/drafts/ - List drafts (without their data)
+    - GET /api/drafts/{key}/ - Get a draft
+    - PUT /api/drafts/{key}/ - Autosave {data}; unchanged content is not rewritten
+    - DELETE /api/drafts/{key}/ - Discard a draft
+    - POST /api/drafts/{key}/finalize/ - Validate and create the Application
+      (optionally with a final {data}); the draft is removed in the same transaction
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    lookup_field = 'key'
+    lookup_value_regex = r'[A-Za-z0-9_-]{1,64}'
+    
+    def get_queryset(self):
+        queryset = Draft.objects.filter(agent=self.request.user)
+        if self.action == 'list':
+            queryset = queryset.defer('data').annotate(applicant_name=KT('data__applicant_name'))
+        return queryset
+    
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return DraftListSerializer
+        return DraftSerializer
+    
+    def _save(self, request, key):
+        """Upsert request.data['data']; returns (result, None) or (None, error Response)"""
+        if not isinstance(request.data, dict):
+            return None, Response({'error': 'Expected a JSON object'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            digest, size, changed = save_draft(request.user, key, request.data.get('data'))
+        except DraftError as exc:
+            return None, Response({'error': str(exc)}, status=exc.status)
+        return {'key': key, 'digest': digest, 'size': size, 'changed': changed}, None
+    
+    def update(self, request, key=None):
+        """Create or replace the draft in a single statement"""
+        result, error = self._save(request, key)
+        return error or Response(result)
+    
+    @action(detail=True, methods=['post'])
+    def finalize(self, request, key=None):
+        """Promote the draft to an Application; validation errors keep the draft"""
+        if not isinstance(request.data, dict):
+            return Response({'error': 'Expected a JSON object'}, status=status.HTTP_400_BAD_REQUEST)
+        if 'data' in request.data:
+            # Saved outside the transaction so the latest edits survive a failed validation
+            result, error = self._save(request, key)
+            if error:
+                return error
+        with transaction.atomic():
+            draft = Draft.objects.select_for_update().filter(agent=request.user, key=key).first()
+            if draft is None:
+                return Response({'error': 'Draft not found'}, status=status.HTTP_404_NOT_FOUND)
+            serializer = ApplicationDetailSerializer(data=draft.data, context={'request': request})
+            serializer.is_valid(raise_exception=True)
+            application = serializer.save()
+            draft.delete()
+            enqueue('stats.refresh_agent', {'agent_id': request.user.id}, unique=True)
+            publish(EVENT_CREATED, application)
+            record(application, request.user, action=ChangeLog.ACTION_CREATE)
+        
+        detail_serializer = ApplicationDetailSerializer(application, context={'request': request})
+        return Response(detail_serializer.data, status=status.HTTP_201_CREATED)
+
+
+# ============ Batch Views ============
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def batch(request):
+    """
+    Run queued application/draft operations in one request.
+    
+    Body: {operations: [{id, method, path, body}], stop_on_error}. Each
+    operation gets its own savepoint; results come back in order as
+    {id, status, body}. Paths may reference earlier results, e.g.
+    /api/applications/{new1.id}/submit/.
+    """
+    serializer = BatchSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    results = run_batch(
+        request, serializer.validated_data['operations'],
+        stop_on_error=serializer.validated_data['stop_on_error'],
+    )
+    return Response({'results': results})
+
+
+# ============ Analytics Views ============
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def portfolio_analytics(request):
+    """
+    Portfolio distributions: turnover, EMI burden, LTV and status breakdowns.
+    
+    Query params: agent (staff only), status, ownership_type, end_use,
+    created_from, created_to (YYYY-MM-DD), refresh=1 to bypass the cache.
+    """
+    try:
+        filters = parse_filters(request.query_params, allow_agent=request.user.is_staff)
+    except ValueError as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    refresh = request.query_params.get('refresh') == '1'
+    return Response(cached_portfolio(request.user, filters, refresh=refresh))
+
+
+# ============ Supervisor Views ============
+
+class TeamApplicationViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Applications across the supervisor's team.
+    
+    Endpoints:
+    - GET /api/team/applications/ - Paginated list (?limit=&offset=)
+    - GET /api/team/applications/{id}/ - Application details
+    
+    Filters: ?agent=<user id>, ?branch=<code>, ?status=Positive|Negative|
+    Refer to credit|pending, ?overdue=1, plus ?payment_mode= and ?family_member=.
+    """
+    permission_classes = [IsSupervisor]
+    pagination_class = LimitOffsetPagination
+    
+    def get_queryset(self):
+        queryset = team_applications(self.request.user).select_related('agent', 'conclusion')
+        if self.action == 'retrieve':
+            queryset = queryset.select_related(
+                'business_details', 'co_applicant', 'security_details'
+            ).prefetch_related(
+                'other_businesses', 'loans', 'bank_accounts',
+                'business_details__owners', 'business_details__persons_met'
+            )
+        return queryset
+    
+    def filter_queryset(self, queryset):
+        return filter_team_applications(queryset, self.request.query_params)
+    
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return ApplicationListSerializer
+        return ApplicationDetailSerializer
+
+
+@api_view(['GET'])
+@permission_classes([IsSupervisor])
+def team_agents(request):
+    """Per-agent counts, pending and overdue visits (?ordering=-overdue etc.)"""
+    rows = agent_rows(request.user, ordering=request.query_params.get('ordering', 'username'))
+    return Response({'count': len(rows), 'results': rows})
+
+
+@api_view(['GET'])
+@permission_classes([IsSupervisor])
+def team_summary(request):
+    """Team-wide status mix, pending and overdue totals"""
+    return Response(team_totals(request.user))
+
+
+@api_view(['POST'])
+@permission_classes([IsSupervisor])
+def team_bulk_action(request):
+    """
+    Reassign, set status or archive many team applications in one transaction.
+    
+    Body: {action: reassign|set_status|archive, ids: [...] | filter: {agent,
+    branch, status, overdue, payment_mode, family_member}, agent (reassign),
+    overall_status (set_status), dry_run}
+    """
+    serializer = BulkActionSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    data = serializer.validated_data
+    try:
+        summary = run_bulk_action(
+            request.user, data['action'], ids=data.get('ids'), filters=data.get('filter'),
+            agent_id=data.get('agent'), overall_status=data.get('overall_status'),
+            dry_run=data['dry_run'],
+        )
+    except BulkError as exc:
+        return Response({'error': str(exc)}, status=exc.status)
+    return Response(summary)
+
+
+# ============ Event Stream Views ============
+
+async def _events_user(request):
+    """Token from ?token= (EventSource cannot send headers), else the session"""
+    key = request.GET.get('token')
+    if key:
+        token = await Token.objects.select_related('user').filter(key=key).afirst()
+        return token.user if token and token.user.is_active else None
+    user = await request.auser()
+    return user if user.is_authenticated else None
+
+
+def _visible_agent_ids(user, scope):
+    """Agent ids whose events the user may receive; None means all"""
+    if scope == 'team' and is_supervisor(user):
+        if user.is_staff:
+            return None
+        return set(team_members(user).values_list('pk', flat=True)) | {user.pk}
+    return {user.pk}
+
+
+async def application_events(request):
+    """
+    Server-sent events for application changes (served by the ASGI app).
+    
+    GET /api/events/?token=<auth token>[&scope=team]
+    Events: application.created, application.updated, application.submitted,
+    application.deleted, and resync (events were lost; refetch).
+    """
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+    user = await _events_user(request)
+    if user is None:
+        return JsonResponse({'error': 'Authentication credentials were not provided.'}, status=401)
+    agent_ids = await sync_to_async(_visible_agent_ids)(user, request.GET.get('scope'))
+    subscription = hub.subscribe(agent_ids)
+    
+    async def stream():
+        try:
+            yield f'retry: {settings.EVENTS_RETRY_MS}\n\n'
+            while True:
+                try:
+                    event = await subscription.get(settings.EVENTS_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ': keep-alive\n\n'
+                    continue
+                yield format_event(event)
+        finally:
+            subscription.close()
+    
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+# ============ Profiling Views ============
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def profile_list(request):
+    """Recent request profiles (newest first); record one with X-Profile: 1"""
+    return Response({'results': list_profiles()})
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def profile_detail(request, profile_id):
+    """Timings, SQL log and top functions of one profile (?download=pstats for the raw dump)"""
+    if request.query_params.get('download') == 'pstats':
+        path = pstats_path(profile_id)
+        if path is None:
+            return Response({'error': 'Profile not found'}, status=status.HTTP_404_NOT_FOUND)
+        return FileResponse(open(path, 'rb'), as_attachment=True, filename=f'{profile_id}.prof')
+    profile = get_profile(profile_id)
+    if profile is None:
+        return Response({'error': 'Profile not found'}, status=status.HTTP_404_NOT_FOUND)
+    return Response(profile)
+
+
+# ============ Snapshot Views ============
+
+@api_view(['GET', 'POST'])
+@permission_classes([permissions.IsAdminUser])
+def snapshot_list(request):
+    """
+    GET: recent analytics snapshot exports.
+    POST {kind: incremental|full, format: parquet|arrow}: queue an export
+    for the job worker (202).
+    """
+    if request.method == 'POST':
+        serializer = SnapshotRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            export = create_export(
+                serializer.validated_data['kind'], serializer.validated_data['format'], request.user
+            )
+            enqueue('snapshots.export', {'export_id': export.pk})
+        return Response(SnapshotExportSerializer(export).data, status=status.HTTP_202_ACCEPTED)
+    exports = SnapshotExport.objects.select_related('requested_by')[:50]
+    return Response({'results': SnapshotExportSerializer(exports, many=True).data})
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def snapshot_detail(request, export_id):
+    """One export's state; ?file=<name> downloads one of its files"""
+    export = SnapshotExport.objects.select_related('requested_by').filter(pk=export_id).first()
+    if export is None:
+        return Response({'error': 'Snapshot not found'}, status=status.HTTP_404_NOT_FOUND)
+    name = request.query_params.get('file')
+    if name:
+        path = snapshot_file(export, name)
+        if path is None:
+            return Response({'error': 'File not found'}, status=status.HTTP_404_NOT_FOUND)
+        return FileResponse(open(path, 'rb'), as_attachment=True, filename=f'{export.path}-{name}')
+    return Response(SnapshotExportSerializer(export).data)
+
+
+# ============ File Number Allocation Views ============
+
+class FileNoBlockViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """
+    Blocks of file numbers reserved by the current agent.
+    
+    Endpoints:
+    - GET /api/file-numbers/ - List blocks issued to the current user
+    - POST /api/file-numbers/allocate/ - Reserve a new block {scope, size}
+    - POST /api/file-numbers/{id}/release/ - Return the unused tail {last_used}
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = FileNoBlockSerializer
+    
+    def get_queryset(self):
+        return FileNoBlock.objects.filter(issued_to=self.request.user).select_related('sequence')
+    
+    @action(detail=False, methods=['post'])
+    def allocate(self, request):
+        """Reserve a contiguous block of file numbers"""
+        serializer = FileNoAllocationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            block = allocate_block(request.user, **serializer.validated_data)
+        except AllocationError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(FileNoBlockSerializer(block).data, status=status.HTTP_201_CREATED)
+    
+    @action(detail=True, methods=['post'])
+    def release(self, request, pk=None):
+        """Release a block, returning unused numbers to the sequence when possible"""
+        serializer = FileNoReleaseSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            block = release_block(self.get_object(), serializer.validated_data.get('last_used'))
+        except AllocationError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(FileNoBlockSerializer(block).data)
+
+
+# ============ Attachment Views ============
+
+class UploadSessionViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """
+    Chunked, resumable uploads.
+    
+    Endpoints:
+    - POST /api/uploads/ - Start an upload {application, filename, size, content_type, kind}
+    - GET /api/uploads/{id}/ - Upload state; `received` is the offset to resume from
+    - PUT /api/uploads/{id}/ - Append a raw chunk; `Upload-Offset` header gives its position
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = UploadSessionSerializer
+    throttle_scope = 'upload'
+    
+    def get_queryset(self):
+        return UploadSession.objects.filter(uploaded_by=self.request.user).select_related(
+            'attachment__blob'
+        )
+    
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        if data['application'].agent_id != request.user.id:
+            return Response({'error': 'Application not found'}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            session = start_upload(
+                data['application'], request.user, data['filename'], data['size'],
+                data.get('content_type'), data.get('kind', 'other'),
+            )
+        except UploadError as exc:
+            return Response({'error': str(exc)}, status=exc.status)
+        return Response(
+            UploadSessionSerializer(session).data,
+            status=status.HTTP_201_CREATED,
+            headers={'Upload-Offset': '0'}
+        )
+    
+    def retrieve(self, request, *args, **kwargs):
+        session = self.get_object()
+        return Response(
+            UploadSessionSerializer(session).data,
+            headers={'Upload-Offset': str(session.received)}
+        )
+    
+    def update(self, request, pk=None):
+        """Append one chunk; the body is streamed to disk, not parsed"""
+        session = self.get_object()
+        try:
+            offset = int(request.headers.get('Upload-Offset', ''))
+            length = int(request.headers.get('Content-Length', ''))
+        except ValueError:
+            return Response(
+                {'error': 'Upload-Offset and Content-Length headers are required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            session = append_chunk(session, offset, request.stream, length)
+        except UploadError as exc:
+            session.refresh_from_db(fields=['received'])
+            return Response(
+                {'error': str(exc), 'received': session.received},
+                status=exc.status,
+                headers={'Upload-Offset': str(session.received)}
+            )
+        return Response(
+            UploadSessionSerializer(session).data,
+            headers={'Upload-Offset': str(session.received)}
+        )
+
+
+class AttachmentViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin,
+                        mixins.DestroyModelMixin, viewsets.GenericViewSet):
+    """
+    Attachments of the current user's applications.
+    
+    Endpoints:
+    - GET /api/attachments/?application={id} - List attachments
+    - GET /api/attachments/{id}/content/ - Download (supports Range; ?thumbnail=1)
+    - DELETE /api/attachments/{id}/ - Remove an attachment
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = AttachmentSerializer
+    
+    def get_queryset(self):
+        queryset = Attachment.objects.filter(
+            application__agent=self.request.user
+        ).select_related('blob')
+        application_id = self.request.query_params.get('application')
+        if application_id:
+            queryset = queryset.filter(application_id=application_id)
+        return queryset
+    
+    def perform_destroy(self, instance):
+        delete_attachment(instance)
+    
+    @action(detail=True, methods=['get'])
+    def content(self, request, pk=None):
+        """Serve the file, honouring single byte-range requests"""
+        attachment = self.get_object()
+        blob = attachment.blob
+        storage = get_storage()
+        
+        if request.query_params.get('thumbnail'):
+            if not blob.thumbnail:
+                return Response({'error': 'Thumbnail not ready'}, status=status.HTTP_404_NOT_FOUND)
+            path, content_type, etag = blob.thumbnail, 'image/jpeg', f'"{blob.sha256}-thumb"'
+        else:
+            path, content_type, etag = blob.path, blob.content_type, f'"{blob.sha256}"'
+        
+        if request.headers.get('If-None-Match') == etag:
+            return HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        
+        try:
+            size = storage.size(path)
+        except StorageError:
+            return Response({'error': 'File not found'}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            byte_range = parse_range(request.headers.get('Range'), size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+        
+        inline = content_type in INLINE_CONTENT_TYPES
+        if not inline:
+            content_type = 'application/octet-stream'
+        start, end = byte_range or (0, size - 1)
+        response = StreamingHttpResponse(
+            storage.iter_range(path, start, end),
+            status=status.HTTP_206_PARTIAL_CONTENT if byte_range else status.HTTP_200_OK,
+            content_type=content_type,
+        )
+        if byte_range:
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(end - start + 1)
+        response['Accept-Ranges'] = 'bytes'
+        response['ETag'] = etag
+        response['Content-Disposition'] = content_disposition_header(not inline, attachment.filename)
+        response['X-Content-Type-Options'] = 'nosniff'
+        return response
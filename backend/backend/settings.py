@@ -2,9 +2,12 @@
 Django settings for backend project.
 """
 
+import json
 import os
 from pathlib import Path
 
+from corsheaders.defaults import default_headers
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 SECRET_KEY = os.environ.get('SECRET_KEY', 'django-insecure-dev-key-change-in-production')
@@ -20,6 +23,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework.authtoken',
     'corsheaders',
@@ -29,10 +33,13 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'api.middleware.CompressionMiddleware',
+    'api.middleware.GzipRequestMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'api.middleware.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -87,6 +94,12 @@ else:
         }
     }
 
+# Persistent connections: each gthread request thread keeps its own for
+# DB_CONN_MAX_AGE seconds, checked before reuse. The ASGI events service sets
+# DB_CONN_MAX_AGE=0, as Django recommends for async code.
+DATABASES['default']['CONN_MAX_AGE'] = int(os.environ.get('DB_CONN_MAX_AGE', '60'))
+DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -111,6 +124,8 @@ CORS_ALLOWED_ORIGINS = os.environ.get(
 ).split(',')
 
 CORS_ALLOW_CREDENTIALS = True
+# The form gzips large request bodies
+CORS_ALLOW_HEADERS = (*default_headers, 'content-encoding')
 
 # REST Framework settings
 REST_FRAMEWORK = {
@@ -121,4 +136,133 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    'DEFAULT_THROTTLE_CLASSES': [
+        'api.throttling.TokenBucketThrottle',
+    ],
+    # Reverse proxies in front of the app (nginx appends the client address to
+    # X-Forwarded-For); anonymous throttling keys on the address they saw
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', '1')),
 }
+
+# File number allocation
+FILE_NO_BLOCK_SIZE = int(os.environ.get('FILE_NO_BLOCK_SIZE', '50'))
+FILE_NO_MAX_BLOCK_SIZE = int(os.environ.get('FILE_NO_MAX_BLOCK_SIZE', '1000'))
+FILE_NO_WIDTH = int(os.environ.get('FILE_NO_WIDTH', '6'))
+
+# Duplicate detection: blocking keys shared by more applications than this are ignored
+DEDUP_MAX_KEY_MATCHES = int(os.environ.get('DEDUP_MAX_KEY_MATCHES', '200'))
+
+# Background jobs (manage.py run_jobs)
+JOBS_MAX_ATTEMPTS = int(os.environ.get('JOBS_MAX_ATTEMPTS', '3'))
+JOBS_RETRY_BACKOFF_SECONDS = int(os.environ.get('JOBS_RETRY_BACKOFF_SECONDS', '30'))
+JOBS_LOCK_TIMEOUT_SECONDS = int(os.environ.get('JOBS_LOCK_TIMEOUT_SECONDS', '900'))
+JOBS_RUN_EAGERLY = os.environ.get('JOBS_RUN_EAGERLY', 'False') == 'True'
+
+SUBMISSION_NOTIFY_EMAILS = [
+    email for email in os.environ.get('SUBMISSION_NOTIFY_EMAILS', '').split(',') if email
+]
+
+# Rendered verification reports (cached per application version)
+REPORT_CACHE_DIR = Path(os.environ.get('REPORT_CACHE_DIR', BASE_DIR / 'var' / 'reports'))
+
+# Attachments (chunked uploads, content-addressed storage)
+ATTACHMENT_STORAGE = 'api.storage.LocalFileStorage'
+ATTACHMENT_ROOT = Path(os.environ.get('ATTACHMENT_ROOT', BASE_DIR / 'var' / 'attachments'))
+ATTACHMENT_MAX_FILE_BYTES = int(os.environ.get('ATTACHMENT_MAX_FILE_BYTES', str(50 * 1024 * 1024)))
+ATTACHMENT_MAX_CHUNK_BYTES = int(os.environ.get('ATTACHMENT_MAX_CHUNK_BYTES', str(8 * 1024 * 1024)))
+ATTACHMENT_THUMBNAIL_SIZE = 320
+
+# Archival of finalized applications (manage.py archive_applications)
+ARCHIVE_AFTER_DAYS = int(os.environ.get('ARCHIVE_AFTER_DAYS', '365'))
+
+# Portfolio analytics (/api/analytics/portfolio/)
+ANALYTICS_CACHE_SECONDS = int(os.environ.get('ANALYTICS_CACHE_SECONDS', '300'))
+
+# Automatic pre-score (api/scoring.py); weights override DEFAULT_WEIGHTS per feature
+RISK_SCORE_WEIGHTS = json.loads(os.environ.get('RISK_SCORE_WEIGHTS', '{}'))
+RISK_SCORE_POSITIVE = float(os.environ.get('RISK_SCORE_POSITIVE', '70'))
+RISK_SCORE_REFER = float(os.environ.get('RISK_SCORE_REFER', '45'))
+
+# Supervisor dashboard: pending visits older than this are overdue
+VISIT_SLA_DAYS = int(os.environ.get('VISIT_SLA_DAYS', '3'))
+
+# Server-sent application events (/api/events/)
+EVENTS_KEEPALIVE_SECONDS = int(os.environ.get('EVENTS_KEEPALIVE_SECONDS', '15'))
+EVENTS_RETRY_MS = 5000
+EVENTS_QUEUE_SIZE = 100
+
+# Response compression (api.middleware.CompressionMiddleware)
+COMPRESSION_GZIP_LEVEL = 6
+COMPRESSION_BROTLI_QUALITY = 5
+# BREACH: random gzip header padding per response (0 disables)
+COMPRESSION_GZIP_MAX_RANDOM_BYTES = 100
+
+# Staff request profiling (X-Profile: 1); ring buffer of the last PROFILE_KEEP runs
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'True') == 'True'
+PROFILE_DIR = Path(os.environ.get('PROFILE_DIR', BASE_DIR / 'var' / 'profiles'))
+PROFILE_KEEP = int(os.environ.get('PROFILE_KEEP', '50'))
+
+# Admin changelists: above this many rows, show estimated counts
+ADMIN_COUNT_LIMIT = int(os.environ.get('ADMIN_COUNT_LIMIT', '10000'))
+
+# Cache: Redis when REDIS_URL is set, else per-process memory
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Request throttling (api/throttling.py): token buckets of N requests per period.
+# A scope set to None is not throttled.
+THROTTLE_CACHE = os.environ.get('THROTTLE_CACHE', 'default')
+THROTTLE_RATES = {
+    'login': '10/min',
+    'read': '600/min',
+    'write': '120/min',
+    'upload': '240/min',
+    **json.loads(os.environ.get('THROTTLE_RATES', '{}')),
+}
+
+# Server-side form drafts (/api/drafts/); size of the canonical JSON
+DRAFT_MAX_BYTES = int(os.environ.get('DRAFT_MAX_BYTES', str(256 * 1024)))
+
+# Change history (api/audit.py): buffered in each process, written in batches
+AUDIT_FLUSH_SECONDS = float(os.environ.get('AUDIT_FLUSH_SECONDS', '2'))
+AUDIT_BATCH_SIZE = 500
+AUDIT_BUFFER_LIMIT = 10000
+
+# Readiness (/api/ready/): how long a database probe result is reused
+READINESS_PROBE_SECONDS = float(os.environ.get('READINESS_PROBE_SECONDS', '5'))
+
+# Supervisor bulk actions (/api/team/bulk/): most applications one call may touch
+BULK_MAX_APPLICATIONS = int(os.environ.get('BULK_MAX_APPLICATIONS', '5000'))
+
+# Batched operations (/api/batch/)
+BATCH_MAX_OPERATIONS = int(os.environ.get('BATCH_MAX_OPERATIONS', '50'))
+
+# Analytics snapshots (manage.py export_snapshot, /api/admin/snapshots/)
+SNAPSHOT_DIR = Path(os.environ.get('SNAPSHOT_DIR', BASE_DIR / 'var' / 'snapshots'))
+SNAPSHOT_ROW_GROUP_SIZE = int(os.environ.get('SNAPSHOT_ROW_GROUP_SIZE', '50000'))
+SNAPSHOT_LAG_SECONDS = int(os.environ.get('SNAPSHOT_LAG_SECONDS', '60'))
+
+# Data-quality scanner (manage.py scan_data_quality): an incremental scan also
+# re-checks applications changed this long before the previous scan started
+QUALITY_CHUNK_SIZE = int(os.environ.get('QUALITY_CHUNK_SIZE', '2000'))
+QUALITY_SCAN_OVERLAP_SECONDS = int(os.environ.get('QUALITY_SCAN_OVERLAP_SECONDS', '300'))
@@ -0,0 +1,47 @@
+"""
+Gunicorn settings for production (Dockerfile.prod, docker-compose.prod.yml).
+
+The API is synchronous and runs as backend.wsgi on threaded workers. Only
+the event stream (/api/events/) needs ASGI: it runs as a separate process
+with GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker serving
+backend.asgi, and nginx routes that one path there.
+
+The app is preloaded in the master: Django setup, the URLconf and every
+view module are imported once, then shared with the workers on fork. Each
+worker checks the database and warms its caches before it takes traffic
+(see api/startup.py). /api/ready/ reports 503 until that has happened.
+"""
+import os
+import time
+
+_config_loaded = time.perf_counter()
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', '4'))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.environ.get('GUNICORN_THREADS', '4'))  # gthread only
+timeout = 120
+preload_app = True
+
+
+def when_ready(server):
+    from django.db import connections
+    from api import startup
+
+    startup.record('app_load', time.perf_counter() - _config_loaded)
+    startup.boot()
+    # Nothing opened in the master may be inherited by the workers
+    connections.close_all()
+    server.log.info('Preloaded app: %s', startup.TIMINGS)
+
+
+def post_fork(server, worker):
+    from api import startup
+
+    try:
+        startup.warm()
+    except Exception:
+        # The worker still serves; /api/ready/ retries the warm-up
+        server.log.exception('Warm-up failed in worker %s', worker.pid)
+    else:
+        server.log.info('Worker %s warm: %s', worker.pid, startup.TIMINGS)